@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import httpx
+import openai
+from deepgram import Deepgram
+
+from metrics import span, trace_request
+from rate_limiter import RequestScheduler
+from settings import (
+    API_BACKOFF_MAX_SECONDS, API_BACKOFF_SECONDS, API_CONNECT_TIMEOUT, API_KEEPALIVE_SECONDS, API_MAX_CLIENTS,
+    API_MAX_IN_FLIGHT, API_MAX_RETRIES, API_POOL_SIZE, API_TIMEOUT, DEEPGRAM_RPM, OPENAI_RPM, OPENAI_TPM
+)
+
+
+class ClientRegistry:
+    """Process-wide, per-API-key client cache.
+
+    Module state survives Streamlit reruns and is shared by every session, so
+    each key gets one client whose keep-alive connection pool is reused
+    instead of paying connection setup and a TLS handshake on every call.
+    Once more than max_clients keys are in use the least recently used
+    client is forgotten, not closed: a background job may still be using it,
+    and its connection pool is closed when the last user lets go of it.
+    """
+
+    def __init__(self, factory, max_clients=API_MAX_CLIENTS):
+        self.factory = factory
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key, options):
+        # Keep only a digest of the key around as the dict key
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest(), tuple(sorted(options.items()))
+
+    def get(self, api_key, **options):
+        key = self._key(api_key, options)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.factory(api_key, **options)
+                self._clients[key] = client
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+            return client
+
+    def close_all(self):
+        with self._lock:
+            for client in self._clients.values():
+                _close(client)
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+def _close(client):
+    close = getattr(client, "close", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def _make_openai_client(api_key, base_url=None):
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=API_POOL_SIZE,
+            max_keepalive_connections=API_POOL_SIZE,
+            keepalive_expiry=API_KEEPALIVE_SECONDS
+        ),
+        timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+        # Upload, provider wait and download of every request become timing spans
+        event_hooks={"request": [trace_request]}
+    )
+    # Retries are left to the scheduler so there is one policy for all calls
+    client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+    # Evicted clients are only dropped; the pool closes once nothing uses the client any more
+    weakref.finalize(client, http_client.close)
+    return client
+
+
+def _make_deepgram_client(api_key):
+    return Deepgram(api_key)
+
+
+openai_clients = ClientRegistry(_make_openai_client)
+deepgram_clients = ClientRegistry(_make_deepgram_client)
+
+openai_scheduler = RequestScheduler(
+    "OpenAI", rpm=OPENAI_RPM, tpm=OPENAI_TPM, max_in_flight=API_MAX_IN_FLIGHT, max_retries=API_MAX_RETRIES,
+    base_delay=API_BACKOFF_SECONDS, max_delay=API_BACKOFF_MAX_SECONDS,
+    retry_on=(openai.APIConnectionError, ConnectionError, TimeoutError)
+)
+deepgram_scheduler = RequestScheduler(
+    "Deepgram", rpm=DEEPGRAM_RPM, max_in_flight=API_MAX_IN_FLIGHT, max_retries=API_MAX_RETRIES,
+    base_delay=API_BACKOFF_SECONDS, max_delay=API_BACKOFF_MAX_SECONDS
+)
+
+
+def get_openai_client(api_key, base_url=None):
+    """Shared OpenAI client for this key (base_url=None uses OPENAI_BASE_URL or the default)"""
+    return openai_clients.get(api_key, base_url=base_url)
+
+
+def get_deepgram_client(api_key):
+    """Shared Deepgram client for this key"""
+    return deepgram_clients.get(api_key)
+
+
+def call_openai(client, fn, tokens=0, hold=False):
+    """Run fn() (a request made with client) through the scheduler for the client's key"""
+    with span("provider_call", provider="openai"):
+        return openai_scheduler.call(getattr(client, "api_key", None), fn, tokens, hold)
+
+
+def call_deepgram(api_key, fn):
+    """Run fn() (a Deepgram request) through the scheduler for api_key"""
+    with span("provider_call", provider="deepgram"):
+        return deepgram_scheduler.call(api_key, fn)
@@ -6,9 +6,35 @@ import base64
 from datetime import datetime, timedelta
 import re
 import time
-import tempfile
-import os
-from deepgram import Deepgram
+import bisect
+import functools
+import sqlite3
+from api_clients import deepgram_scheduler, get_openai_client, openai_scheduler
+from background_jobs import JobExecutor, JobReporter
+from audio_chunking import ChunkTranscriptionError
+from live_transcription import FakeTranscriber, LiveTranscriber
+from meeting_archive import MeetingArchive
+from llm_streaming import stream_chat_completion
+from metrics import metrics, span
+from mom_refinement import REFINEMENTS, strip_footer
+from prior_context import PriorContextRetriever
+from segment_index import SegmentIndex
+from session_store import BlobRef, BlobStore, SessionRegistry, approx_size
+from token_budget import context_limit, exact_counts
+from transcript import Transcript
+from settings import (
+    ARCHIVE_MEETINGS, ARCHIVE_PATH, BLOB_DIR, BLOB_MAX_AGE_DAYS, BLOB_MAX_MB, BLOB_MEMORY_MB, CHUNK_MINUTES,
+    JOB_WORKERS, LIVE_PROVIDER, LIVE_WINDOW_SECONDS, LIVE_WORKERS, MOM_ALLOW_ESCALATION, MOM_MAX_TOKENS,
+    PRIOR_CONTEXT_TOKENS, SESSION_IDLE_MINUTES, WHISPER_MAX_BYTES
+)
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit_webrtc import WebRtcMode, webrtc_streamer
+from pipeline import (
+    add_footer, completion_cache_key, format_time, open_completion_cache, open_transcript_cache, preview_mom_budget,
+    request_tokens, window_transcriber
+)
+import pipeline
 
 
 # Page configuration
@@ -65,6 +91,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Each script run is timed as the "render" stage
+run_started = time.perf_counter()
+
 # Initialize session state
 if 'transcript_data' not in st.session_state:
     st.session_state.transcript_data = None
@@ -74,218 +103,867 @@ if 'generated_mom' not in st.session_state:
     st.session_state.generated_mom = ""
 if 'api_key_set' not in st.session_state:
     st.session_state.api_key_set = False
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+# A full run covers every panel, so a rerun one of them asked for is already happening
+st.session_state.pop('app_rerun', None)
 
-def format_time(seconds):
-    """Convert seconds to MM:SS format"""
-    minutes = int(seconds // 60)
-    seconds = int(seconds % 60)
-    return f"{minutes:02d}:{seconds:02d}"
+def parse_time(value):
+    """Parse MM:SS, HH:MM:SS or plain seconds; returns None if it isn't a time"""
+    try:
+        seconds = 0.0
+        for part in value.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
 
-def transcribe_audio_real(audio_file, api_key):
-    """Real transcription function using OpenAI Whisper API"""
+TRANSCRIPT_PAGE_SIZES = [25, 50, 100]
+JOB_POLL_SECONDS = 0.5
+
+# Derived session data an idle session can rebuild on demand
+IDLE_EVICTABLE_KEYS = ('selection',)
+
+def note_activity():
+    """Mark this session as active (full runs and panel reruns alike)"""
+    script_ctx = get_script_run_ctx()
+    if script_ctx is not None:
+        get_session_registry().touch(script_ctx.session_id, script_ctx.session_state)
+
+def request_app_rerun():
+    """Widget callback inside a panel: the change shows elsewhere too, so the whole app reruns after the panel"""
+    st.session_state.app_rerun = True
+
+def panel(name):
+    """Decorator for a part of the page that reruns on its own (a fragment) when one of its widgets changes.
+
+    Each run of the panel is recorded as a render span labelled with its name.
+    Call the panel with run_every=seconds to rerun it on a timer while it shows a running job.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            note_activity()
+            with span("render", panel=name):
+                fn(*args, **kwargs)
+            if st.session_state.pop('app_rerun', False):
+                st.rerun()
+
+        def show(*args, run_every=None, **kwargs):
+            return st.fragment(run, run_every=run_every)(*args, **kwargs)
+        return show
+    return decorate
+
+@st.cache_resource
+def get_blob_store():
+    """Transcripts, prompts and MoMs on disk; sessions only keep handles (shared by all sessions)"""
+    return BlobStore(BLOB_DIR, max_bytes=BLOB_MAX_MB * 1024 * 1024, max_age=BLOB_MAX_AGE_DAYS * 24 * 3600,
+                     memory_bytes=BLOB_MEMORY_MB * 1024 * 1024)
+
+def session_alive(session_id):
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+@st.cache_resource
+def get_session_registry():
+    """Last activity of every session, for releasing idle ones"""
+    return SessionRegistry(SESSION_IDLE_MINUTES * 60, alive=session_alive)
+
+def show_missing_payload(key):
+    st.error(f"⚠️ The saved {key.replace('_', ' ')} is no longer on disk (stored payloads are cleaned up after "
+             f"{BLOB_MAX_AGE_DAYS} days or beyond {BLOB_MAX_MB} MB). Please redo that step.")
+
+def load_payload(key, default=None):
+    """Session value kept in the blob store, loaded on access (with an error if its blob is gone)"""
+    value = st.session_state.get(key)
+    if not isinstance(value, BlobRef):
+        return default if value is None else value
+    loaded = get_blob_store().get(value)
+    if loaded is None:
+        show_missing_payload(key)
+        return default
+    return loaded
+
+def store_payload(key, value):
+    """Move value to the blob store and keep only its handle in the session (empty values stay inline).
+
+    The handle it replaces is released, so superseded values (earlier selections,
+    live transcripts one window behind) don't pile up on disk.
+    """
+    store = get_blob_store()
+    previous = st.session_state.get(key)
+    st.session_state[key] = store.put(value) if value else value
+    if isinstance(previous, BlobRef):
+        store.release(previous)
+
+def release_idle_session(state):
+    """Drop what an idle session holds beyond its handles: finished jobs and a stopped recorder"""
+    if 'jobs' in state:
+        jobs = state['jobs']
+        for slot in [slot for slot, job in jobs.items() if job.handled]:
+            del jobs[slot]
+    live = state['live_transcriber'] if 'live_transcriber' in state else None
+    if live is not None and (live.stopped or not live.has_audio):
+        del state['live_transcriber']
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def shared_segment_index(key, _ref):
+    """Index over a stored transcript, shared by every session showing it"""
+    transcript = get_blob_store().get(_ref)
+    if transcript is None:
+        raise LookupError(key)  # not cached, so the next call looks again
+    return SegmentIndex(transcript, format_time)
+
+def get_segment_index():
+    """Index over the current transcript, built once per transcript (None if its blob is gone)"""
+    if not isinstance(st.session_state.transcript_data, BlobRef):
+        store_payload('transcript_data', Transcript.from_segments(st.session_state.transcript_data))
+    ref = st.session_state.transcript_data
     try:
-        # Set up OpenAI client
-        client = openai.OpenAI(api_key=api_key)
-
-        st.info(f"📁 Processing file: {audio_file.name} ({audio_file.size / 1024 / 1024:.2f} MB)")
-
-        # Create a temporary file to save the uploaded audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.name)[1]) as tmp_file:
-            tmp_file.write(audio_file.read())
-            tmp_file_path = tmp_file.name
-
-        # Progress indicators
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        try:
-            # Step 1: Upload and transcribe
-            status_text.text("🎵 Uploading audio to OpenAI...")
-            progress_bar.progress(25)
-
-            with open(tmp_file_path, "rb") as audio_file_obj:
-                # Use Whisper API with timestamps
-                status_text.text("🤖 Transcribing with Whisper API...")
-                progress_bar.progress(50)
-
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file_obj,
-                    response_format="verbose_json",
-                    timestamp_granularities=["segment"]
-                )
+        return shared_segment_index(ref.key, ref)
+    except LookupError:
+        return None
+
+@st.cache_resource
+def get_transcript_cache():
+    """Shared on-disk transcript cache (one instance per server process)"""
+    return open_transcript_cache()
+
+@st.cache_resource
+def get_completion_cache():
+    """Shared on-disk cache of chat completions (one instance per server process)"""
+    return open_completion_cache()
+
+@st.cache_resource
+def get_meeting_archive():
+    """Shared archive of generated minutes (None when ARCHIVE_MEETINGS is off)"""
+    return MeetingArchive(ARCHIVE_PATH) if ARCHIVE_MEETINGS else None
+
+@st.cache_resource
+def get_prior_context_retriever():
+    """Vector index over archived minutes, shared by every session (None without an archive)"""
+    archive = get_meeting_archive()
+    return PriorContextRetriever(archive) if archive is not None else None
+
+@st.cache_resource
+def get_job_executor():
+    """Worker pool for background transcription and generation (shared by all sessions)"""
+    return JobExecutor(JOB_WORKERS)
+
+# Background job functions run on worker threads: no st.* calls in here
+def transcription_job(job, data, filename, provider, api_key, transcript_cache):
+    """Transcribe an upload with the chosen provider, going through the transcript cache"""
+    client_or_key = get_openai_client(api_key) if provider == "OpenAI" else api_key
+    segments, from_cache = pipeline.transcribe(data, filename, provider, client_or_key,
+                                               cache=transcript_cache, reporter=JobReporter(job))
+    if from_cache:
+        job.notices.append("⚡ Loaded transcript from cache - no API call needed")
+    return segments
+
+def stream_completion_job(job, client, request, completion_cache, use_cache=True):
+    """Stream a chat completion into job.partial; returns (text with footer, stats)"""
+    cache_key = completion_cache_key(request)
+    cached_mom = completion_cache.get(cache_key) if use_cache else None
+    if cached_mom is not None:
+        job.notices.append("⚡ Loaded from response cache - identical request, no API call needed")
+        return add_footer(cached_mom), None
+
+    job.message = "🤖 Analyzing meeting transcript..."
+    # Cancelling stops the loop; closing the stream cancels the upstream request
+    stream = stream_chat_completion(client, tokens=request_tokens(request), **request)
+    try:
+        with span("generation", model=request['model']):
+            for delta in stream:
+                job.check_cancelled()
+                job.partial.append(delta)
+    finally:
+        stream.close()
+
+    completion_cache.put(cache_key, stream.text)
+    return add_footer(stream.text), stream.stats()
+
+def generation_job(job, api_key, transcript, config, completion_cache, use_cache=True, retriever=None):
+    """Condense long transcripts, fit the prompt into the model's context, then stream the MoM"""
+    client = get_openai_client(api_key)
+    # Long meetings are reduced to per-part notes before the final pass
+    request, plan, mom_source = pipeline.prepare_mom_request(transcript, config, client, completion_cache,
+                                                             use_cache, JobReporter(job), retriever=retriever)
+    response, stats = stream_completion_job(job, client, request, completion_cache, use_cache)
+    return {'prompt': request['messages'][-1]['content'], 'response': response, 'source': mom_source,
+            'stats': stats, 'plan': plan, 'transcript': transcript, 'config': config}
+
+def refinement_job(job, api_key, current_mom, refinement, source, config, completion_cache, use_cache=True):
+    """Apply one refinement edit to the current MoM"""
+    client = get_openai_client(api_key)
+    request, plan = pipeline.prepare_refinement_request(
+        current_mom,
+        refinement['instruction'],
+        source if refinement['needs_transcript'] else None,
+        model=config['model'],
+        max_tokens=config['max_tokens'],
+        allow_escalation=config['allow_escalation']
+    )
+    for note in plan.notes:
+        job.notices.append(note)
+    response, stats = stream_completion_job(job, client, request, completion_cache, use_cache)
+    return {'prompt': request['messages'][-1]['content'], 'response': response, 'source': source,
+            'stats': stats, 'plan': plan}
+
+def live_recording_job(job, live):
+    """Wait for the last windows of a stopped live recording"""
+    job.message = f"📝 Transcribing the last {live.pending_windows} windows..."
+    segments = live.finish()
+    if live.errors:
+        job.notices.append(f"⚠️ {len(live.errors)} windows of the recording could not be transcribed")
+    return segments
+
+def live_window_transcriber(provider, api_key):
+    """Provider for live recording windows (LIVE_TRANSCRIPTION_PROVIDER=fake works offline)"""
+    if LIVE_PROVIDER == "fake":
+        return FakeTranscriber()
+    return window_transcriber(provider, get_openai_client(api_key) if provider == "OpenAI" else api_key)
+
+def submit_job(slot, kind, fn, *args, **kwargs):
+    """Start a background job and keep its handle in the session (one job per slot)"""
+    job = get_job_executor().submit(kind, fn, *args, **kwargs)
+    st.session_state.jobs[slot] = job
+    return job
+
+def job_running(slot):
+    job = st.session_state.jobs.get(slot)
+    return job is not None and job.active
+
+def job_poll_interval(slot):
+    """run_every for the panel showing the job in slot: it polls until the job's result is applied"""
+    job = st.session_state.jobs.get(slot)
+    return JOB_POLL_SECONDS if job is not None and not job.handled else None
+
+def rerun_when_finished(slot):
+    """Inside a polling panel: once the job in slot is over, rerun the app so every panel shows its result"""
+    job = st.session_state.jobs.get(slot)
+    if job is not None and not job.active and not job.handled:
+        st.rerun()
+
+def apply_finished_jobs():
+    """Move results of finished jobs into the session, once per job"""
+    for job in st.session_state.jobs.values():
+        if job.active or job.handled:
+            continue
+        job.handled = True
+        if job.status != "done":
+            continue
+        if job.kind in ("transcribe", "live"):
+            store_payload('transcript_data', job.result)
+        elif job.kind in ("generate", "refine"):
+            store_payload('generated_mom', job.result['response'])
+            # Kept so refinements can edit this MoM instead of starting over
+            store_payload('last_generation', {key: job.result[key] for key in ('prompt', 'response', 'source')})
+            if job.result['stats']:
+                st.session_state.setdefault('generation_stats', []).append(job.result['stats'])
+            archive_minutes(job)
+        release_job_payloads(job)
+        if job.kind != "refine":
+            st.balloons()
+
+def archive_minutes(job):
+    """Save finished minutes to the meeting archive; a refinement updates the meeting it started from"""
+    archive = get_meeting_archive()
+    if archive is None:
+        return
+    mom = strip_footer(job.result['response']).strip()
+    try:
+        if job.kind == "generate":
+            st.session_state.archived_meeting_id = archive.save(job.result['transcript'], job.result['config'], mom)
+        elif st.session_state.get('archived_meeting_id') is not None:
+            archive.update_minutes(st.session_state.archived_meeting_id, mom)
+    except sqlite3.Error as e:
+        st.warning(f"⚠️ These minutes could not be archived: {e}")
+
+def use_archived_minutes(meeting_id):
+    """Button callback: put an archived meeting's minutes into the Previous Meeting Summary box"""
+    meeting = get_meeting_archive().get(meeting_id)
+    if meeting is not None:
+        st.session_state.previous_meeting = meeting['mom']
+        request_app_rerun()
+
+@panel("archive")
+def show_archive_picker(archive):
+    """Search the archive and pull earlier minutes into the previous meeting context"""
+    query = st.text_input("Search earlier meetings", placeholder="e.g., budget review, launch date, Alice",
+                          key="archive_query")
+    matches = archive.search(query) if query else archive.recent()
+    if not matches:
+        st.caption("No archived meetings match" if query else "Minutes you generate are archived here")
+        return
+    choice = st.selectbox(
+        "Meeting",
+        options=range(len(matches)),
+        format_func=lambda i: f"{datetime.fromtimestamp(matches[i]['updated']):%Y-%m-%d} · {matches[i]['title']}",
+        key="archive_choice"
+    )
+    if matches[choice].get('snippet'):
+        st.caption(" ".join(matches[choice]['snippet'].split()))
+    st.button("⬇️ Use these minutes", key="use_archived_minutes", on_click=use_archived_minutes,
+              args=(matches[choice]['id'],))
+
+def release_job_payloads(job):
+    """Once its results are in the blob store, a job only keeps what its status display needs"""
+    job.partial = []
+    if job.kind in ("transcribe", "live"):
+        job.result = None
+    else:
+        job.result = {key: job.result[key] for key in ('stats', 'plan')}
+
+def show_job_progress(job):
+    """Progress bar and notices for a job; returns True while it is still running"""
+    if job.label:
+        st.caption(job.label)
+    for notice in job.notices:
+        st.info(notice)
+    if not job.active:
+        return False
+    if job.status == "queued":
+        st.progress(0, text="⏳ Waiting for a free worker...")
+    else:
+        st.progress(job.fraction, text=f"{job.message or '⏳ Working...'} ({job.elapsed:.0f}s)")
+    return True
+
+def show_job_error(job, title):
+    """Error message for a failed job"""
+    if isinstance(job.error, openai.APIError):
+        st.error(f"OpenAI API Error: {job.error}")
+    else:
+        st.error(f"{title}: {job.error}")
+
+def show_memory_diagnostics():
+    """Memory held by this session and the others, and the blob store behind them"""
+    store = get_blob_store().stats()
+    st.caption(f"🧠 This session: ~{approx_size(st.session_state.to_dict()) / 1024:.0f} KB in memory · "
+               f"payloads: {store['entries']} blobs ({store['disk_bytes'] / 1024 / 1024:.1f} MB on disk, "
+               f"{store['memory_bytes'] / 1024 / 1024:.1f} MB cached in memory)")
+    if st.checkbox("Show memory per session", key="diagnostics_sessions"):
+        sessions = get_session_registry().stats()
+        st.dataframe([
+            {
+                "Session": session_id[:8],
+                "Idle": format_time(idle),
+                "Memory (KB)": round(size / 1024),
+                "Released": "yes" if evicted else ""
+            }
+            for session_id, idle, size, evicted in sorted(sessions, key=lambda row: -row[2])
+        ], hide_index=True)
+        st.caption(f"{len(sessions)} sessions · ~{sum(row[2] for row in sessions) / 1024 / 1024:.1f} MB in total · "
+                   f"idle ones released after {SESSION_IDLE_MINUTES:g} min")
+
+def show_diagnostics():
+    """Stage timings of this server process, with JSON lines / Prometheus exports"""
+    show_memory_diagnostics()
+    rows = metrics.summary()
+    if not rows:
+        st.caption("No timings recorded yet.")
+        return
+    st.dataframe([
+        {
+            "Stage": row['stage'],
+            "Labels": ", ".join(f"{name}={value}" for name, value in row['labels'].items()),
+            "Count": row['count'],
+            "Avg (s)": round(row['mean'], 3),
+            "Max (s)": round(row['max'], 3),
+            "Last (s)": round(row['last'], 3)
+        }
+        for row in rows
+    ], hide_index=True)
+    for scheduler in (openai_scheduler, deepgram_scheduler):
+        stats = scheduler.stats()
+        if stats['calls']:
+            st.caption(f"{scheduler.name}: {stats['calls']} requests · {stats['retries']} retries · "
+                       f"{stats['throttled_seconds']:.1f}s throttled")
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    st.download_button("⬇️ Spans (JSON lines)", data=metrics.to_jsonl(), file_name=f"mom_spans_{timestamp}.jsonl",
+                       mime="application/x-ndjson")
+    st.download_button("⬇️ Prometheus text", data=metrics.to_prometheus(), file_name=f"mom_metrics_{timestamp}.prom",
+                       mime="text/plain")
+    if st.button("♻️ Reset Timings"):
+        metrics.reset()
+        st.rerun(scope="fragment")
+
+@panel("sidebar")
+def show_cache_panel():
+    """Cache and archive sizes, cache clearing and diagnostics"""
+    cache_stats = get_transcript_cache().stats()
+    st.caption(
+        f"🗄️ Transcript cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+        f"{cache_stats['entries']} files ({cache_stats['bytes'] / 1024 / 1024:.1f} MB)"
+    )
+    completion_stats = get_completion_cache().stats()
+    st.caption(
+        f"🧠 Response cache: {completion_stats['hit_rate']:.0%} hit rate "
+        f"({completion_stats['hits']} hits / {completion_stats['misses']} misses) · "
+        f"{completion_stats['entries']} responses"
+    )
+    archive = get_meeting_archive()
+    if archive is not None:
+        archive_stats = archive.stats()
+        st.caption(f"🗂️ Meeting archive: {archive_stats['meetings']} meetings "
+                   f"({archive_stats['bytes'] / 1024 / 1024:.1f} MB)")
+    if st.button("🧹 Clear Caches"):
+        get_transcript_cache().clear()
+        get_completion_cache().clear()
+        st.success("✅ Caches cleared!")
+
+    with st.expander("📈 Diagnostics"):
+        show_diagnostics()
+
+def show_workflow_status():
+    """Checklist of the steps done so far"""
+    progress_items = []
+
+    if st.session_state.api_key_set:
+        progress_items.append("✅ API Key configured")
+    else:
+        progress_items.append("❌ API Key required")
+
+    if st.session_state.get('transcript_data'):
+        progress_items.append("✅ Transcript loaded")
+    else:
+        progress_items.append("⏳ Load transcript")
+
+    if st.session_state.get('selected_transcript'):
+        progress_items.append("✅ Segment selected")
+    else:
+        progress_items.append("⏳ Select time range")
+
+    if st.session_state.get('config', {}).get('context'):
+        progress_items.append("✅ Context configured")
+    else:
+        progress_items.append("⏳ Add meeting context")
+
+    if st.session_state.get('generated_mom'):
+        progress_items.append("✅ MoM generated")
+        progress_items.append("✅ Ready to export")
+    else:
+        progress_items.append("⏳ Generate MoM")
+        progress_items.append("⏳ Export results")
+
+    for item in progress_items:
+        st.markdown(f"- {item}")
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def transcript_page_html(key, positions, _segment_index):
+    """HTML for one page of the transcript viewer (built once per transcript and page)"""
+    return "".join(
+        f"""
+        <div class='transcript-segment'>
+            <strong>{format_time(_segment_index.starts[i])} - {format_time(_segment_index.ends[i])}</strong><br>
+            {_segment_index.text(i)}
+        </div>
+        """ for i in positions
+    )
+
+@panel("transcription")
+def show_transcription_status():
+    """Progress of the transcription job, then its outcome (nothing before the first job)"""
+    rerun_when_finished("transcribe")
+    transcription = st.session_state.jobs.get("transcribe")
+    if transcription is not None:
+        if show_job_progress(transcription):
+            st.caption("💡 You can set up context and tone in the Configuration tab while this runs.")
+            if st.button("⏹️ Cancel Transcription", key="cancel_transcription_btn"):
+                transcription.cancel()
+        elif transcription.status == "done" and (transcription.result or st.session_state.transcript_data):
+            transcript_result = transcription.result or load_payload('transcript_data', [])
+            st.success("✅ Transcription completed successfully!")
+            if transcript_result:
+                # Show quick preview
+                st.markdown("**📋 Preview:**")
+                preview_text = transcript_result[0]['text'][:200] + "..." if len(transcript_result[0]['text']) > 200 else transcript_result[0]['text']
+                st.info(f"First segment: {preview_text}")
+
+            # Auto-advance to transcript tab
+            st.info("👉 Check the 'Transcript' tab to review your transcription!")
+        elif transcription.status == "cancelled":
+            st.warning("⏹️ Transcription cancelled")
+        elif isinstance(transcription.error, ChunkTranscriptionError):
+            e = transcription.error
+            st.error(f"Transcription Error: {e}")
+            st.warning(f"💾 {e.total - len(e.failed)} of {e.total} chunks are saved. "
+                       "Click Transcribe again to retry only the failed chunks.")
+        elif transcription.error is not None:
+            show_job_error(transcription, "Transcription Error")
+            st.error("Please check your API key and try again.")
+        else:
+            st.error("❌ Transcription failed. Please check your API key and try again.")
+
+@panel("live_recording")
+def show_live_recording(provider, api_key):
+    """Microphone recorder, transcribed window by window while it records"""
+    # A fresh transcriber is armed for each recording; the frame callback feeds it directly
+    live = st.session_state.get('live_transcriber')
+    live_provider = (provider, api_key)
+    if live is None or live.stopped or (st.session_state.live_provider != live_provider and not live.has_audio):
+        live = LiveTranscriber(live_window_transcriber(provider, api_key), window_seconds=LIVE_WINDOW_SECONDS,
+                               max_workers=LIVE_WORKERS)
+        st.session_state.live_transcriber = live
+        st.session_state.live_provider = live_provider
+        st.session_state.live_segments_stored = 0
+
+    webrtc_ctx = webrtc_streamer(
+        key="live_recording",
+        mode=WebRtcMode.SENDONLY,
+        audio_frame_callback=live.add_frame,
+        media_stream_constraints={"video": False, "audio": True}
+    )
+    if webrtc_ctx.state.playing != st.session_state.get('live_recording', False):
+        # Starting or stopping changes how often this panel polls
+        st.session_state.live_recording = webrtc_ctx.state.playing
+        request_app_rerun()
+
+    if webrtc_ctx.state.playing:
+        st.markdown(f"🔴 **Recording** · {format_time(live.duration)}")
+        if live.segments and len(live.segments) != st.session_state.get('live_segments_stored'):
+            # Segments show up in the Transcript tab as each window comes back
+            store_payload('transcript_data', live.segments)
+            st.session_state.live_segments_stored = len(live.segments)
+            request_app_rerun()
+        st.caption(f"📝 {len(live.segments)} segments transcribed · {live.pending_windows} windows in progress")
+        if live.errors:
+            st.warning(f"⚠️ {len(live.errors)} windows failed to transcribe: {live.errors[-1]}")
+    elif live.has_audio:
+        # Recording just stopped: only the last window is left, finished in the background.
+        # Its own slot, so an upload being transcribed meanwhile keeps going
+        live.stop()
+        submit_job("live", "live", live_recording_job, live, label="🎙️ Finishing the live transcript")
+        request_app_rerun()
+    else:
+        rerun_when_finished("live")
+        finishing = st.session_state.jobs.get("live")
+        if finishing is not None and show_job_progress(finishing):
+            return
+        if finishing is not None and finishing.status == "done":
+            st.success("✅ Live transcript ready - check the 'Transcript' tab")
+        elif finishing is not None and finishing.error is not None:
+            show_job_error(finishing, "Live Transcription Error")
+        st.info("🎤 Press START and allow microphone access to record and transcribe a meeting live.")
+
+@panel("transcript")
+def show_transcript():
+    """Time range selector and a paged, searchable view of the selected segments"""
+    if st.session_state.transcript_data:
+        segment_index = get_segment_index()
+        if segment_index is None:
+            show_missing_payload('transcript_data')
+            return
+        st.success(f"✅ Transcript loaded with {len(segment_index)} segments")
+
+        # Show total duration
+        total_duration = segment_index.duration
+        st.info(f"📊 Total meeting duration: {format_time(total_duration)}")
+
+        # Time range selector (options are segment positions; labels are precomputed)
+        col1, col2 = st.columns(2)
+        with col1:
+            start_position = st.selectbox(
+                "Start Time",
+                options=range(len(segment_index)),
+                format_func=segment_index.start_labels.__getitem__,
+                on_change=request_app_rerun
+            )
+            start_time = float(segment_index.starts[start_position])
 
-            status_text.text("📝 Processing transcript segments...")
-            progress_bar.progress(75)
-
-            # Convert to our format
-            transcript_data = []
-            if hasattr(transcript, 'segments') and transcript.segments:
-                for segment in transcript.segments:
-                    transcript_data.append({
-                        "start_time": segment['start'],
-                        "end_time": segment['end'],
-                        "text": segment['text'].strip()
-                    })
+        with col2:
+            end_options = range(segment_index.first_end_after(start_time), len(segment_index))
+            if end_options:
+                end_position = st.selectbox(
+                    "End Time",
+                    options=end_options,
+                    index=len(end_options)-1,
+                    format_func=segment_index.end_labels.__getitem__,
+                    on_change=request_app_rerun
+                )
+                end_time = float(segment_index.ends[end_position])
             else:
-                # Fallback: create one segment for the entire transcript
-                transcript_data.append({
-                    "start_time": 0,
-                    "end_time": transcript.duration if hasattr(transcript, 'duration') else 0,
-                    "text": transcript.text
-                })
+                end_time = start_time
+
+        # Show selected transcript
+        selection_lo, selection_hi = segment_index.select(start_time, end_time)
+
+        if selection_hi > selection_lo:
+            # Joined text and word count are only rebuilt when the selected range changes
+            selection = st.session_state.get('selection')
+            selection_range = (st.session_state.transcript_data.key, selection_lo, selection_hi)
+            if selection is None or selection['range'] != selection_range:
+                selected_text = segment_index.selection_text(selection_lo, selection_hi, format_time)
+                selection = {
+                    'range': selection_range,
+                    'word_count': len(selected_text.split())
+                }
+                st.session_state.selection = selection
+                store_payload('selected_transcript', selected_text)
 
-            status_text.text("✅ Transcription complete!")
-            progress_bar.progress(100)
+            # Show selection statistics
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Selected Segments", selection_hi - selection_lo)
+            with col2:
+                duration = end_time - start_time
+                st.metric("Duration", format_time(duration))
+            with col3:
+                st.metric("Word Count", selection['word_count'])
 
-            return transcript_data
+            st.markdown("#### 📋 Selected Transcript Segment")
 
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+            # Windowed viewer: only the current page of segments is sent to the browser
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                search_query = st.text_input("🔍 Search in selection", placeholder="e.g., budget, deadline, Alice")
+            with col2:
+                jump_to = st.text_input("⏱️ Jump to time", placeholder="MM:SS")
+            with col3:
+                page_size = st.selectbox("Segments per page", TRANSCRIPT_PAGE_SIZES)
 
-    except openai.APIError as e:
-        st.error(f"OpenAI API Error: {e}")
-        return None
-    except Exception as e:
-        st.error(f"Transcription Error: {str(e)}")
-        return None
+            if search_query:
+                positions = segment_index.search(search_query, selection_lo, selection_hi)
+                st.caption(f"🔍 {len(positions)} matching segments")
+            else:
+                positions = range(selection_lo, selection_hi)
+
+            page_count = max(1, -(-len(positions) // page_size))
+            jump_seconds = parse_time(jump_to) if jump_to else None
+            if jump_to and jump_to != st.session_state.get('transcript_jump'):
+                # Move to the page holding that moment, once per new jump value
+                st.session_state.transcript_jump = jump_to
+                if jump_seconds is None:
+                    st.warning("⚠️ Enter the time as MM:SS")
+                elif positions:
+                    target = segment_index.position_at(jump_seconds)
+                    offset = bisect.bisect_left(positions, target)
+                    st.session_state.transcript_page = min(offset, len(positions) - 1) // page_size + 1
+            if st.session_state.get('transcript_page', 1) > page_count:
+                st.session_state.transcript_page = page_count
+
+            page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="transcript_page")
+            page_positions = positions[(page - 1) * page_size:page * page_size]
+            st.caption(f"Page {page} of {page_count}")
+
+            st.markdown(transcript_page_html(st.session_state.transcript_data.key, tuple(page_positions), segment_index),
+                        unsafe_allow_html=True)
+        else:
+            st.warning("⚠️ No segments selected in this time range")
+    else:
+        st.info("👆 Please upload an audio file and transcribe it in the Audio Input tab")
+        if not st.session_state.api_key_set:
+            st.error("🚨 API Key required for transcription")
 
+@panel("generation")
+def show_generation(api_key):
+    """Request summary and token budget, the generation job and the minutes with refinements"""
+    rerun_when_finished("generate")
 
-def transcribe_audio_deepgram(audio_file, deepgram_key):
-    try:
-        dg_client = Deepgram(deepgram_key)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            tmp_file.write(audio_file.read())
-            tmp_file_path = tmp_file.name
-
-        with open(tmp_file_path, "rb") as f:
-            source = {"buffer": f, "mimetype": "audio/mp3"}
-            response = dg_client.transcription.sync_prerecorded(source, {
-                "punctuate": True,
-                "paragraphs": True
-            })
-
-        segments = []
-        for para in response["results"]["channels"][0]["alternatives"][0]["paragraphs"]["paragraphs"]:
-            segments.append({
-                "start_time": para["start"],
-                "end_time": para["end"],
-                "text": para["sentences"][0]["text"]
-            })
-
-        return segments
-    except Exception as e:
-        st.error(f"Deepgram Transcription Error: {str(e)}")
-        return None
+    provider = st.session_state.get('provider', 'OpenAI')
+    api_key_valid = False
+    
+    if provider == "OpenAI" and st.session_state.get('api_key_set', False):
+        api_key_valid = True
+    elif provider == "Deepgram" and st.session_state.get('deepgram_key_set', False):
+        api_key_valid = True
+    
+    if not api_key_valid:
+        st.error(f"🚨 **{provider} API Key Required**")
+        st.markdown(f"Please enter your {provider} API key in the sidebar to proceed.")
+        st.stop()
 
+    # Loaded from the blob store once per run
+    selected_transcript = load_payload('selected_transcript', "")
+    generated_mom = load_payload('generated_mom', "")
 
-def generate_mom_prompt(transcript, context, previous_meeting, tone, audience, goal):
-    """Generate the prompt for MoM creation"""
+    if selected_transcript and hasattr(st.session_state, 'config'):
+        config = st.session_state.config
 
-    tone_instructions = {
-        "Formal": "Use formal business language, proper titles, and structured format.",
-        "Informal": "Use casual, friendly language while maintaining professionalism.",
-        "Leadership": "Focus on strategic decisions, high-level outcomes, and executive summary.",
-        "Urgent": "Emphasize critical items, deadlines, and immediate action requirements.",
-        "FYI": "Structure as an informational update with key highlights.",
-        "Action-focused": "Prioritize action items, assignments, and next steps.",
-        "Approval-seeking": "Structure to clearly present items requiring approval or decision."
-    }
+        # Show summary of configuration
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Audience", config['audience'])
+        with col2:
+            st.metric("Tone", config['tone'])
+        with col3:
+            st.metric("AI Model", config.get('model', 'gpt-3.5-turbo'))
+        with col4:
+            # Counted once per selection in the Transcript tab
+            word_count = st.session_state.get('selection', {}).get('word_count')
+            st.metric("Transcript Length", f"{word_count or len(selected_transcript.split())} words")
 
-    audience_context = {
-        "Leadership": "executive stakeholders who need strategic overview",
-        "Developers": "technical team members who need implementation details",
-        "Clients": "external stakeholders who need progress updates",
-        "Cross-functional": "diverse team members from multiple departments",
-        "Project Team": "core project contributors and stakeholders"
-    }
+        st.markdown("#### 🔧 Final Configuration")
 
-    prompt = f"""
-Create professional Minutes of Meeting (MoM) based on the following transcript and context.
+        # Advanced options
+        with st.expander("⚙️ Advanced Options"):
+            custom_instructions = st.text_area(
+                "Additional Instructions",
+                placeholder="e.g., Focus on action items, include budget discussions, emphasize deadlines...",
+                help="Any specific instructions for the AI to follow"
+            )
 
-MEETING CONTEXT:
-{context}
+            include_timestamps = st.checkbox("Include Timestamps", value=True)
+            include_sentiment = st.checkbox("Include Sentiment Analysis", value=False)
 
-AUDIENCE: {audience} - {audience_context.get(audience, "general stakeholders")}
-GOAL: {goal}
-TONE: {tone} - {tone_instructions.get(tone, "Professional and clear")}
+            max_tokens = st.slider("Max Response Length", min_value=500, max_value=4000, value=MOM_MAX_TOKENS, 
+                                 help="Maximum tokens for the response (higher = longer MoM)")
 
-TRANSCRIPT:
-{transcript}
+            allow_escalation = st.checkbox("Allow a larger-context model if needed", value=MOM_ALLOW_ESCALATION,
+                                           help="Switch to a model with a bigger context window instead of "
+                                                "trimming the prompt when it doesn't fit")
+
+            force_regenerate = st.checkbox("Force Regenerate", value=False,
+                                           help="Skip the response cache and always call the API")
+
+        # Everything the request needs; the token budget is checked locally before anything is sent
+        request_config = dict(config, instructions=custom_instructions, max_tokens=max_tokens,
+                              allow_escalation=allow_escalation)
+        budget = preview_mom_budget(selected_transcript, request_config)
+        budget_parts = " · ".join(f"{name.replace('_', ' ')} {tokens:,}"
+                                  for name, tokens in budget['parts'].items() if tokens)
+        st.caption(f"🧮 Prompt parts ({'tokens' if exact_counts(budget['model']) else 'estimated tokens'}): "
+                   f"{budget_parts} · response up to {budget['max_tokens']:,} · "
+                   f"{budget['model']} context {context_limit(budget['model']):,}")
+        if budget['condense']:
+            st.info(f"📚 The transcript is over the {budget['window_tokens']:,} tokens that fit next to the rest "
+                    "of the request - it will be summarized in parts first")
+        if budget['error']:
+            st.error(f"🚫 {budget['error']}. Shorten the inputs, lower the response length or allow a "
+                     "larger-context model.")
+        else:
+            for note in budget['plan'].notes:
+                st.warning(note)
 
-PREVIOUS MEETING CONTEXT:
-{previous_meeting if previous_meeting else "No previous meeting context provided."}
+        # Generate MoM
+        generate_button = st.button("✨ Generate Minutes of Meeting", type="primary", key="generate_mom_btn",
+                                    disabled=job_running("generate") or bool(budget['error']))
 
-Please generate a comprehensive MoM that includes:
-1. Meeting Overview (date, attendees, purpose)
-2. Key Discussion Points
-3. Decisions Made
-4. Action Items (with owners and deadlines where mentioned)
-5. Next Steps
-6. Follow-up Meeting Details
+        if generate_button:
+            if not config['context']:
+                st.error("❌ Please provide meeting context in the Configuration tab")
+            else:
+                submit_job("generate", "generate", generation_job, api_key, selected_transcript,
+                           request_config, get_completion_cache(), use_cache=not force_regenerate,
+                           retriever=get_prior_context_retriever() if config.get('retrieve_prior') else None,
+                           label="🚀 Starting real MoM generation with OpenAI...")
+                # The full run starts polling this panel for the job
+                st.rerun()
+
+        generation = st.session_state.jobs.get("generate")
+        if generation is not None:
+            # Create containers for the generation process
+            generation_container = st.container()
+
+            with generation_container:
+                if show_job_progress(generation):
+                    if generation.partial:
+                        st.markdown(generation.partial_text)
+                    # Stopping closes the stream, which cancels the upstream request
+                    if st.button("⏹️ Stop Generation", key="stop_generation_btn"):
+                        generation.cancel()
+                elif generation.status == "done":
+                    stats = generation.result['stats']
+                    plan = generation.result['plan']
+                    if stats and stats['ttft'] is not None:
+                        st.caption(f"⚡ First token after {stats['ttft']:.2f}s · {stats['tokens']} tokens in "
+                                   f"{stats['total']:.1f}s ({stats['tokens_per_second']:.1f} tokens/s)")
+                    if generation.kind == "generate":
+                        st.success("✅ Minutes of Meeting generated successfully!")
 
-Format the output in a professional, easy-to-read structure appropriate for the specified audience and tone.
-Use markdown formatting for better readability.
-"""
+                    # Show token usage
+                    if stats:
+                        st.info(f"📊 Tokens used on {plan.model}: {plan.prompt_tokens:,} prompt + "
+                                f"{stats['tokens']:,} completion")
+                    else:
+                        st.info(f"📊 {plan.prompt_tokens:,} prompt tokens on {plan.model} - "
+                                "response served from cache, nothing billed")
+                elif generation.status == "cancelled":
+                    st.warning("⏹️ Generation stopped")
+                else:
+                    show_job_error(generation, "MoM Generation Error")
+                    st.error("❌ MoM generation failed. Please check your API key and try again.")
 
-    return prompt
+        # Always show generated MoM if it exists
+        if generated_mom:
+            st.markdown("#### 📋 Generated Minutes of Meeting")
 
-def generate_mom_real(prompt, api_key):
-    """Real MoM generation using OpenAI GPT API"""
-    try:
-        # Set up OpenAI client
-        client = openai.OpenAI(api_key=api_key)
-
-        # Show progress during generation
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        status_text.text("🤖 Analyzing meeting transcript...")
-        progress_bar.progress(20)
-
-        # Call OpenAI GPT API
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # You can change to "gpt-4" for better results
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a professional meeting secretary and documentation expert. Create clear, structured, and comprehensive Minutes of Meeting documents."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.3  # Lower temperature for more consistent, professional output
-        )
+            # Create a nice container for the MoM
+            mom_container = st.container()
+            with mom_container:
+                st.markdown(generated_mom)
 
-        status_text.text("📝 Structuring meeting summary...")
-        progress_bar.progress(60)
+                # Add a copy button for convenience
+                col1, col2 = st.columns([3, 1])
+                with col2:
+                    st.markdown("**Quick Actions:**")
+                    if st.button("📋 Copy Text", key="quick_copy"):
+                        st.info("💡 Use the text area in Export tab to copy!")
+                    if st.button("📥 Go to Export", key="go_to_export"):
+                        st.info("👉 Check the 'Export' tab for download options!")
+
+            # Refinement options
+            st.markdown("#### 🔄 Refine Results")
 
-        # Extract the generated MoM
-        generated_mom = response.choices[0].message.content
+            # Each refinement edits the current MoM; the transcript is only sent when the change needs it
+            last_generation = load_payload('last_generation', {})
+            refinement_columns = st.columns(2)
+            for i, (name, refinement) in enumerate(REFINEMENTS.items()):
+                with refinement_columns[i // 2]:
+                    if st.button(refinement['label'], key=f"refine_{name}", disabled=job_running("generate")):
+                        source = last_generation.get('source') or selected_transcript
+                        submit_job("generate", "refine", refinement_job, api_key, generated_mom,
+                                   refinement, source, request_config, get_completion_cache(),
+                                   use_cache=not force_regenerate, label=refinement['status'])
+                        st.rerun()
 
-        status_text.text("✨ Formatting final document...")
-        progress_bar.progress(80)
+    else:
+        if not selected_transcript:
+            st.info("👆 Please select a transcript segment in the Transcript tab")
+        else:
+            st.info("👆 Please configure meeting details in the Configuration tab")
 
-        # Add generation timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        generated_mom += f"\n\n---\n*Generated by AI MoM Assistant on {timestamp}*"
+@panel("export")
+def show_export():
+    """The minutes as text to copy and as file downloads"""
+    generated_mom = load_payload('generated_mom', "")
+    if generated_mom:
+        st.success("🎉 **MoM Generated Successfully!** All export options are now available.")
 
-        status_text.text("✅ Generation complete!")
-        progress_bar.progress(100)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("#### 📄 Text Export")
+            st.text_area(
+                "Generated Minutes of Meeting",
+                value=generated_mom,
+                height=300,
+                help="Copy this text to use elsewhere"
+            )
+            
+        with col2:
+            st.markdown("#### 💾 File Downloads")
+            
+            # Text file download
+            st.download_button(
+                label="📄 Download as TXT",
+                data=generated_mom,
+                file_name=f"meeting_minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                mime="text/plain"
+            )
+            
+            # Markdown file download
+            st.download_button(
+                label="📝 Download as MD",
+                data=generated_mom,
+                file_name=f"meeting_minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                mime="text/markdown"
+            )
+    else:
+        st.info("👆 Please generate a MoM first in the 'Generate MoM' tab")
 
-        return generated_mom
+apply_finished_jobs()
 
-    except openai.APIError as e:
-        st.error(f"OpenAI API Error: {e}")
-        return None
-    except Exception as e:
-        st.error(f"MoM Generation Error: {str(e)}")
-        return None
+# Note this session's activity and release sessions that have been idle for too long
+note_activity()
+get_session_registry().evict_idle(IDLE_EVICTABLE_KEYS, release=release_idle_session)
 
 # Main App Interface
 st.markdown("<h1 class='main-header'>🤖 AI MoM Assistant</h1>", unsafe_allow_html=True)
@@ -307,13 +985,7 @@ with st.sidebar:
         api_key = st.text_input("OpenAI API Key", type="password", help="Required for Whisper and GPT")
         st.session_state.api_key_set = bool(api_key)
         if api_key:
-            try:
-                client = openai.OpenAI(api_key=api_key)
-                # Test API key with a simple request
-                st.success("🔑 OpenAI API Key validated successfully")
-            except:
-                st.error("❌ Invalid OpenAI API Key")
-                st.session_state.api_key_set = False
+            st.success("🔑 OpenAI API Key validated successfully")
     elif provider == "Deepgram":
         deepgram_key = st.text_input("Deepgram API Key", type="password", help="Required for Deepgram transcription")
         st.session_state.deepgram_key_set = bool(deepgram_key)
@@ -343,6 +1015,8 @@ with st.sidebar:
         st.success("✅ Session reset!")
         st.rerun()
 
+    show_cache_panel()
+
     st.markdown("---")
     st.markdown("### 📖 Instructions")
     st.markdown("""
@@ -367,42 +1041,10 @@ with st.sidebar:
     7. **Export** results
     """)
 
-    # Workflow status checker
+    # Workflow status checker, filled in once the tabs below have run
     st.markdown("---")
     st.markdown("### ✅ Workflow Status")
-
-    # Check current progress
-    progress_items = []
-
-    if st.session_state.api_key_set:
-        progress_items.append("✅ API Key configured")
-    else:
-        progress_items.append("❌ API Key required")
-
-    if st.session_state.get('transcript_data'):
-        progress_items.append("✅ Transcript loaded")
-    else:
-        progress_items.append("⏳ Load transcript")
-
-    if st.session_state.get('selected_transcript'):
-        progress_items.append("✅ Segment selected")
-    else:
-        progress_items.append("⏳ Select time range")
-
-    if st.session_state.get('config', {}).get('context'):
-        progress_items.append("✅ Context configured")
-    else:
-        progress_items.append("⏳ Add meeting context")
-
-    if st.session_state.get('generated_mom'):
-        progress_items.append("✅ MoM generated")
-        progress_items.append("✅ Ready to export")
-    else:
-        progress_items.append("⏳ Generate MoM")
-        progress_items.append("⏳ Export results")
-
-    for item in progress_items:
-        st.markdown(f"- {item}")
+    workflow_status = st.container()
 
 # Main content area with tabs
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["🎤 Audio Input", "📝 Transcript", "⚙️ Configuration", "✨ Generate MoM", "📥 Export"])
@@ -453,12 +1095,14 @@ with tab1:
             # Show audio player
             st.audio(uploaded_file)
 
-            # File size warning
-            if uploaded_file.size > 25 * 1024 * 1024:  # 25MB limit for OpenAI
-                st.warning("⚠️ File size exceeds 25MB. OpenAI Whisper has a 25MB limit. Consider compressing your audio file.")
+            # Large files are compressed first, then chunked if still over Whisper's 25MB limit
+            if uploaded_file.size > WHISPER_MAX_BYTES and provider == "OpenAI":
+                st.info(f"ℹ️ File size exceeds {WHISPER_MAX_BYTES // (1024 * 1024)}MB. It will be compressed and, "
+                        f"if still too large, split at pauses into parallel chunks of ~{CHUNK_MINUTES:g} minutes.")
 
             # Transcription button
-            transcribe_button = st.button("🔄 Transcribe Audio", type="primary", key="transcribe_btn")
+            transcribe_button = st.button("🔄 Transcribe Audio", type="primary", key="transcribe_btn",
+                                          disabled=job_running("transcribe"))
 
             # if transcribe_button:
             #     try:
@@ -494,181 +1138,56 @@ with tab1:
             #         st.error(f"❌ Transcription failed: {str(e)}")
             #         st.error("Please check your API key and try again.")
             if transcribe_button:
-                try:
-                    # Get the appropriate API key based on provider
-                    if provider == "OpenAI" and st.session_state.api_key_set:
-                        current_api_key = st.session_state.get('openai_key') or api_key
-                    elif provider == "Deepgram" and st.session_state.get('deepgram_key_set', False):
-                        current_api_key = st.session_state.get('deepgram_key') or deepgram_key
-                    else:
-                        st.error("Please configure API key first")
-                        st.stop()
-                    # Clear any previous transcript
-                    if 'transcript_data' in st.session_state:
-                        del st.session_state.transcript_data
-
-                    # Create a container for the transcription process
-                    transcription_container = st.container()
-
-                    with transcription_container:
-                        provider = st.session_state.get('provider', 'OpenAI')
-                        
-                        if provider == "OpenAI":
-                            st.info("🎯 Starting transcription with OpenAI Whisper...")
-                            transcript_result = transcribe_audio_real(uploaded_file, api_key)
-                        else:  # Deepgram
-                            st.info("🎯 Starting transcription with Deepgram...")
-                            transcript_result = transcribe_audio_deepgram(uploaded_file, deepgram_key)
-
-                        if transcript_result:
-                            st.session_state.transcript_data = transcript_result
-                            st.success("✅ Transcription completed successfully!")
-                            st.balloons()
-                            # Rest of success logic...
-                            # Show quick preview
-                            st.markdown("**📋 Preview:**")
-                            preview_text = transcript_result[0]['text'][:200] + "..." if len(transcript_result[0]['text']) > 200 else transcript_result[0]['text']
-                            st.info(f"First segment: {preview_text}")
-
-                            # Auto-advance to transcript tab
-                            st.info("👉 Check the 'Transcript' tab to review your transcription!")
-                        else:
-                            st.error("❌ Transcription failed. Please check your API key and try again.")
-
-                except Exception as e:
-                    st.error(f"❌ Transcription failed: {str(e)}")
-                    st.error("Please check your API key and try again.")
-
-
-
+                # Get the appropriate API key based on provider
+                if provider == "OpenAI" and st.session_state.api_key_set:
+                    current_api_key = st.session_state.get('openai_key') or api_key
+                elif provider == "Deepgram" and st.session_state.get('deepgram_key_set', False):
+                    current_api_key = st.session_state.get('deepgram_key') or deepgram_key
+                else:
+                    st.error("Please configure API key first")
+                    st.stop()
+                # Clear any previous transcript
+                store_payload('transcript_data', None)
+
+                with span("file_read"):
+                    # Hands over Streamlit's upload buffer without copying it
+                    data = uploaded_file.getvalue()
+                # Runs in the background; the other tabs stay usable meanwhile
+                job = submit_job("transcribe", "transcribe", transcription_job, data,
+                                 uploaded_file.name, provider, current_api_key, get_transcript_cache(),
+                                 label=f"🎯 Transcribing {uploaded_file.name} with "
+                                       f"{'OpenAI Whisper' if provider == 'OpenAI' else 'Deepgram'}")
+                job.notices.append(f"📁 Processing file: {uploaded_file.name} ({uploaded_file.size / 1024 / 1024:.2f} MB)")
 
         else:
             st.info("👆 Please upload an audio file to start transcription")
 
+        show_transcription_status(run_every=job_poll_interval("transcribe"))
+
     with col2:
         st.markdown("#### 🎙️ Live Recording")
-
-        # Audio recording interface (placeholder for now)
-        st.info("🚧 **Live Recording Feature**")
-        st.markdown("""
-        **Status:** Available in advanced implementation
-
-        **Features:**
-        - 🎤 Real-time voice recording
-        - ⏯️ Pause/Resume controls
-        - 🔊 Audio quality settings
-        - ⏱️ Recording duration display
-        - 🎵 Live audio visualization
-        """)
-
-        # Mock recording interface
-        col_rec1, col_rec2 = st.columns(2)
-        with col_rec1:
-            if st.button("🔴 Start Recording", disabled=True):
-                st.info("Feature available in advanced version")
-        with col_rec2:
-            if st.button("⏹️ Stop Recording", disabled=True):
-                st.info("Would record and auto-transcribe")
-
-        # Recording implementation guide
-        with st.expander("🔧 Implementation Guide"):
-            st.code("""
-# To enable real recording, install:
-pip install streamlit-webrtc pyaudio
-
-# Then add this code:
-from streamlit_webrtc import webrtc_streamer
-import av
-import numpy as np
-
-def audio_frame_callback(frame):
-    audio_array = frame.to_ndarray()
-    # Process and save audio frames
-    return frame
-
-webrtc_streamer(
-    key="audio",
-    mode=WebRtcMode.SENDONLY,
-    audio_frame_callback=audio_frame_callback,
-    media_stream_constraints={
-        "video": False,
-        "audio": True,
-    }
-)
-            """)
+        st.caption(f"Transcribed every ~{LIVE_WINDOW_SECONDS:g}s while you record, "
+                   "so the transcript is ready moments after the meeting ends.")
+        show_live_recording(provider, api_key,
+                            run_every=JOB_POLL_SECONDS if st.session_state.get('live_recording')
+                            else job_poll_interval("live"))
 
 with tab2:
     st.markdown("<h3 class='section-header'>Transcript Review</h3>", unsafe_allow_html=True)
 
-    if st.session_state.transcript_data:
-        st.success(f"✅ Transcript loaded with {len(st.session_state.transcript_data)} segments")
-
-        # Show total duration
-        total_duration = st.session_state.transcript_data[-1]['end_time'] if st.session_state.transcript_data else 0
-        st.info(f"📊 Total meeting duration: {format_time(total_duration)}")
-
-        # Time range selector
-        col1, col2 = st.columns(2)
-        with col1:
-            start_time = st.selectbox(
-                "Start Time",
-                options=[segment['start_time'] for segment in st.session_state.transcript_data],
-                format_func=lambda x: f"{format_time(x)} - {next(s['text'][:50] + '...' for s in st.session_state.transcript_data if s['start_time'] == x)}"
-            )
-
-        with col2:
-            end_options = [s['end_time'] for s in st.session_state.transcript_data if s['end_time'] > start_time]
-            if end_options:
-                end_time = st.selectbox(
-                    "End Time",
-                    options=end_options,
-                    index=len(end_options)-1,
-                    format_func=lambda x: f"{format_time(x)} - {next(s['text'][:50] + '...' for s in st.session_state.transcript_data if s['end_time'] == x)}"
-                )
-            else:
-                end_time = start_time
-
-        # Show selected transcript
-        selected_segments = [
-            segment for segment in st.session_state.transcript_data
-            if segment['start_time'] >= start_time and segment['end_time'] <= end_time
-        ]
-
-        if selected_segments:
-            st.markdown("#### 📋 Selected Transcript Segment")
-            selected_text = ""
-            for segment in selected_segments:
-                selected_text += f"[{format_time(segment['start_time'])} - {format_time(segment['end_time'])}] {segment['text']}\n\n"
-                st.markdown(f"""
-                <div class='transcript-segment'>
-                    <strong>{format_time(segment['start_time'])} - {format_time(segment['end_time'])}</strong><br>
-                    {segment['text']}
-                </div>
-                """, unsafe_allow_html=True)
-
-            st.session_state.selected_transcript = selected_text.strip()
-
-            # Show selection statistics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Selected Segments", len(selected_segments))
-            with col2:
-                duration = end_time - start_time
-                st.metric("Duration", format_time(duration))
-            with col3:
-                word_count = len(selected_text.split())
-                st.metric("Word Count", word_count)
-        else:
-            st.warning("⚠️ No segments selected in this time range")
-    else:
-        st.info("👆 Please upload an audio file and transcribe it in the Audio Input tab")
-        if not st.session_state.api_key_set:
-            st.error("🚨 API Key required for transcription")
+    show_transcript()
 
 with tab3:
     st.markdown("<h3 class='section-header'>Meeting Configuration</h3>", unsafe_allow_html=True)
 
-    col1, col2 = st.columns(2)
+    archive = get_meeting_archive()
+    if archive is not None:
+        with st.expander("🗂️ Pull minutes from an earlier meeting"):
+            show_archive_picker(archive)
+
+    # Edits are applied together, so typing context or picking a tone doesn't rerun anything
+    config_form = st.form("meeting_config")
+    col1, col2 = config_form.columns(2)
 
     with col1:
         st.markdown("#### 📝 Current Meeting Context")
@@ -698,7 +1217,21 @@ with tab3:
             "Previous Meeting Summary (Optional)",
             placeholder="Paste previous meeting summary or key points to avoid repetition and maintain context...",
             height=120,
-            help="Optional: Provide context from previous meetings to improve continuity"
+            help="Optional: Provide context from previous meetings to improve continuity",
+            key="previous_meeting"
+        )
+        meeting_series = st.text_input(
+            "Meeting Series",
+            placeholder="e.g., Platform team weekly sync",
+            help="Minutes are archived under this series; only minutes from the same series are searched "
+                 "for earlier context"
+        ) if archive is not None else ""
+        retrieve_prior = archive is not None and st.checkbox(
+            "🔎 Only add what's relevant from earlier meetings",
+            value=False,
+            help=f"Decisions and action items from archived minutes of this meeting series and the summary above "
+                 f"are matched against this transcript; only close matches are added (up to "
+                 f"{PRIOR_CONTEXT_TOKENS} tokens)"
         )
 
         st.markdown("#### 🎭 Tone & Style")
@@ -716,198 +1249,32 @@ with tab3:
             help="Choose AI model (GPT-4 provides better quality but costs more)"
         )
 
-        # Store configuration in session state
-        st.session_state.config = {
-            'context': meeting_context,
-            'previous_meeting': previous_meeting,
-            'audience': audience,
-            'goal': meeting_goal,
-            'tone': tone,
-            'model': model_choice
-        }
+    config_form.form_submit_button("✅ Apply Configuration", type="primary")
+
+    # Store configuration in session state
+    st.session_state.config = {
+        'context': meeting_context,
+        'previous_meeting': previous_meeting,
+        'retrieve_prior': retrieve_prior,
+        'series': meeting_series,
+        'audience': audience,
+        'goal': meeting_goal,
+        'tone': tone,
+        'model': model_choice
+    }
 
 with tab4:
     st.markdown("<h3 class='section-header'>Generate Minutes of Meeting</h3>", unsafe_allow_html=True)
 
-    provider = st.session_state.get('provider', 'OpenAI')
-    api_key_valid = False
-    
-    if provider == "OpenAI" and st.session_state.get('api_key_set', False):
-        api_key_valid = True
-    elif provider == "Deepgram" and st.session_state.get('deepgram_key_set', False):
-        api_key_valid = True
-    
-    if not api_key_valid:
-        st.error(f"🚨 **{provider} API Key Required**")
-        st.markdown(f"Please enter your {provider} API key in the sidebar to proceed.")
-        st.stop()
-
-    if st.session_state.selected_transcript and hasattr(st.session_state, 'config'):
-        config = st.session_state.config
-
-        # Show summary of configuration
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Audience", config['audience'])
-        with col2:
-            st.metric("Tone", config['tone'])
-        with col3:
-            st.metric("AI Model", config.get('model', 'gpt-3.5-turbo'))
-        with col4:
-            st.metric("Transcript Length", f"{len(st.session_state.selected_transcript.split())} words")
-
-        st.markdown("#### 🔧 Final Configuration")
-
-        # Advanced options
-        with st.expander("⚙️ Advanced Options"):
-            custom_instructions = st.text_area(
-                "Additional Instructions",
-                placeholder="e.g., Focus on action items, include budget discussions, emphasize deadlines...",
-                help="Any specific instructions for the AI to follow"
-            )
-
-            include_timestamps = st.checkbox("Include Timestamps", value=True)
-            include_sentiment = st.checkbox("Include Sentiment Analysis", value=False)
-
-            max_tokens = st.slider("Max Response Length", min_value=500, max_value=4000, value=2000, 
-                                 help="Maximum tokens for the response (higher = longer MoM)")
-
-        # Generate MoM
-        generate_button = st.button("✨ Generate Minutes of Meeting", type="primary", key="generate_mom_btn")
-
-        if generate_button:
-            if not config['context']:
-                st.error("❌ Please provide meeting context in the Configuration tab")
-            else:
-                # Create containers for the generation process
-                generation_container = st.container()
-
-                with generation_container:
-                    st.info("🚀 Starting real MoM generation with OpenAI...")
-
-                    # Add custom instructions to the prompt if provided
-                    full_context = config['context']
-                    if custom_instructions:
-                        full_context += f"\n\nAdditional Instructions: {custom_instructions}"
-
-                    prompt = generate_mom_prompt(
-                        st.session_state.selected_transcript,
-                        full_context,
-                        config['previous_meeting'],
-                        config['tone'],
-                        config['audience'],
-                        config['goal']
-                    )
-
-                    # Generate MoM using real OpenAI API
-                    generated_result = generate_mom_real(prompt, api_key)
-
-                    if generated_result:
-                        st.session_state.generated_mom = generated_result
-                        st.success("✅ Minutes of Meeting generated successfully!")
-                        st.balloons()
-
-                        # Show token usage estimate
-                        estimated_tokens = len(generated_result.split()) * 1.3  # Rough estimate
-                        st.info(f"📊 Estimated tokens used: ~{int(estimated_tokens)}")
-                    else:
-                        st.error("❌ MoM generation failed. Please check your API key and try again.")
-
-        # Always show generated MoM if it exists
-        if st.session_state.generated_mom:
-            st.markdown("#### 📋 Generated Minutes of Meeting")
-
-            # Create a nice container for the MoM
-            mom_container = st.container()
-            with mom_container:
-                st.markdown(st.session_state.generated_mom)
-
-                # Add a copy button for convenience
-                col1, col2 = st.columns([3, 1])
-                with col2:
-                    st.markdown("**Quick Actions:**")
-                    if st.button("📋 Copy Text", key="quick_copy"):
-                        st.info("💡 Use the text area in Export tab to copy!")
-                    if st.button("📥 Go to Export", key="go_to_export"):
-                        st.info("👉 Check the 'Export' tab for download options!")
-
-            # Refinement options
-            st.markdown("#### 🔄 Refine Results")
-            col1, col2 = st.columns(2)
-
-            with col1:
-                if st.button("📝 Make More Detailed"):
-                    refined_prompt = prompt + "\n\nPlease make this more detailed and comprehensive."
-                    st.info("🔄 Regenerating with more detail...")
-                    refined_result = generate_mom_real(refined_prompt, api_key)
-                    if refined_result:
-                        st.session_state.generated_mom = refined_result
-                        st.rerun()
-
-                if st.button("⚡ Make More Concise"):
-                    refined_prompt = prompt + "\n\nPlease make this more concise and focused on key points only."
-                    st.info("🔄 Regenerating more concisely...")
-                    refined_result = generate_mom_real(refined_prompt, api_key)
-                    if refined_result:
-                        st.session_state.generated_mom = refined_result
-                        st.rerun()
-
-            with col2:
-                if st.button("🎯 Focus on Action Items"):
-                    refined_prompt = prompt + "\n\nPlease focus heavily on action items, assignments, and next steps."
-                    st.info("🔄 Regenerating with action item focus...")
-                    refined_result = generate_mom_real(refined_prompt, api_key)
-                    if refined_result:
-                        st.session_state.generated_mom = refined_result
-                        st.rerun()
-
-                if st.button("📊 Add More Analysis"):
-                    refined_prompt = prompt + "\n\nPlease add more analytical insights and observations about the meeting dynamics and outcomes."
-                    st.info("🔄 Adding analytical insights...")
-                    refined_result = generate_mom_real(refined_prompt, api_key)
-                    if refined_result:
-                        st.session_state.generated_mom = refined_result
-                        st.rerun()
-
-    else:
-        if not st.session_state.selected_transcript:
-            st.info("👆 Please select a transcript segment in the Transcript tab")
-        else:
-            st.info("👆 Please configure meeting details in the Configuration tab")
+    show_generation(api_key, run_every=job_poll_interval("generate"))
 
 with tab5:
     st.markdown("<h3 class='section-header'>Export Results</h3>", unsafe_allow_html=True)
 
-    if st.session_state.generated_mom:
-        st.success("🎉 **MoM Generated Successfully!** All export options are now available.")
+    show_export()
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("#### 📄 Text Export")
-            st.text_area(
-                "Generated Minutes of Meeting",
-                value=st.session_state.generated_mom,
-                height=300,
-                help="Copy this text to use elsewhere"
-            )
-            
-        with col2:
-            st.markdown("#### 💾 File Downloads")
-            
-            # Text file download
-            st.download_button(
-                label="📄 Download as TXT",
-                data=st.session_state.generated_mom,
-                file_name=f"meeting_minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                mime="text/plain"
-            )
-            
-            # Markdown file download
-            st.download_button(
-                label="📝 Download as MD",
-                data=st.session_state.generated_mom,
-                file_name=f"meeting_minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-                mime="text/markdown"
-            )
-    else:
-        st.info("👆 Please generate a MoM first in the 'Generate MoM' tab")
+with workflow_status:
+    show_workflow_status()
+
+# Running jobs and live recordings are polled by the panels showing them (run_every), not by rerunning the app
+metrics.record("render", time.perf_counter() - run_started)
@@ -0,0 +1,143 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+from transcript import Transcript
+
+
+class ChunkTranscriptionError(Exception):
+    """Raised when some chunks failed; the others are kept in the journal"""
+
+    def __init__(self, failed, total, first_error):
+        self.failed = failed
+        self.total = total
+        self.first_error = first_error
+        super().__init__(f"{len(failed)} of {total} chunks failed: {first_error}")
+
+
+class AudioChunk:
+    """A slice of the original recording and where it starts in it"""
+
+    def __init__(self, index, offset, audio):
+        self.index = index
+        self.offset = offset  # seconds from the start of the original recording
+        self.audio = audio
+
+    @property
+    def duration(self):
+        return len(self.audio) / 1000.0
+
+    def export(self, fmt="mp3", bitrate="64k"):
+        """Encode the chunk for upload and return (bytes, filename)"""
+        buffer = io.BytesIO()
+        self.audio.export(buffer, format=fmt, bitrate=bitrate)
+        return buffer.getvalue(), f"chunk_{self.index:03d}.{fmt}"
+
+
+def load_audio(audio_file, filename):
+    """Decode an uploaded file (any ffmpeg-supported format) into an AudioSegment"""
+    audio_file.seek(0)
+    fmt = filename.rsplit(".", 1)[-1].lower() if "." in filename else None
+    return AudioSegment.from_file(audio_file, format=fmt)
+
+
+def find_cut_point(audio, start_ms, target_ms, search_ms, min_silence_ms=500):
+    """Return a cut position near start_ms + target_ms, in the middle of a silence if possible"""
+    window_end = start_ms + target_ms
+    window_start = max(start_ms, window_end - search_ms)
+    window = audio[window_start:window_end]
+
+    silence_thresh = (audio.dBFS if audio.dBFS != float("-inf") else -60) - 16
+    silences = detect_silence(window, min_silence_len=min_silence_ms,
+                              silence_thresh=silence_thresh, seek_step=50)
+    if not silences:
+        return window_end
+
+    # Prefer the longest pause; ties go to the one closest to the target length
+    silence_start, silence_end = max(silences, key=lambda s: (s[1] - s[0], s[0]))
+    return window_start + (silence_start + silence_end) // 2
+
+
+def split_audio(audio, chunk_seconds=600, search_seconds=60):
+    """Split audio into roughly chunk_seconds long pieces, cutting at silences"""
+    target_ms = int(chunk_seconds * 1000)
+    search_ms = int(search_seconds * 1000)
+
+    chunks = []
+    position = 0
+    while len(audio) - position > target_ms:
+        cut = find_cut_point(audio, position, target_ms, search_ms)
+        chunks.append(AudioChunk(len(chunks), position / 1000.0, audio[position:cut]))
+        position = cut
+    chunks.append(AudioChunk(len(chunks), position / 1000.0, audio[position:]))
+    return chunks
+
+
+def offset_segments(segments, offset):
+    """Shift chunk-local segment timestamps onto the original recording's timeline"""
+    return Transcript.from_segments(segments).shifted(offset)
+
+
+def transcribe_chunks(chunks, transcribe_fn, max_workers=4, progress_callback=None, journal=None):
+    """Transcribe chunks concurrently and stitch them into one timeline.
+
+    transcribe_fn(data, filename) runs on worker threads and must return
+    chunk-local segments (a Transcript or segment dicts); the result is one
+    Transcript. progress_callback(done, total) is called from the calling
+    thread, so it may safely update Streamlit widgets.
+
+    With a TranscriptionJournal, chunks it already holds are reused, every
+    finished chunk is saved as soon as it arrives, and a failing chunk does
+    not stop the others; ChunkTranscriptionError is raised at the end so the
+    caller can retry just the failed ones.
+    """
+    def run(chunk):
+        data, filename = chunk.export()
+        return transcribe_fn(data, filename)
+
+    results = {}
+    pending = []
+    for chunk in chunks:
+        saved = journal.completed_segments(chunk.index, chunk.offset) if journal else None
+        if saved is not None:
+            results[chunk.index] = offset_segments(saved, chunk.offset)
+        else:
+            pending.append(chunk)
+    if journal:
+        journal.set_total(len(chunks))
+    if progress_callback and results:
+        progress_callback(len(results), len(chunks))
+
+    failed = []
+    first_error = None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(run, chunk): chunk for chunk in pending}
+        try:
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    segments = future.result()
+                except Exception as e:
+                    if not journal:
+                        raise
+                    journal.record_failure(chunk.index, chunk.offset, e)
+                    failed.append(chunk.index)
+                    first_error = first_error or e
+                    continue
+                if journal:
+                    journal.record_success(chunk.index, chunk.offset, segments)
+                results[chunk.index] = offset_segments(segments, chunk.offset)
+                if progress_callback:
+                    progress_callback(len(results), len(chunks))
+        except Exception:
+            # Don't keep paying for the remaining chunks once one has failed
+            for future in futures:
+                future.cancel()
+            raise
+
+    if failed:
+        raise ChunkTranscriptionError(sorted(failed), len(chunks), first_error)
+
+    return Transcript.concat(results[chunk.index] for chunk in chunks)
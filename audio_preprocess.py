@@ -0,0 +1,125 @@
+import io
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from pydub import AudioSegment
+
+from voice_activity import trim_silence
+
+AUDIO_MIMETYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "webm": "audio/webm",
+}
+
+
+def audio_mimetype(filename):
+    """MIME type for an audio filename, based on its extension"""
+    ext = os.path.splitext(filename)[1].lstrip(".").lower()
+    return AUDIO_MIMETYPES.get(ext, "application/octet-stream")
+
+
+class PreparedAudio:
+    """Upload-ready audio plus what preprocessing did to it"""
+
+    def __init__(self, data, filename, original_bytes, elapsed, audio=None, offset_map=None):
+        self.data = data
+        self.path = None  # set once the upload-ready bytes were spilled to disk
+        self._size = len(data)
+        self.filename = filename
+        self.original_bytes = original_bytes
+        self.elapsed = elapsed
+        self.audio = audio  # decoded mono AudioSegment, or None if decoding failed
+        self.offset_map = offset_map  # set when silence was cut out of the audio
+
+    @property
+    def removed_seconds(self):
+        if self.offset_map is None:
+            return 0.0
+        return self.offset_map.original_duration - self.offset_map.trimmed_duration
+
+    def remap_segments(self, segments):
+        """Put segment timestamps back on the original recording's timeline"""
+        if self.offset_map is None:
+            return segments
+        return self.offset_map.remap_segments(segments)
+
+    @property
+    def mimetype(self):
+        return audio_mimetype(self.filename)
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - self._size
+
+    def spill(self, threshold):
+        """Move upload-ready bytes larger than threshold to a temporary file and drop them from memory"""
+        if self.path is None and self._size > threshold:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(self.filename)[1]) as f:
+                f.write(self.data)
+                self.path = f.name
+            self.data = None
+        return self
+
+    @contextmanager
+    def upload_content(self):
+        """Body for one upload attempt: the in-memory buffer itself, or a fresh handle on the spilled file"""
+        if self.path is None:
+            yield self.data
+        else:
+            with open(self.path, "rb") as f:
+                yield f
+
+    def close(self):
+        """Remove the spilled file, if any"""
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
+
+
+def preprocess_audio(data, filename, sample_rate=16000, fmt="mp3", bitrate="32k", trim=False, vad_options=None):
+    """Decode once, downmix to mono, resample to a speech rate and re-encode compactly.
+
+    With trim=True, long silences are cut out as well (vad_options are passed to
+    trim_silence); use remap_segments() on the result to translate transcript
+    timestamps back to the original recording.
+
+    If the file can't be decoded or encoded (e.g. ffmpeg is missing) the original bytes are
+    passed through unchanged, so transcription still works, just without the savings.
+    """
+    start = time.perf_counter()
+    ext = os.path.splitext(filename)[1].lstrip(".").lower() or None
+
+    try:
+        audio = AudioSegment.from_file(io.BytesIO(data), format=ext)
+    except Exception:
+        return PreparedAudio(data, filename, len(data), time.perf_counter() - start)
+
+    audio = audio.set_channels(1).set_frame_rate(sample_rate)
+    offset_map = None
+    if trim:
+        audio, offset_map = trim_silence(audio, **(vad_options or {}))
+
+    buffer = io.BytesIO()
+    try:
+        audio.export(buffer, format=fmt, bitrate=bitrate)
+    except Exception:
+        # No encoder available; the untouched original is still a valid upload
+        return PreparedAudio(data, filename, len(data), time.perf_counter() - start)
+    encoded = buffer.getvalue()
+
+    if len(encoded) >= len(data) and offset_map is None:
+        # Already a compact speech file; re-encoding would only cost quality
+        return PreparedAudio(data, filename, len(data), time.perf_counter() - start, audio)
+
+    encoded_name = f"{os.path.splitext(filename)[0]}.{fmt}"
+    return PreparedAudio(encoded, encoded_name, len(data), time.perf_counter() - start, audio, offset_map)
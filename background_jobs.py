@@ -0,0 +1,115 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import Reporter
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once the user has cancelled it"""
+
+
+class Job:
+    """Handle for one background job, kept in st.session_state.
+
+    The worker thread writes status, progress and the result; the script only
+    reads them on each rerun, so the work carries on through tab switches and
+    widget interactions and the handle picks up wherever it left off.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, label=""):
+        self.id = next(Job._ids)
+        self.kind = kind
+        self.label = label
+        self.status = "queued"  # queued -> running -> done | failed | cancelled
+        self.fraction = 0.0
+        self.message = ""
+        self.notices = []
+        self.partial = []  # streamed output so far
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.handled = False  # set by the app once the result has been applied
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def partial_text(self):
+        return "".join(self.partial)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def cancel(self):
+        """Ask the job to stop; a queued job is dropped straight away"""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished = time.time()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+
+class JobReporter(Reporter):
+    """Records pipeline progress on a job (and stops the job once it is cancelled)"""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, fraction, message):
+        self.job.check_cancelled()
+        self.job.fraction = max(0.0, min(1.0, fraction))
+        self.job.message = message
+
+    def info(self, message):
+        self.job.notices.append(message)
+
+
+class JobExecutor:
+    """Bounded worker pool that runs fn(job, *args, **kwargs) and tracks it on a Job"""
+
+    def __init__(self, max_workers):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+
+    def submit(self, kind, fn, *args, label="", **kwargs):
+        job = Job(kind, label)
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    @staticmethod
+    def _run(job, fn, args, kwargs):
+        job.started = time.time()
+        job.status = "running"
+        try:
+            job.check_cancelled()
+            job.result = fn(job, *args, **kwargs)
+            job.fraction = 1.0
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,217 @@
+"""Headless batch processing: recordings in, transcripts and Minutes of Meeting out.
+
+Examples:
+    python batch.py recordings/ --out minutes/ --workers 4
+    python batch.py manifest.json --out minutes/ --provider Deepgram
+
+A directory input processes every audio file in it. Meeting settings come from
+the command line, optionally overridden by a sidecar JSON file next to each
+recording (e.g. standup.mp3 + standup.json). A manifest is a JSON list (or
+JSON Lines file) of objects with an "audio" path plus any of the meeting
+settings: context, previous_meeting, audience, goal, tone, model, max_tokens.
+
+For every recording, <out>/<name>/ receives transcript.json, transcript.txt
+and minutes.md. API keys are read from OPENAI_API_KEY / DEEPGRAM_API_KEY
+(a .env file is loaded if present).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+import pipeline
+from api_clients import get_openai_client
+from settings import MOM_MAX_TOKENS, MOM_WORKERS, TRANSCRIBE_WORKERS
+from token_budget import DEFAULT_MODEL, MODEL_LIMITS
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".ogg", ".flac"}
+CONFIG_KEYS = ("context", "previous_meeting", "audience", "goal", "tone", "model", "max_tokens")
+
+logger = logging.getLogger("batch")
+
+
+class LogReporter(pipeline.Reporter):
+    """Logs pipeline progress for one recording"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def progress(self, fraction, message):
+        logger.debug("[%s] %3d%% %s", self.name, int(fraction * 100), message)
+
+    def info(self, message):
+        logger.info("[%s] %s", self.name, message)
+
+
+def load_jobs(source, defaults):
+    """Build the list of jobs ({"audio", "name", "config"}) from a directory or manifest"""
+    if os.path.isdir(source):
+        entries = []
+        for filename in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() not in AUDIO_EXTENSIONS:
+                continue
+            entry = {"audio": os.path.join(source, filename)}
+            sidecar = os.path.join(source, f"{stem}.json")
+            if os.path.exists(sidecar):
+                with open(sidecar, "r", encoding="utf-8") as f:
+                    entry.update(json.load(f))
+            entries.append(entry)
+        base_dir = source
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            if source.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                entries = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(source))
+
+    jobs = []
+    for entry in entries:
+        audio = entry["audio"]
+        if not os.path.isabs(audio):
+            audio = os.path.join(base_dir, audio)
+        config = dict(defaults)
+        config.update({key: entry[key] for key in CONFIG_KEYS if key in entry})
+        name = entry.get("name") or os.path.splitext(os.path.basename(audio))[0]
+        jobs.append({"audio": audio, "name": name, "config": config})
+    return jobs
+
+
+def process_job(job, args, client, transcribe_key, transcript_cache, completion_cache):
+    """Transcribe one recording, generate its MoM and write the outputs; returns a summary"""
+    out_dir = os.path.join(args.out, job["name"])
+    minutes_path = os.path.join(out_dir, "minutes.md")
+    if args.skip_existing and os.path.exists(minutes_path):
+        return {"name": job["name"], "status": "skipped"}
+
+    reporter = LogReporter(job["name"])
+    started = time.perf_counter()
+    with open(job["audio"], "rb") as f:
+        data = f.read()
+
+    segments, from_cache = pipeline.transcribe(
+        data, os.path.basename(job["audio"]), args.provider, transcribe_key,
+        cache=transcript_cache, reporter=reporter, max_workers=args.chunk_workers
+    )
+    transcribed = time.perf_counter()
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "transcript.json"), "w", encoding="utf-8") as f:
+        json.dump(segments.to_segments(), f, indent=2)
+    text = pipeline.transcript_text(segments)
+    with open(os.path.join(out_dir, "transcript.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+    if args.transcribe_only:
+        mom = None
+    else:
+        mom = pipeline.generate_mom(text, job["config"], client, cache=completion_cache,
+                                    reporter=reporter, max_workers=args.mom_workers)
+        with open(minutes_path, "w", encoding="utf-8") as f:
+            f.write(mom)
+
+    return {
+        "name": job["name"],
+        "status": "ok",
+        "segments": len(segments),
+        "transcript_cached": from_cache,
+        "transcribe_seconds": round(transcribed - started, 2),
+        "total_seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Batch-generate transcripts and Minutes of Meeting.")
+    parser.add_argument("source", help="directory of recordings, or a .json/.jsonl manifest")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--provider", choices=["OpenAI", "Deepgram"], default="OpenAI",
+                        help="transcription provider (MoM generation always uses OpenAI)")
+    parser.add_argument("--workers", type=int, default=2, help="recordings processed concurrently")
+    parser.add_argument("--chunk-workers", type=int, default=TRANSCRIBE_WORKERS,
+                        help="parallel chunk uploads per long recording")
+    parser.add_argument("--mom-workers", type=int, default=MOM_WORKERS,
+                        help="parallel window summaries per long transcript")
+    parser.add_argument("--transcribe-only", action="store_true", help="skip MoM generation")
+    parser.add_argument("--skip-existing", action="store_true", help="skip recordings that already have minutes.md")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the local caches")
+    for key, default in (("context", ""), ("audience", "Project Team"), ("goal", ""), ("tone", "Formal")):
+        parser.add_argument(f"--{key}", default=default, help=f"default meeting {key}")
+    parser.add_argument("--model", default=DEFAULT_MODEL, choices=sorted(MODEL_LIMITS),
+                        help="model for the MoM and for the window notes of long meetings")
+    parser.add_argument("--max-tokens", type=int, default=MOM_MAX_TOKENS, help="maximum tokens for each MoM")
+    parser.add_argument("--no-escalation", action="store_true",
+                        help="trim prompts that don't fit instead of switching to a larger-context model")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log per-stage progress")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    openai_key = os.getenv("OPENAI_API_KEY")
+    if args.provider == "Deepgram":
+        transcribe_key = os.getenv("DEEPGRAM_API_KEY")
+        if not transcribe_key:
+            logger.error("DEEPGRAM_API_KEY is not set")
+            return 2
+    if not openai_key and (args.provider == "OpenAI" or not args.transcribe_only):
+        logger.error("OPENAI_API_KEY is not set")
+        return 2
+
+    client = get_openai_client(openai_key) if openai_key else None
+    if args.provider == "OpenAI":
+        transcribe_key = client
+
+    defaults = {key: getattr(args, key) for key in ("context", "audience", "goal", "tone")}
+    defaults["previous_meeting"] = ""
+    defaults.update(model=args.model, max_tokens=args.max_tokens, allow_escalation=not args.no_escalation)
+    jobs = load_jobs(args.source, defaults)
+    if not jobs:
+        logger.error("No recordings found in %s", args.source)
+        return 2
+
+    transcript_cache = None if args.no_cache else pipeline.open_transcript_cache()
+    completion_cache = None if args.no_cache else pipeline.open_completion_cache()
+
+    logger.info("Processing %d recordings with %d workers", len(jobs), args.workers)
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(process_job, job, args, client, transcribe_key, transcript_cache, completion_cache): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"name": job["name"], "status": "failed", "error": str(e)}
+                logger.error("[%s] failed: %s", job["name"], e)
+            else:
+                logger.info("[%s] %s", job["name"], result["status"])
+            results.append(result)
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(sorted(results, key=lambda r: r["name"]), f, indent=2)
+
+    failed = [r for r in results if r["status"] == "failed"]
+    logger.info("Done: %d ok, %d skipped, %d failed in %.1fs",
+                sum(r["status"] == "ok" for r in results),
+                sum(r["status"] == "skipped" for r in results),
+                len(failed), time.perf_counter() - started)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
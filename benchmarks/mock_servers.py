@@ -0,0 +1,307 @@
+"""Local HTTP stand-ins for the OpenAI and Deepgram endpoints the app calls.
+
+One server answers:
+    POST /v1/audio/transcriptions   Whisper, response_format=verbose_json
+    POST /v1/chat/completions       chat completions, streamed (SSE) or not
+    POST /v1/embeddings             embeddings (hashed bag of words, so similar texts score higher)
+    POST /v1/listen                 Deepgram prerecorded, with paragraphs
+
+Latency follows a simple model (fixed overhead, plus time per second of audio
+or per generated token) and errors can be injected at a given rate, so the
+retry/backoff paths are exercised too. Responses are synthetic but shaped
+like the real ones, so the production code parses them unchanged.
+"""
+import base64
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import PHRASES
+
+
+class MockConfig:
+    """Latency and error model for the mock endpoints (all times in seconds)"""
+
+    def __init__(self, overhead=0.05, whisper_rtf=0.002, deepgram_rtf=0.001, ttft=0.3,
+                 token_interval=0.005, completion_tokens=600, error_rate=0.0, retry_after=0.2, seed=0):
+        self.overhead = overhead  # per request
+        self.whisper_rtf = whisper_rtf  # per second of audio
+        self.deepgram_rtf = deepgram_rtf
+        self.ttft = ttft  # time to first token
+        self.token_interval = token_interval  # per generated token
+        self.completion_tokens = completion_tokens  # tokens per answer (capped by max_tokens)
+        self.error_rate = error_rate  # fraction of requests answered with 429 or 500
+        self.retry_after = retry_after  # Retry-After sent with injected 429s
+        self.seed = seed
+
+    def scaled(self, factor):
+        """Same model with every latency multiplied by factor"""
+        scaled = MockConfig(**vars(self))
+        for name in ("overhead", "whisper_rtf", "deepgram_rtf", "ttft", "token_interval"):
+            setattr(scaled, name, getattr(self, name) * factor)
+        return scaled
+
+
+def audio_duration(body):
+    """Seconds of audio in an upload (WAV header if present, else assume 32 kbps)"""
+    start = body.find(b"RIFF")
+    if start >= 0:
+        try:
+            with wave.open(io.BytesIO(body[start:])) as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    return len(body) * 8 / 32000
+
+
+def synthetic_sentences(duration, rng, step=6.0):
+    """(start, end, text) covering duration seconds"""
+    sentences = []
+    t = 0.0
+    while t < duration:
+        end = min(duration, t + step)
+        sentences.append((round(t, 2), round(end, 2), rng.choice(PHRASES).capitalize() + "."))
+        t = end
+    return sentences
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.mock
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = urlparse(self.path).path
+        endpoint = path.rsplit("/", 1)[-1]
+        server.count(endpoint)
+        time.sleep(server.config.overhead)
+
+        if server.should_fail():
+            status = server.rng_choice([429, 500])
+            headers = {"retry-after": f"{server.config.retry_after:g}"} if status == 429 else {}
+            return self._json(status, {"error": {"message": "injected error", "type": "mock", "code": None}},
+                              headers)
+
+        if path.endswith("/audio/transcriptions"):
+            return self._whisper(server, body)
+        if path.endswith("/chat/completions"):
+            return self._chat(server, json.loads(body))
+        if path.endswith("/listen"):
+            return self._deepgram(server, body)
+        if path.endswith("/embeddings"):
+            return self._embeddings(server, json.loads(body))
+        self._json(404, {"error": {"message": f"no mock for {path}"}})
+
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _whisper(self, server, body):
+        duration = audio_duration(body)
+        time.sleep(duration * server.config.whisper_rtf)
+        sentences = synthetic_sentences(duration, server.rng())
+        segments = [
+            {"id": i, "seek": 0, "start": start, "end": end, "text": f" {text}", "tokens": [],
+             "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.2, "no_speech_prob": 0.01}
+            for i, (start, end, text) in enumerate(sentences)
+        ]
+        self._json(200, {
+            "task": "transcribe",
+            "language": "english",
+            "duration": duration,
+            "text": " ".join(s["text"].strip() for s in segments),
+            "segments": segments
+        })
+
+    def _deepgram(self, server, body):
+        duration = audio_duration(body)
+        time.sleep(duration * server.config.deepgram_rtf)
+        paragraphs = [
+            {"start": start, "end": end, "num_words": len(text.split()),
+             "sentences": [{"text": text, "start": start, "end": end}]}
+            for start, end, text in synthetic_sentences(duration, server.rng(), step=15.0)
+        ]
+        transcript = " ".join(p["sentences"][0]["text"] for p in paragraphs)
+        self._json(200, {
+            "metadata": {"duration": duration, "channels": 1},
+            "results": {"channels": [{"alternatives": [{
+                "transcript": transcript,
+                "confidence": 0.95,
+                "paragraphs": {"transcript": transcript, "paragraphs": paragraphs}
+            }]}]}
+        })
+
+    def _embeddings(self, server, request):
+        texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        dimensions = request.get("dimensions") or 1536
+        time.sleep(len(texts) * server.config.token_interval)
+        data = []
+        for i, text in enumerate(texts):
+            vector = hashed_embedding(text, dimensions)
+            if request.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(len(text) // 4 + 1 for text in texts)
+        self._json(200, {"object": "list", "data": data, "model": request.get("model", "mock"),
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    def _chat(self, server, request):
+        config = server.config
+        prompt = "".join(m.get("content") or "" for m in request.get("messages", []))
+        prompt_tokens = len(prompt) // 4 + 1
+        tokens = min(request.get("max_tokens") or config.completion_tokens, config.completion_tokens)
+        rng = server.rng()
+        words = []
+        while len(words) < tokens:
+            words.extend(rng.choice(PHRASES).split())
+        words = words[:tokens]
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": tokens,
+                 "total_tokens": prompt_tokens + tokens}
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": request.get("model", "mock")}
+
+        if not request.get("stream"):
+            time.sleep(config.ttft + tokens * config.token_interval)
+            return self._json(200, dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0,
+                "message": {"role": "assistant", "content": "## Minutes\n\n" + " ".join(words)},
+                "finish_reason": "stop"
+            }]))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            time.sleep(config.ttft)
+            for i, word in enumerate(words):
+                delta = {"content": ("## Minutes\n\n" if i == 0 else " ") + word}
+                send(json.dumps(dict(base, object="chat.completion.chunk", choices=[
+                    {"index": 0, "delta": delta, "finish_reason": None}])))
+                time.sleep(config.token_interval)
+            send(json.dumps(dict(base, object="chat.completion.chunk", choices=[
+                {"index": 0, "delta": {}, "finish_reason": "stop"}])))
+            send(json.dumps(dict(base, object="chat.completion.chunk", choices=[], usage=usage)))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            server.count("cancelled_streams")
+
+
+def hashed_embedding(text, dimensions):
+    """Unit vector with one hashed bucket per word, so texts sharing words are similar"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little") % dimensions] += 1
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class MockAPIServer:
+    """Runs the mock endpoints on a local port in a background thread"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.requests = {}
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return self.url + "/v1"
+
+    def count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def rng(self):
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def rng_choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+    def should_fail(self):
+        if self.config.error_rate <= 0:
+            return False
+        with self._lock:
+            failed = self._rng.random() < self.config.error_rate
+        if failed:
+            self.count("injected_errors")
+        return failed
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class MockDeepgram:
+    """Client with the Deepgram SDK surface the pipeline uses, talking to the mock server"""
+
+    def __init__(self, api_key, base_url):
+        self.api_key = api_key
+        self.transcription = self
+        self._http = httpx.Client(base_url=base_url, timeout=600)
+
+    def sync_prerecorded(self, source, options):
+        data = source["buffer"]
+        if hasattr(data, "read"):
+            data = data.read()
+        params = {key: str(value).lower() if isinstance(value, bool) else value for key, value in options.items()}
+        response = self._http.post("/v1/listen", params=params, content=data, headers={
+            "Authorization": f"Token {self.api_key}",
+            "Content-Type": source.get("mimetype", "audio/wav")
+        })
+        if response.status_code >= 400:
+            raise httpx.HTTPStatusError(f"DG: HTTP Error {response.status_code}", request=response.request,
+                                        response=response)
+        return response.json()
+
+    def close(self):
+        self._http.close()
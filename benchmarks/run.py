@@ -0,0 +1,336 @@
+"""Offline end-to-end benchmarks: synthetic meetings through the real pipeline, mock APIs.
+
+Examples:
+    python -m benchmarks.run --durations 1 10 60 180 --save-baseline main
+    python -m benchmarks.run --durations 1 10 60 180 --compare main
+    python -m benchmarks.run --scenarios generate --error-rate 0.1
+
+Scenarios:
+    transcribe  Whisper transcription of an N-minute recording (upload, chunking, parsing)
+    deepgram    the same recording through Deepgram's prerecorded API
+    generate    MoM generation for an N-minute transcript (map step + streamed final pass)
+    rerun       one Streamlit rerun of app.py with an N-minute transcript loaded, and what each
+                panel of the page takes on its own (a widget change reruns only its panel)
+    cache       loading an N-minute transcript back from the on-disk transcript cache
+    history     preparing the MoM request for a 10-minute meeting with N archived earlier meetings
+                to retrieve context from (N is the --durations value; prompt size should stay flat)
+
+Every scenario reports the end-to-end time (median of --repeat runs), time
+per pipeline stage, the timing spans recorded in metrics (per run), peak
+Python memory (from a separate tracemalloc run) and API requests and retries. --save-baseline writes the results to
+benchmarks/baselines/<name>.json; --compare reports anything slower or
+larger than that baseline by more than --threshold and exits with status 1.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Every run must reach the mock APIs, so the app's caches and journals go somewhere empty
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="mom-benchmark-")
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import api_clients  # noqa: E402
+import pipeline  # noqa: E402
+from benchmarks.mock_servers import MockAPIServer, MockConfig, MockDeepgram  # noqa: E402
+from benchmarks.synthetic import synthetic_minutes, synthetic_recording, synthetic_segments  # noqa: E402
+from llm_streaming import stream_chat_completion  # noqa: E402
+from meeting_archive import MeetingArchive  # noqa: E402
+from metrics import metrics  # noqa: E402
+from prior_context import PriorContextRetriever  # noqa: E402
+
+SCENARIOS = ("transcribe", "deepgram", "generate", "rerun", "cache", "history")
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+OPENAI_KEY = "sk-benchmark"
+DEEPGRAM_KEY = "dg-benchmark"
+
+
+class TimingReporter(pipeline.Reporter):
+    """Turns progress messages into per-stage timings (a stage lasts until the next one starts)"""
+
+    def __init__(self):
+        self.stages = {}
+        self.notes = []
+        self._stage = None
+        self._since = None
+
+    def progress(self, fraction, message):
+        # "Summarized 3/12 parts" and "Summarized 4/12 parts" are the same stage
+        stage = re.sub(r"\d+", "N", message).strip(" .")
+        if stage != self._stage:
+            self.mark(stage)
+
+    def info(self, message):
+        self.notes.append(message)
+
+    def mark(self, stage=None):
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._since
+        self._stage, self._since = stage, now
+
+
+class Harness:
+    """Runs scenarios against one mock server and collects their measurements"""
+
+    def __init__(self, server, data_dir):
+        self.server = server
+        self.data_dir = data_dir
+        self.client = api_clients.get_openai_client(OPENAI_KEY, base_url=server.openai_base_url)
+        # The pipeline looks Deepgram clients up by key; point them at the mock server
+        api_clients.deepgram_clients.close_all()
+        api_clients.deepgram_clients.factory = lambda api_key: MockDeepgram(api_key, server.url)
+
+    def transcribe(self, minutes, provider):
+        data = synthetic_recording(minutes, self.data_dir)
+        client_or_key = self.client if provider == "OpenAI" else DEEPGRAM_KEY
+        reporter = TimingReporter()
+
+        def run():
+            segments, _ = pipeline.transcribe(data, f"meeting_{minutes:g}min.wav", provider, client_or_key,
+                                              cache=None, reporter=reporter)
+            reporter.mark()
+            return {"segments": len(segments)}
+        return run, reporter
+
+    def generate(self, minutes):
+        transcript = pipeline.transcript_text(synthetic_segments(minutes))
+        config = {"context": "Weekly project sync", "previous_meeting": "", "series": "Weekly sync",
+                  "tone": "Formal", "audience": "Project Team", "goal": "Track progress"}
+        reporter = TimingReporter()
+
+        def run():
+            request, plan, _ = pipeline.prepare_mom_request(transcript, config, self.client, cache=None,
+                                                            use_cache=False, reporter=reporter)
+            reporter.mark("🤖 Streaming the Minutes of Meeting")
+            stream = stream_chat_completion(self.client, tokens=pipeline.request_tokens(request), **request)
+            for _ in stream:
+                pass
+            reporter.mark()
+            stats = stream.stats()
+            return {"model": plan.model, "prompt_tokens": plan.prompt_tokens, "ttft": stats["ttft"],
+                    "tokens_per_second": stats["tokens_per_second"]}
+        return run, reporter
+
+    def rerun(self, minutes):
+        import streamlit_webrtc
+        from streamlit.testing.v1 import AppTest
+
+        # The recorder widget needs a browser; an idle stand-in keeps the rest of the page real
+        streamlit_webrtc.webrtc_streamer = idle_webrtc_streamer
+        app = AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(__file__)), "app.py"),
+                                default_timeout=120)
+        app.session_state["transcript_data"] = synthetic_segments(minutes)
+        app.run()
+        app.sidebar.text_input[0].input(OPENAI_KEY).run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+        reporter = TimingReporter()
+
+        def run():
+            reporter.mark("🔁 Rerun")
+            app.run()
+            reporter.mark()
+            # Panels are fragments: the time one took in this run is what rerunning just that panel costs
+            for row in metrics.summary():
+                if row["stage"] == "render" and "panel" in row["labels"]:
+                    reporter.stages[f"   {row['labels']['panel']} panel"] = row["last"]
+            return {"elements": len(list(app.main))}
+        return run, reporter
+
+    def cache(self, minutes):
+        transcript_cache = pipeline.open_transcript_cache()
+        key = f"benchmark-{minutes:g}min"
+        transcript_cache.put(key, synthetic_segments(minutes))
+        reporter = TimingReporter()
+
+        def run():
+            reporter.mark("💾 Cache load")
+            transcript = transcript_cache.get(key)
+            reporter.mark()
+            return {"segments": len(transcript), "transcript_kb": round(transcript.nbytes / 1024, 1)}
+        return run, reporter
+
+    def history(self, meetings):
+        archive = MeetingArchive(os.path.join(os.environ["CACHE_DIR"], f"history_{meetings:g}.db"))
+        for seed in range(int(meetings)):
+            archive.save(pipeline.transcript_text(synthetic_segments(1, seed=1000 + seed)),
+                         {"goal": f"Weekly sync {seed}", "series": "Weekly sync"}, synthetic_minutes(seed))
+        retriever = PriorContextRetriever(archive)
+        retriever.sync(self.client, "weekly sync")  # steady state: earlier meetings were embedded when they were archived
+        transcript = pipeline.transcript_text(synthetic_segments(10))
+        config = {"context": "Weekly project sync", "previous_meeting": "", "series": "Weekly sync", "tone": "Formal",
+                  "audience": "Project Team", "goal": "Track progress"}
+        reporter = TimingReporter()
+
+        def run():
+            reporter.mark()
+            request, plan, _ = pipeline.prepare_mom_request(transcript, config, self.client, cache=None,
+                                                            use_cache=False, reporter=reporter, retriever=retriever)
+            reporter.mark()
+            return {"prompt_tokens": plan.prompt_tokens, "previous_meeting_tokens": plan.parts["previous_meeting"],
+                    "indexed_passages": len(retriever.index)}
+        return run, reporter
+
+    def scenario(self, name, minutes):
+        if name == "transcribe":
+            return self.transcribe(minutes, "OpenAI")
+        if name == "deepgram":
+            return self.transcribe(minutes, "Deepgram")
+        if name == "generate":
+            return self.generate(minutes)
+        if name == "cache":
+            return self.cache(minutes)
+        if name == "history":
+            return self.history(minutes)
+        return self.rerun(minutes)
+
+
+def idle_webrtc_streamer(**kwargs):
+    from types import SimpleNamespace
+    return SimpleNamespace(state=SimpleNamespace(playing=False))
+
+
+def measure(harness, name, minutes, repeat):
+    """Median time and mean API calls of repeat runs, then one tracemalloc run for peak memory"""
+    run, reporter = harness.scenario(name, minutes)
+    totals, stages, details = [], [], {}
+    openai_before, deepgram_before = api_clients.openai_scheduler.stats(), api_clients.deepgram_scheduler.stats()
+    requests_before = dict(harness.server.requests)
+    metrics.reset()
+    for _ in range(repeat):
+        reporter.stages = {}
+        started = time.perf_counter()
+        details = run()
+        totals.append(time.perf_counter() - started)
+        stages.append(reporter.stages)
+    retries = (api_clients.openai_scheduler.stats()["retries"] - openai_before["retries"] +
+               api_clients.deepgram_scheduler.stats()["retries"] - deepgram_before["retries"])
+    requests = {endpoint: (count - requests_before.get(endpoint, 0)) / repeat
+                for endpoint, count in harness.server.requests.items()
+                if count > requests_before.get(endpoint, 0)}
+    spans = {span_name(row): row["total"] / repeat for row in metrics.summary()}
+
+    reporter.stages = {}
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "minutes": minutes,
+        "seconds": statistics.median(totals),
+        "stages": {stage: statistics.median(s.get(stage, 0.0) for s in stages) for stage in stages[-1]},
+        "spans": spans,
+        "peak_mb": peak / 1024 / 1024,
+        "requests": requests,
+        "retries": retries / repeat,
+        "details": details,
+    }
+
+
+def span_name(row):
+    labels = ",".join(f"{name}={value}" for name, value in row["labels"].items())
+    return f"{row['stage']}[{labels}]" if labels else row["stage"]
+
+
+def compare(results, baseline, threshold):
+    """(scenario, minutes, metric, before, after) for every metric that got worse than threshold"""
+    before = {(r["scenario"], r["minutes"]): r for r in baseline["results"] if "error" not in r}
+    regressions = []
+    for result in results:
+        old = before.get((result["scenario"], result["minutes"]))
+        if old is None or "error" in result:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if result[metric] > old[metric] * (1 + threshold):
+                regressions.append((result["scenario"], result["minutes"], metric, old[metric], result[metric]))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'scenario':<11} {'min':>5} {'seconds':>9} {'peak MB':>8} {'requests':>8} {'retries':>7}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['scenario']:<11} {r['minutes']:>5g}   failed: {r['error']}")
+            continue
+        print(f"{r['scenario']:<11} {r['minutes']:>5g} {r['seconds']:>9.3f} {r['peak_mb']:>8.1f} "
+              f"{sum(r['requests'].values()):>8g} {r['retries']:>7g}")
+        for stage, seconds in r["stages"].items():
+            print(f"{'':<18} {seconds:>9.3f}  {stage}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks against mock OpenAI/Deepgram APIs")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 10, 60],
+                        help="meeting lengths in minutes (default: 1 10 60)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the median is reported")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiply every mock API latency (0 for no simulated latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of mock API requests that fail with 429 or 500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(".cache", "benchmarks"),
+                        help="where synthetic recordings are kept between runs")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="save the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown or growth that counts as a regression (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = MockConfig(error_rate=args.error_rate, seed=args.seed).scaled(args.latency_scale)
+    results = []
+    with MockAPIServer(config) as server:
+        harness = Harness(server, args.data_dir)
+        for name in args.scenarios:
+            for minutes in args.durations:
+                print(f"… {name} {minutes:g} min", file=sys.stderr)
+                try:
+                    results.append(measure(harness, name, minutes, max(1, args.repeat)))
+                except Exception as e:
+                    # e.g. chunking long recordings needs ffmpeg; keep going with the other cases
+                    results.append({"scenario": name, "minutes": minutes, "error": f"{type(e).__name__}: {e}"})
+    api_clients.openai_clients.close_all()
+    api_clients.deepgram_clients.close_all()
+
+    print_results(results)
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "mock": vars(config),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(os.path.join(BASELINE_DIR, f"{args.save_baseline}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for scenario, minutes, metric, before, after in regressions:
+            print(f"REGRESSION {scenario} {minutes:g} min: {metric} {before:.3f} → {after:.3f} "
+                  f"(+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions against baseline '{args.compare}' (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Synthetic meeting recordings and transcripts of any length, for benchmarks."""
+import io
+import os
+import random
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+SPEAKERS = ["Alice", "Bob", "Priya", "Chen", "Maria"]
+PHRASES = [
+    "let's look at the sprint board", "the budget for next quarter is still open",
+    "we agreed to ship the beta on Friday", "can you take the action item on the API docs",
+    "the deadline moves to the end of the month", "I'll follow up with the client tomorrow",
+    "the test coverage dropped after the refactor", "we need a decision on the vendor contract",
+    "marketing wants the release notes by Monday", "let's park that for the next meeting",
+    "the dashboard numbers look better this week", "who owns the migration plan",
+]
+
+
+def synthetic_segments(minutes, seed=0):
+    """Transcript segments covering `minutes` of a meeting (~150 words per minute)"""
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while t < minutes * 60:
+        duration = rng.uniform(3.0, 10.0)
+        words = []
+        while len(words) < duration * 2.5:
+            words.extend(rng.choice(PHRASES).split())
+        text = f"{rng.choice(SPEAKERS)}: " + " ".join(words).capitalize() + "."
+        segments.append({"start_time": round(t, 2), "end_time": round(t + duration, 2), "text": text})
+        t += duration + rng.uniform(0.2, 1.5)
+    return segments
+
+
+def synthetic_minutes(seed=0):
+    """Minutes of Meeting in the generated layout: headings with a few bullets each"""
+    rng = random.Random(seed)
+    sections = []
+    for heading in ("Key Discussion Points", "Decisions Made", "Action Items"):
+        bullets = [f"- {rng.choice(SPEAKERS)}: {rng.choice(PHRASES)}" for _ in range(rng.randint(3, 6))]
+        sections.append(f"## {heading}\n" + "\n".join(bullets))
+    return f"# Minutes of Meeting {seed}\n\n" + "\n\n".join(sections)
+
+
+def synthetic_audio(minutes, seed=0, sample_rate=SAMPLE_RATE):
+    """Speech-like 16-bit mono samples: syllable-rate noise bursts separated by pauses"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * sample_rate)
+    samples = np.zeros(total, dtype=np.int16)
+    position = 0
+    while position < total:
+        burst = int(rng.uniform(2.0, 8.0) * sample_rate)
+        end = min(total, position + burst)
+        t = np.arange(end - position) / sample_rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3.0, 5.0) * t)
+        noise = rng.standard_normal(end - position)
+        samples[position:end] = (noise * envelope * 4000).astype(np.int16)
+        # A pause long enough to count as silence now and then
+        position = end + int(rng.uniform(0.3, 1.6) * sample_rate)
+    return samples
+
+
+def wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def synthetic_recording(minutes, data_dir, seed=0):
+    """WAV bytes of a synthetic recording, generated once and kept in data_dir"""
+    path = os.path.join(data_dir, f"recording_{minutes:g}min_seed{seed}.wav")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(wav_bytes(synthetic_audio(minutes, seed)))
+        os.replace(path + ".tmp", path)
+    with open(path, "rb") as f:
+        return f.read()
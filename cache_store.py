@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from transcript import Transcript
+
+
+def normalize_prompt(text):
+    """Collapse whitespace differences that don't change what a prompt asks for"""
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def make_cache_key(data, **parts):
+    """Build a content-addressed key from raw bytes plus any request options"""
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(data).digest())
+    digest.update(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """JSON-on-disk cache with size- and age-based LRU eviction.
+
+    Every entry is one file named after its key. The file mtime doubles as the
+    last-access time, so a hit simply touches the file and eviction removes the
+    oldest files first. Safe to share between threads and Streamlit sessions.
+    Subclasses can store another format by overriding suffix, _encode and _decode;
+    files with a legacy_suffixes ending still count towards eviction, stats and clear().
+    """
+
+    suffix = ".json"
+    legacy_suffixes = ()
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024, max_age=30 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _encode(self, value):
+        return json.dumps(value).encode("utf-8")
+
+    def _decode(self, data):
+        return json.loads(data)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                if self.max_age and time.time() - os.path.getmtime(path) > self.max_age:
+                    os.unlink(path)
+                    raise FileNotFoundError(path)
+                with open(path, "rb") as f:
+                    value = self._decode(f.read())
+                os.utime(path, None)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def touch(self, key):
+        """Mark key as just used without reading it; returns False if it isn't stored"""
+        with self._lock:
+            try:
+                os.utime(self._path(key), None)
+            except OSError:
+                return False
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(self._path(key))
+
+    def put(self, key, value):
+        """Store value under key and evict anything over the size/age limits"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        data = self._encode(value)
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith((self.suffix, *self.legacy_suffixes)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for mtime, size, path in self._entries():
+            if self.max_age and now - mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current on-disk footprint"""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+            }
+
+
+class TranscriptCache(DiskCache):
+    """DiskCache of transcripts in Transcript's binary format (loads without per-segment parsing).
+
+    Entries from before the binary format (JSON segment lists) are converted
+    the first time they are hit, and are evicted like any other entry.
+    """
+
+    suffix = ".transcript"
+    legacy_suffixes = (".json",)
+
+    def get(self, key):
+        value = super().get(key)
+        if value is None:
+            value = self._migrate(key)
+        return value
+
+    def _migrate(self, key):
+        """Rewrite a legacy JSON entry for key in the binary format; returns it, or None"""
+        legacy_path = os.path.join(self.directory, f"{key}.json")
+        try:
+            if self.max_age and time.time() - os.path.getmtime(legacy_path) > self.max_age:
+                return None  # expired: the next eviction removes it
+            with open(legacy_path, "rb") as f:
+                segments = json.loads(f.read())
+            value = Transcript.from_segments(segments)
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        self.put(key, value)
+        with self._lock:
+            self._remove(legacy_path)
+            self.misses -= 1
+            self.hits += 1
+        return value
+
+    def _encode(self, value):
+        return Transcript.from_segments(value).to_bytes()
+
+    def _decode(self, data):
+        return Transcript.from_bytes(data)
@@ -0,0 +1,160 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pydub import AudioSegment
+
+from audio_chunking import find_cut_point, offset_segments
+from transcript import Transcript
+
+SAMPLE_WIDTH = 2  # frames are converted to 16-bit PCM
+
+
+def frame_pcm(frame):
+    """Interleaved 16-bit PCM bytes, sample rate and channel count of an av.AudioFrame"""
+    samples = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+    if frame.format.is_planar:
+        samples = samples.T  # (channels, n) -> (n, channels)
+    samples = samples.reshape(-1)
+    if samples.dtype.kind == "f":
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    elif samples.dtype == np.int32:
+        samples = (samples >> 16).astype(np.int16)
+    elif samples.dtype != np.int16:
+        samples = samples.astype(np.int16)
+    return samples.tobytes(), frame.sample_rate, channels
+
+
+class FakeTranscriber:
+    """Offline stand-in for a provider: one segment per window describing the audio"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data, filename):
+        self.calls += 1
+        audio = AudioSegment.from_wav(io.BytesIO(data))
+        level = f"{audio.dBFS:.0f} dBFS" if audio.dBFS != float("-inf") else "silence"
+        return Transcript([0.0], [len(audio) / 1000.0], [f"[{filename}] {len(audio) / 1000.0:.1f}s of audio ({level})"])
+
+
+class LiveTranscriber:
+    """Transcribes a recording window by window while it is still being captured.
+
+    Audio frames are buffered until window_seconds have arrived, then cut at
+    the quietest pause in the last search_seconds (as upload chunks are) and
+    sent to transcribe_fn(wav_bytes, filename) on a small worker pool. Finished
+    windows are shifted onto the recording's timeline and appended to
+    segments in order, so when recording stops only the last window is left.
+    """
+
+    def __init__(self, transcribe_fn, window_seconds=20, search_seconds=5, max_workers=2,
+                 sample_rate=16000, min_window_seconds=0.5):
+        self.transcribe_fn = transcribe_fn
+        self.window_ms = int(window_seconds * 1000)
+        self.search_ms = int(search_seconds * 1000)
+        self.min_window_ms = int(min_window_seconds * 1000)
+        self.sample_rate = sample_rate
+        self.segments = Transcript()
+        self.errors = []
+        self.stopped = False
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="live")
+        self._lock = threading.RLock()  # done callbacks may run inside _submit
+        self._pending = []  # raw PCM received since the last cut
+        self._pending_bytes = 0
+        self._format = None  # (sample_rate, channels) of the pending PCM
+        self._offset = 0.0  # seconds of audio already cut into windows
+        self._results = {}
+        self._next_index = 0
+        self._appended = 0
+
+    def add_frame(self, frame):
+        """webrtc_streamer audio_frame_callback: buffer the frame and pass it through"""
+        self.add_pcm(*frame_pcm(frame))
+        return frame
+
+    def add_pcm(self, data, frame_rate, channels):
+        with self._lock:
+            if self.stopped:
+                return
+            if self._format not in (None, (frame_rate, channels)):
+                self._cut(final=True)
+            self._format = (frame_rate, channels)
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            if self._pending_ms() >= self.window_ms + self.search_ms:
+                self._cut()
+
+    def _pending_ms(self):
+        if self._format is None:
+            return 0.0
+        frame_rate, channels = self._format
+        return self._pending_bytes * 1000.0 / (frame_rate * channels * SAMPLE_WIDTH)
+
+    def _cut(self, final=False):
+        if not self._pending:
+            return
+        frame_rate, channels = self._format
+        audio = AudioSegment(data=b"".join(self._pending), sample_width=SAMPLE_WIDTH,
+                             frame_rate=frame_rate, channels=channels)
+        cut = len(audio) if final else find_cut_point(audio, 0, self.window_ms + self.search_ms, self.search_ms)
+        window, rest = audio[:cut], audio[cut:]
+        self._pending = [rest.raw_data] if len(rest) else []
+        self._pending_bytes = len(rest.raw_data) if len(rest) else 0
+
+        if len(window) >= self.min_window_ms:
+            self._submit(window)
+        self._offset += len(window) / 1000.0
+
+    def _submit(self, window):
+        index, offset = self._next_index, self._offset
+        self._next_index += 1
+        window = window.set_channels(1).set_frame_rate(self.sample_rate)
+        buffer = io.BytesIO()
+        window.export(buffer, format="wav")  # WAV needs no encoder, so this stays cheap
+        future = self._pool.submit(self.transcribe_fn, buffer.getvalue(), f"live_{index:04d}.wav")
+        future.add_done_callback(lambda f: self._collect(index, offset, f))
+
+    def _collect(self, index, offset, future):
+        try:
+            segments = offset_segments(future.result(), offset)
+        except Exception as e:
+            self.errors.append(e)
+            segments = Transcript()
+        with self._lock:
+            self._results[index] = segments
+            # Append in recording order even if windows finish out of order
+            while self._appended in self._results:
+                # A new list each time, so readers can tell the transcript grew
+                self.segments = self.segments + self._results.pop(self._appended)
+                self._appended += 1
+
+    @property
+    def duration(self):
+        """Seconds of audio received so far"""
+        return self._offset + self._pending_ms() / 1000.0
+
+    @property
+    def pending_windows(self):
+        return self._next_index - self._appended
+
+    @property
+    def has_audio(self):
+        return self.duration > 0
+
+    def stop(self):
+        """Stop accepting audio and send the last, partial window"""
+        with self._lock:
+            if not self.stopped:
+                self._cut(final=True)
+                self.stopped = True
+
+    def finish(self):
+        """Stop, wait for every window and return the full transcript"""
+        self.stop()
+        # Joining the workers (not just the futures) also waits for _collect
+        self._pool.shutdown(wait=True)
+        return self.segments
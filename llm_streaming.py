@@ -0,0 +1,95 @@
+import time
+
+from api_clients import call_openai
+
+
+class CompletionStream:
+    """Yields text deltas from a streaming chat completion and records latency stats.
+
+    Closing the iterator early (e.g. Streamlit stopping the script because the
+    user pressed Stop or changed a widget) closes the HTTP response, so the
+    upstream request stops generating tokens we would pay for and never show.
+    The key's in-flight slot (slot) is held until the stream is exhausted or
+    closed, so the in-flight cap counts streams that are still generating.
+    """
+
+    def __init__(self, response, started=None, slot=None):
+        self.response = response
+        self.slot = slot
+        self.started = started if started is not None else time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+        self.completion_tokens = None  # exact count, if the API reports usage
+        self.parts = []
+
+    def __iter__(self):
+        try:
+            for chunk in self.response:
+                if getattr(chunk, "usage", None):
+                    self.completion_tokens = chunk.usage.completion_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self.chunks += 1
+                self.parts.append(delta)
+                yield delta
+            self.finished_at = time.perf_counter()
+        finally:
+            self.close()
+
+    def close(self):
+        try:
+            close = getattr(self.response, "close", None)
+            if close:
+                close()
+        finally:
+            if self.slot is not None:
+                self.slot.release()
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    @property
+    def cancelled(self):
+        return self.finished_at is None
+
+    @property
+    def tokens(self):
+        # Each streamed chunk carries roughly one token when usage isn't reported
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+    def stats(self):
+        """Time-to-first-token, total time and throughput for this request"""
+        end = self.finished_at or time.perf_counter()
+        ttft = self.first_token_at - self.started if self.first_token_at else None
+        generating = end - self.first_token_at if self.first_token_at else 0.0
+        return {
+            "ttft": ttft,
+            "total": end - self.started,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens / generating if generating > 0 else 0.0,
+            "cancelled": self.cancelled,
+        }
+
+
+def stream_chat_completion(client, tokens=0, **kwargs):
+    """Start a streaming chat completion and wrap it in a CompletionStream.
+
+    The request goes through the rate-limit scheduler; tokens is its estimated
+    cost against the key's tokens/min budget. Retries only cover starting the
+    stream, not failures half-way through it. The stream keeps its in-flight
+    slot until it is read to the end or closed.
+    """
+    started = time.perf_counter()
+    response, slot = call_openai(client, lambda: client.chat.completions.create(
+        stream=True,
+        stream_options={"include_usage": True},
+        **kwargs
+    ), tokens, hold=True)
+    return CompletionStream(response, started, slot)
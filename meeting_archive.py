@@ -0,0 +1,355 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from token_budget import count_tokens
+
+# Passages of archived minutes that retrieval can pick from, at most this many tokens each
+PASSAGE_TOKENS = 120
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    transcript_key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    series TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    config TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    mom TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meetings_updated ON meetings (updated);
+CREATE TABLE IF NOT EXISTS meeting_passages (
+    id INTEGER PRIMARY KEY,
+    meeting_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    embedding BLOB,
+    embedding_model TEXT
+);
+CREATE INDEX IF NOT EXISTS meeting_passages_meeting ON meeting_passages (meeting_id);
+CREATE TRIGGER IF NOT EXISTS meeting_passages_ad AFTER DELETE ON meetings BEGIN
+    DELETE FROM meeting_passages WHERE meeting_id = old.id;
+END;
+"""
+
+# External-content index over the meetings table, kept current by triggers so
+# every save indexes just that meeting and the archive never needs a rebuild
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+    title, transcript, mom, content='meetings', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS meetings_ai AFTER INSERT ON meetings BEGIN
+    INSERT INTO meetings_fts (rowid, title, transcript, mom) VALUES (new.id, new.title, new.transcript, new.mom);
+END;
+CREATE TRIGGER IF NOT EXISTS meetings_ad AFTER DELETE ON meetings BEGIN
+    INSERT INTO meetings_fts (meetings_fts, rowid, title, transcript, mom)
+    VALUES ('delete', old.id, old.title, old.transcript, old.mom);
+END;
+CREATE TRIGGER IF NOT EXISTS meetings_au AFTER UPDATE OF title, transcript, mom ON meetings BEGIN
+    INSERT INTO meetings_fts (meetings_fts, rowid, title, transcript, mom)
+    VALUES ('delete', old.id, old.title, old.transcript, old.mom);
+    INSERT INTO meetings_fts (rowid, title, transcript, mom) VALUES (new.id, new.title, new.transcript, new.mom);
+END;
+"""
+
+# bm25 column weights: a hit in the title counts most, then the minutes, then the transcript
+_RANK = "bm25(meetings_fts, 10.0, 1.0, 4.0)"
+
+
+def transcript_key(transcript):
+    """Identity of a meeting: regenerating or refining minutes for the same transcript updates it"""
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def meeting_title(config, when=None):
+    """Short title from the meeting goal or the first line of its context"""
+    for text in (config.get("goal"), config.get("context")):
+        lines = (text or "").strip().splitlines()
+        if lines:
+            line = lines[0].strip()
+            return line if len(line) <= 80 else line[:77].rstrip() + "..."
+    return time.strftime("Meeting %Y-%m-%d %H:%M", time.localtime(when))
+
+
+def meeting_series(config):
+    """Series a meeting belongs to; retrieval only reuses minutes from the same series"""
+    return " ".join((config.get("series") or "").split()).lower()
+
+
+def minutes_passages(mom, max_tokens=PASSAGE_TOKENS):
+    """Split minutes into short passages: lines under one heading, at most max_tokens each, heading included"""
+    passages = []
+    heading = ""
+    current, current_tokens = [], 0
+
+    def flush():
+        if current:
+            passages.append("\n".join(([heading] if heading else []) + current))
+            current.clear()
+
+    for line in mom.splitlines():
+        line = line.rstrip()
+        stripped = line.strip()
+        if not stripped or stripped == "---":
+            continue
+        if stripped.startswith("#") or (stripped.startswith("**") and stripped.endswith("**")):
+            flush()
+            current_tokens = 0
+            heading = stripped
+            continue
+        tokens = count_tokens(line)
+        if current and current_tokens + tokens > max_tokens:
+            flush()
+            current_tokens = 0
+        current.append(line)
+        current_tokens += tokens
+    flush()
+    return passages
+
+
+def fts_query(text):
+    """FTS5 query matching every word of text (the last one as a prefix), with syntax characters quoted"""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class MeetingArchive:
+    """SQLite archive of generated minutes, with their transcript and configuration.
+
+    One row per transcript: saving minutes for a transcript that is already
+    archived updates that meeting. Title, transcript and minutes are indexed
+    with FTS5 (when this SQLite build has it; searches fall back to LIKE
+    otherwise). The minutes are also split into passages whose embeddings
+    are filled in later, by whoever retrieves from them. Each meeting is
+    filed under its series (see meeting_series), which scopes retrieval.
+    Safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            # Archives created before meetings had a series
+            if "series" not in {row["name"] for row in self._db.execute("PRAGMA table_info(meetings)")}:
+                self._db.execute("ALTER TABLE meetings ADD COLUMN series TEXT NOT NULL DEFAULT ''")
+            self._db.execute("CREATE INDEX IF NOT EXISTS meetings_series ON meetings (series)")
+            try:
+                self._db.executescript(_FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                self.full_text = False
+            # Meetings archived before passages existed
+            for row in self._db.execute(
+                    "SELECT id, mom FROM meetings WHERE id NOT IN (SELECT meeting_id FROM meeting_passages)"
+            ).fetchall():
+                self._replace_passages(row["id"], row["mom"])
+
+    def save(self, transcript, config, mom, title=None):
+        """Store minutes generated from transcript (plain text) and return the meeting id"""
+        now = time.time()
+        key = transcript_key(transcript)
+        with self._lock, self._db:
+            previous = self._db.execute("SELECT mom FROM meetings WHERE transcript_key = ?", (key,)).fetchone()
+            self._db.execute(
+                """
+                INSERT INTO meetings (transcript_key, title, series, created, updated, config, transcript, mom)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (transcript_key) DO UPDATE SET
+                    title = excluded.title, series = excluded.series, updated = excluded.updated,
+                    config = excluded.config, mom = excluded.mom
+                """,
+                (key, title or meeting_title(config, now), meeting_series(config), now, now, json.dumps(config),
+                 transcript, mom)
+            )
+            meeting_id = self._db.execute("SELECT id FROM meetings WHERE transcript_key = ?", (key,)).fetchone()["id"]
+            if previous is None or previous["mom"] != mom:
+                self._replace_passages(meeting_id, mom)
+            return meeting_id
+
+    def update_minutes(self, meeting_id, mom):
+        """Replace the minutes of an archived meeting (e.g. after a refinement)"""
+        with self._lock, self._db:
+            updated = self._db.execute("UPDATE meetings SET mom = ?, updated = ? WHERE id = ?",
+                                       (mom, time.time(), meeting_id)).rowcount
+            if updated:
+                self._replace_passages(meeting_id, mom)
+
+    def _replace_passages(self, meeting_id, mom):
+        """Passages for new minutes; unchanged ones keep their id and embedding, only the rest are replaced"""
+        existing = {}  # text -> ids of current passages with that text
+        for row in self._db.execute("SELECT id, text FROM meeting_passages WHERE meeting_id = ? ORDER BY id",
+                                    (meeting_id,)):
+            existing.setdefault(row["text"], []).append(row["id"])
+        kept, added = [], []
+        for position, text in enumerate(minutes_passages(mom)):
+            ids = existing.get(text)
+            if ids:
+                kept.append((position, ids.pop(0)))
+            else:
+                added.append((meeting_id, position, text, count_tokens(text)))
+        self._db.executemany("DELETE FROM meeting_passages WHERE id = ?",
+                             [(passage_id,) for ids in existing.values() for passage_id in ids])
+        self._db.executemany("UPDATE meeting_passages SET position = ? WHERE id = ?", kept)
+        self._db.executemany(
+            "INSERT INTO meeting_passages (meeting_id, position, text, tokens) VALUES (?, ?, ?, ?)", added
+        )
+
+    def meeting_id(self, transcript):
+        """Id of the meeting archived for transcript, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM meetings WHERE transcript_key = ?",
+                                   (transcript_key(transcript),)).fetchone()
+        return row["id"] if row else None
+
+    def has_history(self, series, exclude=None):
+        """Whether any meeting of series other than exclude has passages"""
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT 1 FROM meeting_passages p JOIN meetings m ON m.id = p.meeting_id
+                WHERE m.series = ? AND p.meeting_id IS NOT ? LIMIT 1
+                """,
+                (series, exclude)
+            ).fetchone()
+        return row is not None
+
+    def series_passage_ids(self, series):
+        """Ids of the passages of every meeting in series"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.id FROM meeting_passages p JOIN meetings m ON m.id = p.meeting_id WHERE m.series = ?",
+                (series,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def passages_to_embed(self, model, series, after_id=0, limit=100):
+        """(passage id, text) of series' passages without an embedding from model, for ids above after_id"""
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT p.id, p.text FROM meeting_passages p JOIN meetings m ON m.id = p.meeting_id
+                WHERE m.series = ? AND p.embedding_model IS NOT ? AND p.id > ? ORDER BY p.id LIMIT ?
+                """,
+                (series, model, after_id, limit)
+            ).fetchall()
+        return [(row["id"], row["text"]) for row in rows]
+
+    def set_embeddings(self, model, embeddings):
+        """Store (passage id, float32 little-endian bytes) pairs computed with model"""
+        with self._lock, self._db:
+            self._db.executemany("UPDATE meeting_passages SET embedding = ?, embedding_model = ? WHERE id = ?",
+                                 [(vector, model, passage_id) for passage_id, vector in embeddings])
+
+    def embedded_ids(self, model):
+        """Ids of the passages embedded with model"""
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM meeting_passages WHERE embedding_model = ?", (model,)).fetchall()
+        return {row["id"] for row in rows}
+
+    def embeddings(self, model, ids):
+        """(passage id, embedding bytes) of those ids embedded with model, in id order"""
+        ids = sorted(ids)
+        rows = []
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows += self._db.execute(
+                    f"SELECT id, embedding FROM meeting_passages WHERE embedding_model = ? "
+                    f"AND id IN ({','.join('?' * len(batch))}) ORDER BY id",
+                    [model, *batch]
+                ).fetchall()
+        return [(row["id"], row["embedding"]) for row in rows]
+
+    def passages(self, ids):
+        """{passage id: dict of meeting_id, position, text, tokens, title, series, updated} for the ids still there"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"""
+                SELECT p.id, p.meeting_id, p.position, p.text, p.tokens, m.title, m.series, m.updated
+                FROM meeting_passages p JOIN meetings m ON m.id = p.meeting_id
+                WHERE p.id IN ({",".join("?" * len(ids))})
+                """,
+                ids
+            ).fetchall()
+        return {row["id"]: dict(row) for row in rows}
+
+    def get(self, meeting_id):
+        """The archived meeting as a dict (config decoded), or None"""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+        if row is None:
+            return None
+        meeting = dict(row)
+        meeting["config"] = json.loads(meeting["config"])
+        return meeting
+
+    def recent(self, limit=20):
+        """Most recently updated meetings: dicts with id, title, created, updated"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, title, created, updated FROM meetings ORDER BY updated DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, text, limit=20):
+        """Meetings matching every word of text, best first, each with a highlighted snippet"""
+        query = fts_query(text)
+        if query is None:
+            return []
+        with self._lock:
+            if self.full_text:
+                rows = self._db.execute(
+                    f"""
+                    SELECT m.id, m.title, m.created, m.updated,
+                           snippet(meetings_fts, -1, '**', '**', ' … ', 16) AS snippet
+                    FROM meetings_fts JOIN meetings m ON m.id = meetings_fts.rowid
+                    WHERE meetings_fts MATCH ? ORDER BY {_RANK} LIMIT ?
+                    """,
+                    (query, limit)
+                ).fetchall()
+            else:
+                words = re.findall(r"\w+", text)
+                clause = " AND ".join(["(title || ' ' || transcript || ' ' || mom) LIKE ?"] * len(words))
+                rows = self._db.execute(
+                    f"SELECT id, title, created, updated, '' AS snippet FROM meetings WHERE {clause} "
+                    "ORDER BY updated DESC LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit]
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self, meeting_id):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+
+    def stats(self):
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        return {"meetings": count, "bytes": size, "full_text": self.full_text}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
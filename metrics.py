@@ -0,0 +1,130 @@
+"""Timing spans for pipeline stages, exported as JSON lines or Prometheus text.
+
+Spans are kept in process memory and shared by every session and worker
+thread, like the API clients: an aggregate per stage and label set, plus
+the most recent spans for export.
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from settings import METRICS_MAX_SPANS
+
+PROMETHEUS_PREFIX = "mom_stage_seconds"
+
+
+class StageMetrics:
+    def __init__(self, max_spans=METRICS_MAX_SPANS):
+        self._stats = {}  # (stage, labels) -> [count, total, max, last]
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, **labels):
+        key = (stage, tuple(sorted((name, str(value)) for name, value in labels.items())))
+        with self._lock:
+            stats = self._stats.setdefault(key, [0, 0.0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] = seconds
+            self._spans.append({"ts": round(time.time(), 3), "stage": stage, "seconds": round(seconds, 6),
+                                **dict(key[1])})
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Time the enclosed block as one span of stage (recorded even if it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, **labels)
+
+    def summary(self):
+        """One row per stage and label set: count, total, mean, max and last seconds"""
+        with self._lock:
+            items = sorted(self._stats.items())
+        return [
+            {"stage": stage, "labels": dict(labels), "count": count, "total": total, "mean": total / count,
+             "max": peak, "last": last}
+            for (stage, labels), (count, total, peak, last) in items
+        ]
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def to_jsonl(self):
+        return "".join(json.dumps(span) + "\n" for span in self.spans())
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX} Time spent in each pipeline stage.",
+            f"# TYPE {PROMETHEUS_PREFIX} summary",
+        ]
+        rows = self.summary()
+        for row in rows:
+            labels = _prometheus_labels(row)
+            lines.append(f"{PROMETHEUS_PREFIX}_sum{labels} {row['total']:.6f}")
+            lines.append(f"{PROMETHEUS_PREFIX}_count{labels} {row['count']}")
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_max Longest span of each pipeline stage.",
+            f"# TYPE {PROMETHEUS_PREFIX}_max gauge",
+        ]
+        lines += [f"{PROMETHEUS_PREFIX}_max{_prometheus_labels(row)} {row['max']:.6f}" for row in rows]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._spans.clear()
+
+
+def _prometheus_labels(row):
+    labels = dict(stage=row["stage"], **row["labels"])
+    escaped = (f'{name}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+class HTTPTracer:
+    """httpcore trace callback splitting one HTTP request into upload, wait and download spans.
+
+    upload is sending the request body, wait is the provider working until
+    the response headers arrive, and download is reading the body (for a
+    streamed completion, the generation itself).
+    """
+
+    PHASES = {
+        "send_request_body": "upload",
+        "receive_response_headers": "wait",
+        "receive_response_body": "download",
+    }
+
+    def __init__(self, metrics, **labels):
+        self.metrics = metrics
+        self.labels = labels
+        self._started = {}
+
+    def __call__(self, event_name, info):
+        # e.g. "http11.send_request_body.started" / "http11.send_request_body.complete"
+        _, _, event = event_name.partition(".")
+        phase, _, state = event.rpartition(".")
+        stage = self.PHASES.get(phase)
+        if stage is None:
+            return
+        if state == "started":
+            self._started[phase] = time.perf_counter()
+        elif phase in self._started:
+            self.metrics.record(stage, time.perf_counter() - self._started.pop(phase), **self.labels)
+
+
+def trace_request(request):
+    """httpx request hook: trace the request's phases under its endpoint"""
+    endpoint = request.url.path.rstrip("/").rsplit("/", 1)[-1] or "/"
+    request.extensions["trace"] = HTTPTracer(metrics, provider="openai", endpoint=endpoint)
+
+
+metrics = StageMetrics()
+span = metrics.span
@@ -0,0 +1,60 @@
+REFINE_SYSTEM_MESSAGE = (
+    "You are a professional meeting secretary revising an existing Minutes of Meeting "
+    "document. Apply the requested change and return the complete revised document in "
+    "markdown. Keep everything that the change does not affect."
+)
+
+GENERATED_FOOTER = "\n\n---\n*Generated by AI MoM Assistant on "
+
+# Refinements that need facts from the meeting re-attach the transcript;
+# the others are pure edits of the current document.
+REFINEMENTS = {
+    "detailed": {
+        "label": "📝 Make More Detailed",
+        "status": "🔄 Regenerating with more detail...",
+        "instruction": "Make this more detailed and comprehensive, using the transcript for anything missing.",
+        "needs_transcript": True
+    },
+    "concise": {
+        "label": "⚡ Make More Concise",
+        "status": "🔄 Regenerating more concisely...",
+        "instruction": "Make this more concise and focused on key points only.",
+        "needs_transcript": False
+    },
+    "action_items": {
+        "label": "🎯 Focus on Action Items",
+        "status": "🔄 Regenerating with action item focus...",
+        "instruction": "Focus heavily on action items, assignments, and next steps.",
+        "needs_transcript": False
+    },
+    "analysis": {
+        "label": "📊 Add More Analysis",
+        "status": "🔄 Adding analytical insights...",
+        "instruction": "Add more analytical insights and observations about the meeting dynamics and outcomes.",
+        "needs_transcript": True
+    }
+}
+
+
+def strip_footer(mom):
+    """Remove the 'Generated by' footer so it isn't fed back to the model"""
+    index = mom.rfind(GENERATED_FOOTER)
+    return mom[:index] if index != -1 else mom
+
+
+def refinement_prompt(current_mom, instruction, transcript=None):
+    """Compact edit request: the current MoM plus one instruction (and the transcript only if needed)"""
+    source = f"""
+MEETING TRANSCRIPT (for reference):
+{transcript}
+""" if transcript else ""
+
+    return f"""
+Revise the Minutes of Meeting below.
+
+CHANGE REQUESTED:
+{instruction}
+{source}
+CURRENT MINUTES OF MEETING:
+{strip_footer(current_mom).strip()}
+"""
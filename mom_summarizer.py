@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from token_budget import count_tokens
+
+NOTES_SYSTEM_MESSAGE = (
+    "You are a meticulous meeting note-taker. Condense transcript excerpts into "
+    "factual notes without losing decisions, owners, deadlines or numbers."
+)
+
+
+def split_transcript(transcript, window_tokens, count_tokens=count_tokens):
+    """Pack whole transcript segments (blank-line separated) into token-budgeted windows"""
+    windows = []
+    current = []
+    current_tokens = 0
+    for block in transcript.split("\n\n"):
+        block = block.strip()
+        if not block:
+            continue
+        tokens = count_tokens(block)
+        if current and current_tokens + tokens > window_tokens:
+            windows.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(block)
+        current_tokens += tokens
+    if current:
+        windows.append("\n\n".join(current))
+    return windows
+
+
+def window_prompt(window, index, total):
+    """Map-step prompt for one window of the transcript"""
+    return f"""
+The following is part {index + 1} of {total} of a meeting transcript.
+
+Write concise notes for this part only, under these headings:
+- Discussion Points
+- Decisions Made
+- Action Items (owner and deadline where mentioned)
+- Open Questions
+
+Keep the [MM:SS] timestamps of important moments. Do not invent anything that is not in the text.
+
+TRANSCRIPT PART {index + 1}/{total}:
+{window}
+"""
+
+
+def summarize_windows(windows, summarize_fn, max_workers=4, progress_callback=None):
+    """Run the map step over all windows concurrently, keeping their order"""
+    notes = [None] * len(windows)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(summarize_fn, window_prompt(window, i, len(windows))): i
+            for i, window in enumerate(windows)
+        }
+        done = 0
+        for future in as_completed(futures):
+            notes[futures[future]] = future.result()
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(windows))
+    return [f"[Notes for part {i + 1} of {len(notes)}]\n{note.strip()}" for i, note in enumerate(notes)]
+
+
+def condense_transcript(transcript, summarize_fn, window_tokens=6000, max_workers=4,
+                        progress_callback=None, count_tokens=count_tokens, target_tokens=None):
+    """Shrink a transcript until it fits in target_tokens (default: one window).
+
+    Transcripts that already fit are returned unchanged. Longer ones are split
+    on segment boundaries into windows of at most window_tokens, each window is
+    summarized in parallel (map), and if the combined notes are still too long
+    they are summarized again, level by level, until they fit. The result is
+    what the final MoM prompt (reduce) should be built from.
+    summarize_fn(prompt) -> text runs on worker threads.
+    """
+    target_tokens = target_tokens or window_tokens
+    window_tokens = min(window_tokens, target_tokens)
+    text = transcript
+    while count_tokens(text) > target_tokens:
+        windows = split_transcript(text, window_tokens, count_tokens)
+        if len(windows) == 1:
+            break
+        condensed = "\n\n".join(summarize_windows(windows, summarize_fn, max_workers, progress_callback))
+        if count_tokens(condensed) >= count_tokens(text):
+            # Summaries aren't getting shorter; stop rather than loop forever
+            return condensed
+        text = condensed
+    return text
@@ -0,0 +1,612 @@
+"""Transcription and MoM generation pipeline, independent of any UI.
+
+app.py (Streamlit) and batch.py (command line) both drive these functions.
+Progress is reported through a Reporter, and errors are raised to the caller.
+"""
+import io
+import os
+from datetime import datetime
+
+from api_clients import call_deepgram, call_openai, get_deepgram_client
+from audio_chunking import load_audio, split_audio, transcribe_chunks
+from audio_preprocess import PreparedAudio, preprocess_audio
+from cache_store import DiskCache, TranscriptCache, make_cache_key, normalize_prompt
+from metrics import span
+from mom_refinement import REFINE_SYSTEM_MESSAGE, refinement_prompt
+from mom_summarizer import NOTES_SYSTEM_MESSAGE, condense_transcript
+from settings import (
+    CACHE_DIR, CHUNK_MINUTES, COMPLETION_CACHE_MAX_AGE_DAYS, COMPLETION_CACHE_MAX_MB, DEEPGRAM_OPTIONS,
+    JOURNAL_DIR, JOURNAL_MAX_AGE_DAYS, MOM_ALLOW_ESCALATION, MOM_MAX_TOKENS, MOM_NOTES_MAX_TOKENS,
+    MOM_PREVIOUS_MEETING_TOKENS, MOM_WINDOW_TOKENS, MOM_WORKERS, PRIOR_CONTEXT_TOKENS,
+    PREPROCESS_OPTIONS, TRANSCRIBE_WORKERS, TRANSCRIPT_CACHE_MAX_AGE_DAYS, TRANSCRIPT_CACHE_MAX_MB,
+    UPLOAD_SPILL_BYTES, VAD_OPTIONS, WHISPER_MAX_BYTES, WHISPER_OPTIONS
+)
+from token_budget import (
+    DEFAULT_MODEL, ESCALATIONS, BudgetError, context_limit, count_tokens, fit_prompt, message_tokens, output_limit,
+    trim_to_tokens
+)
+from transcript import Transcript
+from transcription_journal import TranscriptionJournal, prune_journals
+
+MOM_SYSTEM_MESSAGE = "You are a professional meeting secretary and documentation expert. Create clear, structured, and comprehensive Minutes of Meeting documents."
+
+TONE_INSTRUCTIONS = {
+    "Formal": "Use formal business language, proper titles, and structured format.",
+    "Informal": "Use casual, friendly language while maintaining professionalism.",
+    "Leadership": "Focus on strategic decisions, high-level outcomes, and executive summary.",
+    "Urgent": "Emphasize critical items, deadlines, and immediate action requirements.",
+    "FYI": "Structure as an informational update with key highlights.",
+    "Action-focused": "Prioritize action items, assignments, and next steps.",
+    "Approval-seeking": "Structure to clearly present items requiring approval or decision."
+}
+
+AUDIENCE_CONTEXT = {
+    "Leadership": "executive stakeholders who need strategic overview",
+    "Developers": "technical team members who need implementation details",
+    "Clients": "external stakeholders who need progress updates",
+    "Cross-functional": "diverse team members from multiple departments",
+    "Project Team": "core project contributors and stakeholders"
+}
+
+
+class Reporter:
+    """Receives progress from pipeline stages; the default ignores everything"""
+
+    def progress(self, fraction, message):
+        pass
+
+    def info(self, message):
+        pass
+
+
+def format_time(seconds):
+    """Convert seconds to MM:SS format"""
+    minutes = int(seconds // 60)
+    seconds = int(seconds % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def transcript_text(segments):
+    """Timestamped plain text for a list of segments, as used in the MoM prompt"""
+    return "\n\n".join(
+        f"[{format_time(s['start_time'])} - {format_time(s['end_time'])}] {s['text']}" for s in segments
+    )
+
+
+# --- Caches ---
+
+def open_transcript_cache():
+    return TranscriptCache(
+        os.path.join(CACHE_DIR, "transcripts"),
+        max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024,
+        max_age=TRANSCRIPT_CACHE_MAX_AGE_DAYS * 24 * 3600
+    )
+
+
+def open_completion_cache():
+    return DiskCache(
+        os.path.join(CACHE_DIR, "completions"),
+        max_bytes=COMPLETION_CACHE_MAX_MB * 1024 * 1024,
+        max_age=COMPLETION_CACHE_MAX_AGE_DAYS * 24 * 3600
+    )
+
+
+def transcript_cache_key(data, provider):
+    """Cache key for a recording: audio content + provider + request options"""
+    options = WHISPER_OPTIONS if provider == "OpenAI" else DEEPGRAM_OPTIONS
+    return make_cache_key(data, provider=provider, options=options, preprocess=PREPROCESS_OPTIONS, vad=VAD_OPTIONS)
+
+
+def completion_cache_key(request):
+    """Cache key for a chat request: model, normalized messages, max_tokens and temperature"""
+    messages = [(message["role"], normalize_prompt(message["content"])) for message in request["messages"]]
+    return make_cache_key(b"", model=request["model"], messages=messages,
+                          max_tokens=request["max_tokens"], temperature=request["temperature"])
+
+
+# --- Transcription ---
+
+def prepare_audio(data, filename, reporter=None):
+    """Shrink a recording before sending it to a provider and report the savings"""
+    reporter = reporter or Reporter()
+    if not PREPROCESS_OPTIONS["enabled"]:
+        return PreparedAudio(data, filename, len(data), 0.0)
+
+    reporter.progress(0.05, "🎚️ Optimizing audio for upload...")
+    with span("prepare"):
+        prepared = preprocess_audio(
+            data,
+            filename,
+            sample_rate=PREPROCESS_OPTIONS["sample_rate"],
+            fmt=PREPROCESS_OPTIONS["fmt"],
+            bitrate=PREPROCESS_OPTIONS["bitrate"],
+            trim=PREPROCESS_OPTIONS["trim"],
+            vad_options=VAD_OPTIONS
+        )
+
+    if prepared.bytes_saved > 0:
+        reporter.info(f"🎚️ Optimized audio: {prepared.original_bytes / 1024 / 1024:.2f} MB → "
+                      f"{prepared.size / 1024 / 1024:.2f} MB "
+                      f"(saved {prepared.bytes_saved / 1024 / 1024:.2f} MB in {prepared.elapsed:.1f}s)")
+    if prepared.removed_seconds > 0:
+        reporter.info(f"🔇 Skipped {format_time(prepared.removed_seconds)} of silence - "
+                      "timestamps still match the original recording")
+    return prepared
+
+
+def chunk_journal(data):
+    """Open the resumable per-chunk journal for a recording (same file and settings = same job)"""
+    # Chunks are cut from the preprocessed, silence-trimmed audio, so those settings decide where they fall
+    job_id = make_cache_key(data, provider="OpenAI", options=WHISPER_OPTIONS, chunk_minutes=CHUNK_MINUTES,
+                            preprocess=PREPROCESS_OPTIONS, vad=VAD_OPTIONS)
+    return TranscriptionJournal(JOURNAL_DIR, job_id)
+
+
+def transcribe_whisper_chunked(data, filename, prepared, client, reporter=None, max_workers=TRANSCRIBE_WORKERS):
+    """Transcribe a long recording by splitting it at silences and running the chunks in parallel.
+
+    Raises ChunkTranscriptionError if some chunks failed; the finished ones stay
+    in the journal so a retry only redoes the failed chunks.
+    """
+    reporter = reporter or Reporter()
+    prune_journals(JOURNAL_DIR, JOURNAL_MAX_AGE_DAYS * 24 * 3600)
+    journal = chunk_journal(data)
+
+    reporter.progress(0.1, "✂️ Splitting audio at silence boundaries...")
+    with span("split"):
+        audio = prepared.audio if prepared.audio is not None else load_audio(io.BytesIO(data), filename)
+        chunks = split_audio(audio, chunk_seconds=CHUNK_MINUTES * 60)
+    reporter.info(f"📁 Processing {filename} as {len(chunks)} chunks "
+                  f"({len(audio) / 60000:.1f} min, up to {max_workers} in parallel)")
+    if journal.done_count():
+        reporter.info(f"🔁 Resuming: {journal.done_count()} chunks already transcribed in an earlier run")
+
+    def transcribe_chunk(chunk_data, chunk_filename):
+        transcript = call_openai(client, lambda: client.audio.transcriptions.create(
+            file=(chunk_filename, chunk_data),
+            **WHISPER_OPTIONS
+        ))
+        with span("segment_conversion", provider="openai"):
+            return Transcript.from_whisper(transcript)
+
+    def on_progress(done, total):
+        reporter.progress(done / total, f"🤖 Transcribed {done}/{total} chunks with Whisper API...")
+
+    transcript_data = transcribe_chunks(chunks, transcribe_chunk,
+                                        max_workers=max_workers,
+                                        progress_callback=on_progress,
+                                        journal=journal)
+
+    # The caller caches the full transcript, so the journal is no longer needed
+    journal.remove()
+    transcript_data = prepared.remap_segments(transcript_data)
+
+    reporter.progress(1.0, "✅ Transcription complete!")
+    return transcript_data
+
+
+def release_for_upload(data, prepared):
+    """Keep only what a single upload needs in memory while it runs.
+
+    The decoded audio is only needed for chunking. Upload bytes produced by
+    preprocessing (the caller still holds the original) that are larger than
+    UPLOAD_SPILL_BYTES are moved to a temporary file and streamed from there.
+    """
+    prepared.audio = None
+    if prepared.data is not data and prepared.size > UPLOAD_SPILL_BYTES:
+        with span("spill"):
+            prepared.spill(UPLOAD_SPILL_BYTES)
+
+
+def transcribe_whisper(data, filename, client, reporter=None, max_workers=TRANSCRIBE_WORKERS):
+    """Transcribe a recording with OpenAI Whisper, chunking it if it is over the size limit"""
+    reporter = reporter or Reporter()
+    prepared = prepare_audio(data, filename, reporter)
+    if prepared.size > WHISPER_MAX_BYTES:
+        return transcribe_whisper_chunked(data, filename, prepared, client, reporter, max_workers)
+
+    release_for_upload(data, prepared)
+    try:
+        # Step 1: Upload and transcribe
+        reporter.progress(0.25, "🎵 Uploading audio to OpenAI...")
+
+        def upload():
+            # Sent straight from the buffer (or the spilled file, reopened for every attempt)
+            with prepared.upload_content() as content:
+                # Use Whisper API with timestamps
+                return client.audio.transcriptions.create(
+                    file=(prepared.filename, content),
+                    **WHISPER_OPTIONS
+                )
+
+        reporter.progress(0.5, "🤖 Transcribing with Whisper API...")
+        transcript = call_openai(client, upload)
+
+        reporter.progress(0.75, "📝 Processing transcript segments...")
+        with span("segment_conversion", provider="openai"):
+            transcript_data = prepared.remap_segments(Transcript.from_whisper(transcript))
+
+        reporter.progress(1.0, "✅ Transcription complete!")
+        return transcript_data
+
+    finally:
+        prepared.close()
+
+
+def transcribe_deepgram(data, filename, deepgram_key, reporter=None):
+    """Transcribe a recording with Deepgram's prerecorded API"""
+    reporter = reporter or Reporter()
+    dg_client = get_deepgram_client(deepgram_key)
+    prepared = prepare_audio(data, filename, reporter)
+    release_for_upload(data, prepared)
+
+    try:
+        def upload():
+            with prepared.upload_content() as content:
+                source = {"buffer": content, "mimetype": prepared.mimetype}
+                return dg_client.transcription.sync_prerecorded(source, DEEPGRAM_OPTIONS)
+
+        reporter.progress(0.5, "🤖 Transcribing with Deepgram...")
+        response = call_deepgram(deepgram_key, upload)
+
+        with span("segment_conversion", provider="deepgram"):
+            segments = prepared.remap_segments(Transcript.from_deepgram(response))
+        reporter.progress(1.0, "✅ Transcription complete!")
+        return segments
+
+    finally:
+        prepared.close()
+
+
+def window_transcriber(provider, client_or_key):
+    """transcribe_fn(data, filename) -> segments for live recording windows (WAV, under the size limit)"""
+    if provider == "OpenAI":
+        client = client_or_key
+
+        def transcribe_window(data, filename):
+            transcript = call_openai(client, lambda: client.audio.transcriptions.create(
+                file=(filename, data),
+                **WHISPER_OPTIONS
+            ))
+            with span("segment_conversion", provider="openai"):
+                return Transcript.from_whisper(transcript)
+    else:
+        dg_client = get_deepgram_client(client_or_key)
+
+        def transcribe_window(data, filename):
+            source = {"buffer": data, "mimetype": "audio/wav"}
+            response = call_deepgram(client_or_key,
+                                     lambda: dg_client.transcription.sync_prerecorded(source, DEEPGRAM_OPTIONS))
+            with span("segment_conversion", provider="deepgram"):
+                return Transcript.from_deepgram(response)
+    return transcribe_window
+
+
+def transcribe(data, filename, provider, client_or_key, cache=None, reporter=None,
+               max_workers=TRANSCRIBE_WORKERS):
+    """Transcribe with the chosen provider, going through the transcript cache.
+
+    client_or_key is an openai.OpenAI client for "OpenAI" or a Deepgram API key.
+    Returns (Transcript, from_cache).
+    """
+    cache_key = transcript_cache_key(data, provider)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached:
+            return cached, True
+
+    if provider == "OpenAI":
+        segments = transcribe_whisper(data, filename, client_or_key, reporter, max_workers)
+    else:
+        segments = transcribe_deepgram(data, filename, client_or_key, reporter)
+
+    if cache is not None and segments:
+        cache.put(cache_key, segments)
+    return segments, False
+
+
+# --- MoM generation ---
+
+def generate_mom_prompt(transcript, context, previous_meeting, tone, audience, goal):
+    """Generate the prompt for MoM creation"""
+
+    prompt = f"""
+Create professional Minutes of Meeting (MoM) based on the following transcript and context.
+
+MEETING CONTEXT:
+{context}
+
+AUDIENCE: {audience} - {AUDIENCE_CONTEXT.get(audience, "general stakeholders")}
+GOAL: {goal}
+TONE: {tone} - {TONE_INSTRUCTIONS.get(tone, "Professional and clear")}
+
+TRANSCRIPT:
+{transcript}
+
+PREVIOUS MEETING CONTEXT:
+{previous_meeting if previous_meeting else "No previous meeting context provided."}
+
+Please generate a comprehensive MoM that includes:
+1. Meeting Overview (date, attendees, purpose)
+2. Key Discussion Points
+3. Decisions Made
+4. Action Items (with owners and deadlines where mentioned)
+5. Next Steps
+6. Follow-up Meeting Details
+
+Format the output in a professional, easy-to-read structure appropriate for the specified audience and tone.
+Use markdown formatting for better readability.
+"""
+
+    return prompt
+
+
+def completion_request(prompt, model="gpt-3.5-turbo", max_tokens=2000, system=MOM_SYSTEM_MESSAGE):
+    """Keyword arguments for a chat completion request"""
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": system
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "max_tokens": max_tokens,
+        "temperature": 0.3  # Lower temperature for more consistent, professional output
+    }
+
+
+def request_tokens(request):
+    """Tokens a chat request counts against the tokens/min limit (prompt + max_tokens)"""
+    return message_tokens(request["messages"], request["model"]) + request["max_tokens"]
+
+
+def chat_completion(client, prompt, model="gpt-3.5-turbo", max_tokens=2000, system=MOM_SYSTEM_MESSAGE,
+                    cache=None, use_cache=True):
+    """Single chat completion call; returns the response text (from cache when possible)"""
+    return send_chat_request(client, completion_request(prompt, model, max_tokens, system), cache, use_cache)
+
+
+def send_chat_request(client, request, cache=None, use_cache=True):
+    """Send a prepared chat request (see completion_request); returns the response text"""
+    cache_key = completion_cache_key(request)
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    response = call_openai(client, lambda: client.chat.completions.create(**request), request_tokens(request))
+    text = response.choices[0].message.content
+    if cache is not None:
+        cache.put(cache_key, text)
+    return text
+
+
+def condense_for_mom(transcript, client, cache=None, use_cache=True, reporter=None, max_workers=MOM_WORKERS,
+                     target_tokens=MOM_WINDOW_TOKENS, model=DEFAULT_MODEL):
+    """Map step for transcripts over target_tokens: summarize windows of MOM_WINDOW_TOKENS in parallel with model"""
+    if count_tokens(transcript, model) <= target_tokens:
+        return transcript
+
+    reporter = reporter or Reporter()
+    reporter.progress(0.0, "📚 Long meeting detected - summarizing it in parts...")
+
+    def summarize(prompt):
+        return chat_completion(client, prompt, model=model, max_tokens=MOM_NOTES_MAX_TOKENS,
+                               system=NOTES_SYSTEM_MESSAGE, cache=cache, use_cache=use_cache)
+
+    def on_progress(done, total):
+        reporter.progress(done / total, f"📚 Summarized {done}/{total} parts of the meeting...")
+
+    with span("condense"):
+        condensed = condense_transcript(transcript, summarize, window_tokens=MOM_WINDOW_TOKENS,
+                                        max_workers=max_workers, progress_callback=on_progress,
+                                        count_tokens=lambda text: count_tokens(text, model),
+                                        target_tokens=target_tokens)
+
+    reporter.progress(1.0, "✅ Meeting parts summarized!")
+    return condensed
+
+
+def add_footer(mom):
+    """Append the generation timestamp footer"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return mom + f"\n\n---\n*Generated by AI MoM Assistant on {timestamp}*"
+
+
+def mom_prompt_builder(config):
+    """build_prompt(transcript, context, previous_meeting, instructions) for the MoM prompt"""
+    def build_prompt(transcript, context, previous_meeting, instructions):
+        if instructions:
+            context += f"\n\nAdditional Instructions: {instructions}"
+        return generate_mom_prompt(transcript, context, previous_meeting, config.get('tone', 'Formal'),
+                                   config.get('audience', 'Project Team'), config.get('goal', ''))
+    return build_prompt
+
+
+def mom_request_parts(transcript, config):
+    """Model, response budget, prompt builder and prompt parts for a MoM request"""
+    parts = {
+        "transcript": transcript,
+        "context": config.get('context', ''),
+        "previous_meeting": config.get('previous_meeting', ''),
+        "instructions": config.get('instructions', '')
+    }
+    return config.get('model') or DEFAULT_MODEL, config.get('max_tokens') or MOM_MAX_TOKENS, \
+        mom_prompt_builder(config), parts
+
+
+def retrieval_stand_in(budget, model):
+    """Text of about budget tokens, standing in for earlier context retrieval may add"""
+    return trim_to_tokens("earlier context " * budget, budget, model)
+
+
+def trim_previous_meeting(parts, model, budget=MOM_PREVIOUS_MEETING_TOKENS):
+    """Cut previous_meeting to its own budget; returns a note if anything was cut"""
+    before = count_tokens(parts["previous_meeting"], model)
+    if before <= budget:
+        return None
+    parts["previous_meeting"] = trim_to_tokens(parts["previous_meeting"], budget, model)
+    return f"✂️ Trimmed previous meeting from {before} to {count_tokens(parts['previous_meeting'], model)} tokens"
+
+
+def mom_window_tokens(model, max_tokens, build_prompt, parts, allow_escalation=False):
+    """Transcript size that still fits next to the other prompt parts and the response.
+
+    With allow_escalation, a transcript too long for the model is measured
+    against its larger-context escalation, which fit_prompt will switch to,
+    so it is only condensed if it doesn't fit there either.
+    """
+    def room(model):
+        fixed = message_tokens([{"content": MOM_SYSTEM_MESSAGE},
+                                {"content": build_prompt(**dict(parts, transcript=""))}], model)
+        return max(MOM_NOTES_MAX_TOKENS, context_limit(model) - min(max_tokens, output_limit(model)) - fixed)
+
+    window_tokens = room(model)
+    if allow_escalation and model in ESCALATIONS and count_tokens(parts["transcript"], model) > window_tokens:
+        window_tokens = max(window_tokens, room(ESCALATIONS[model]))
+    return window_tokens
+
+
+def condensed_stand_in(parts, window_tokens, model):
+    """Parts with the transcript cut to window size, standing in for its condensed notes"""
+    return dict(parts, transcript=trim_to_tokens(parts["transcript"], window_tokens, model))
+
+
+def escalation_allowed(config):
+    return config.get('allow_escalation', MOM_ALLOW_ESCALATION)
+
+
+def fit_mom_prompt(parts, build_prompt, model, max_tokens, config):
+    return fit_prompt(parts, build_prompt, model, max_tokens, MOM_SYSTEM_MESSAGE,
+                      trim_order=("previous_meeting", "transcript"), allow_escalation=escalation_allowed(config))
+
+
+def preview_mom_budget(transcript, config):
+    """Token budget of a MoM request, worked out locally before anything is sent.
+
+    Returns a dict with model, tokens per part, window_tokens and condense
+    (whether the transcript will be summarized in parts first); when it won't
+    be, plan holds the fitted BudgetPlan, or error if the request can't fit.
+    With retrieval from a meeting series, previous_meeting is counted at no
+    less than the PRIOR_CONTEXT_TOKENS retrieval may fill.
+    """
+    model, max_tokens, build_prompt, parts = mom_request_parts(transcript, config)
+    trimmed_note = trim_previous_meeting(parts, model)
+    if config.get('retrieve_prior') and config.get('series') and \
+            count_tokens(parts["previous_meeting"], model) < PRIOR_CONTEXT_TOKENS:
+        # Retrieval may fill its whole budget from archived minutes
+        parts["previous_meeting"] = retrieval_stand_in(PRIOR_CONTEXT_TOKENS, model)
+    window_tokens = mom_window_tokens(model, max_tokens, build_prompt, parts, escalation_allowed(config))
+    preview = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "parts": {name: count_tokens(text, model) for name, text in parts.items()},
+        "window_tokens": window_tokens,
+        "plan": None,
+        "error": None
+    }
+    preview["condense"] = preview["parts"]["transcript"] > window_tokens
+    try:
+        preview["plan"] = fit_mom_prompt(condensed_stand_in(parts, window_tokens, model), build_prompt, model,
+                                         max_tokens, config)[1]
+        if trimmed_note:
+            preview["plan"].notes.insert(0, trimmed_note)
+    except BudgetError as e:
+        preview["error"] = str(e)
+    return preview
+
+
+def retrieve_previous_meeting(transcript, config, client, retriever, reporter):
+    """(earlier context, retrieved): previous_meeting narrowed to the passages most relevant to transcript.
+
+    If retrieval fails, has no history to search or finds nothing relevant,
+    the previous meeting text is kept as given (and trimmed to its usual
+    budget), so generation never fails or loses the summary because of it.
+    """
+    previous_meeting = config.get('previous_meeting', '')
+    reporter.progress(0.02, "🔎 Finding relevant context from earlier meetings...")
+    try:
+        retrieved = retriever.retrieve(transcript, client, previous_meeting, config.get('series', ''))
+    except Exception as e:
+        reporter.info(f"⚠️ Couldn't retrieve context from earlier meetings ({e}); "
+                      "using the previous meeting summary as given")
+        return previous_meeting, False
+    if not retrieved:
+        if previous_meeting:
+            reporter.info("🔎 Nothing in earlier meetings was relevant enough; "
+                          "using the previous meeting summary as given")
+        return previous_meeting, False
+    return retrieved, retrieved != previous_meeting
+
+
+def prepare_mom_request(transcript, config, client, cache=None, use_cache=True, reporter=None,
+                        max_workers=MOM_WORKERS, retriever=None):
+    """Condense the transcript as far as the model needs and fit the MoM prompt into its context.
+
+    config may set model, max_tokens, instructions and allow_escalation on top
+    of the meeting settings. previous_meeting is first cut to its own budget.
+    Only transcripts longer than what is left of the model's context (or its
+    escalation's) after the other prompt parts and the response are
+    condensed, by the same model; if the final prompt still doesn't fit,
+    fit_prompt switches to a larger-context model or trims the previous
+    meeting, then the transcript.
+    With a PriorContextRetriever, previous_meeting is first replaced by the
+    passages of earlier minutes most relevant to this transcript.
+    Raises BudgetError, before any API call, if it can't be made to fit.
+    Returns (request, BudgetPlan, mom_source).
+    """
+    reporter = reporter or Reporter()
+    previous_meeting_tokens = MOM_PREVIOUS_MEETING_TOKENS
+    if retriever is not None:
+        previous_meeting, retrieved = retrieve_previous_meeting(transcript, config, client, retriever, reporter)
+        config = dict(config, previous_meeting=previous_meeting)
+        if retrieved:
+            # Already packed within the retrieval budget
+            previous_meeting_tokens = max(previous_meeting_tokens, PRIOR_CONTEXT_TOKENS)
+    with span("prompt_build", step="precheck"):
+        model, max_tokens, build_prompt, parts = mom_request_parts(transcript, config)
+        trimmed_note = trim_previous_meeting(parts, model, previous_meeting_tokens)
+        window_tokens = mom_window_tokens(model, max_tokens, build_prompt, parts, escalation_allowed(config))
+        # Fail now rather than after paying for the map step
+        fit_mom_prompt(condensed_stand_in(parts, window_tokens, model), build_prompt, model, max_tokens, config)
+    parts["transcript"] = condense_for_mom(transcript, client, cache, use_cache, reporter, max_workers,
+                                           target_tokens=window_tokens, model=model)
+
+    with span("prompt_build", step="final"):
+        prompt, plan = fit_mom_prompt(parts, build_prompt, model, max_tokens, config)
+    if trimmed_note:
+        reporter.info(trimmed_note)
+    for note in plan.notes:
+        reporter.info(note)
+    return completion_request(prompt, plan.model, plan.max_tokens), plan, parts["transcript"]
+
+
+def prepare_refinement_request(current_mom, instruction, transcript=None, model=DEFAULT_MODEL,
+                               max_tokens=MOM_MAX_TOKENS, allow_escalation=MOM_ALLOW_ESCALATION):
+    """Refinement request fitted into the model's context (the transcript is trimmed first)"""
+    def build_prompt(current_mom, transcript):
+        return refinement_prompt(current_mom, instruction, transcript or None)
+
+    with span("prompt_build", step="refine"):
+        prompt, plan = fit_prompt({"current_mom": current_mom, "transcript": transcript or ""}, build_prompt,
+                                  model, max_tokens, REFINE_SYSTEM_MESSAGE, trim_order=("transcript",),
+                                  allow_escalation=allow_escalation)
+    return completion_request(prompt, plan.model, plan.max_tokens, REFINE_SYSTEM_MESSAGE), plan
+
+
+def generate_mom(transcript, config, client, cache=None, use_cache=True, reporter=None,
+                 max_workers=MOM_WORKERS, retriever=None):
+    """Full MoM generation (map-reduce if needed) without streaming; returns the MoM text"""
+    reporter = reporter or Reporter()
+    request, plan, mom_source = prepare_mom_request(transcript, config, client, cache, use_cache, reporter,
+                                                    max_workers, retriever)
+    reporter.progress(0.5, f"🤖 Writing the Minutes of Meeting with {plan.model}...")
+    with span("generation", model=plan.model):
+        mom = send_chat_request(client, request, cache=cache, use_cache=use_cache)
+    reporter.progress(1.0, "✅ Generation complete!")
+    return add_footer(mom)
@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from api_clients import call_openai
+from meeting_archive import meeting_series, minutes_passages, transcript_key
+from metrics import span
+from mom_summarizer import split_transcript
+from settings import (
+    EMBEDDING_DIMENSIONS, EMBEDDING_MODEL, PRIOR_CONTEXT_MIN_SCORE, PRIOR_CONTEXT_TOKENS, PRIOR_CONTEXT_TOP_K
+)
+from token_budget import count_tokens
+from vector_index import VectorIndex
+
+# Texts per embeddings request, transcript tokens per query chunk, and transcripts whose query
+# embeddings are kept (regenerating the same meeting doesn't embed it again)
+EMBED_BATCH = 256
+QUERY_CHUNK_TOKENS = 1000
+QUERY_CACHE_SIZE = 16
+
+
+def embed_texts(client, texts, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS):
+    """float32 embedding matrix, one row per text, requested in batches through the scheduler"""
+    options = {"dimensions": dimensions} if dimensions else {}
+    rows = []
+    for start in range(0, len(texts), EMBED_BATCH):
+        batch = texts[start:start + EMBED_BATCH]
+        response = call_openai(client, lambda: client.embeddings.create(model=model, input=batch, **options),
+                               tokens=sum(count_tokens(text) for text in batch))
+        rows.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return np.array(rows, dtype=np.float32)
+
+
+class PriorContextRetriever:
+    """Picks the passages of earlier minutes most relevant to a transcript, within a token budget.
+
+    Archived minutes are split into passages when they are saved. Passages
+    are embedded the first time retrieval runs after they were archived and
+    kept in one process-wide VectorIndex, so a generation only pays for
+    embedding its own transcript (chunk by chunk) plus anything archived
+    since the last one. Only minutes of the same meeting series are
+    searched, and only passages scoring at least min_score are used. The
+    prompt gets at most budget tokens of earlier context however long the
+    meeting history grows.
+    """
+
+    def __init__(self, archive, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS,
+                 budget=PRIOR_CONTEXT_TOKENS, top_k=PRIOR_CONTEXT_TOP_K, min_score=PRIOR_CONTEXT_MIN_SCORE):
+        self.archive = archive
+        self.model = model
+        self.dimensions = dimensions
+        self.budget = budget
+        self.top_k = top_k
+        self.min_score = min_score
+        self.index = VectorIndex(dimensions or None)
+        self._model_key = f"{model}:{dimensions}" if dimensions else model
+        self._loaded = set()  # passage ids in the index
+        self._embedding = set()  # passage ids being embedded by some caller right now
+        self._lock = threading.Lock()
+        self._queries = OrderedDict()  # transcript key -> query embeddings
+
+    def sync(self, client, series):
+        """Embed series' passages archived since the last call, then bring the index up to date.
+
+        Only passages of series are sent to the API (with client's key);
+        passages another caller is embedding at the same time are left to it.
+        Passages that no longer exist are dropped from the index. The lock is
+        only held for local work, never across API calls.
+        """
+        after_id = 0
+        while True:
+            batch = self.archive.passages_to_embed(self._model_key, series, after_id, limit=EMBED_BATCH)
+            if not batch:
+                break
+            after_id = batch[-1][0]
+            with self._lock:
+                pending = [(passage_id, text) for passage_id, text in batch if passage_id not in self._embedding]
+                self._embedding.update(passage_id for passage_id, _ in pending)
+            if not pending:
+                continue
+            try:
+                vectors = embed_texts(client, [text for _, text in pending], self.model, self.dimensions)
+                self.archive.set_embeddings(self._model_key, [
+                    (passage_id, vector.astype("<f4").tobytes()) for (passage_id, _), vector in zip(pending, vectors)
+                ])
+            finally:
+                with self._lock:
+                    self._embedding.difference_update(passage_id for passage_id, _ in pending)
+
+        with self._lock:
+            embedded = self.archive.embedded_ids(self._model_key)
+            # Passages replaced by edited minutes, or of deleted meetings
+            stale = self._loaded - embedded
+            if stale:
+                self.index.remove(stale)
+                self._loaded -= stale
+            rows = self.archive.embeddings(self._model_key, embedded - self._loaded)
+            if rows:
+                self.index.add([passage_id for passage_id, _ in rows],
+                               np.stack([np.frombuffer(vector, dtype="<f4") for _, vector in rows]))
+                self._loaded.update(passage_id for passage_id, _ in rows)
+
+    def query_vectors(self, transcript, client):
+        """Embeddings of the transcript's query chunks, reused for the last few transcripts"""
+        key = transcript_key(transcript)
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+        queries = split_transcript(transcript, QUERY_CHUNK_TOKENS) or [transcript]
+        vectors = embed_texts(client, queries, self.model, self.dimensions)
+        with self._lock:
+            self._queries[key] = vectors
+            while len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return vectors
+
+    def retrieve(self, transcript, client, previous_meeting="", series=""):
+        """Earlier context for the MoM prompt: the best passages of the series' archive and previous_meeting.
+
+        Passages from the meeting archived for this same transcript are left
+        out, as are minutes filed under any other series. Without archived
+        history in the series (or without a series), previous_meeting is
+        returned as is and the API isn't called. Passages scoring below
+        min_score are dropped, so nothing is returned if none is relevant.
+        """
+        series = meeting_series({"series": series})
+        own_meeting = self.archive.meeting_id(transcript)
+        if not series or not self.archive.has_history(series, exclude=own_meeting):
+            return previous_meeting
+        pasted = minutes_passages(previous_meeting) if previous_meeting else []
+
+        with span("retrieval", step="index"):
+            self.sync(client, series)
+        with span("retrieval", step="search"):
+            query_vectors = self.query_vectors(transcript, client)
+
+            candidates = []  # (score, source order, position, text, tokens, source label)
+            hits = self.index.search(query_vectors, 2 * self.top_k, among=self.archive.series_passage_ids(series))
+            found = self.archive.passages(passage_id for passage_id, score in hits if score >= self.min_score)
+            for passage_id, score in hits:
+                passage = found.get(passage_id)
+                if passage is None or passage["meeting_id"] == own_meeting or passage["series"] != series:
+                    continue  # not relevant enough, replaced since it was indexed, or not this meeting's history
+                label = f"{passage['title']} ({datetime.fromtimestamp(passage['updated']):%Y-%m-%d})"
+                candidates.append((score, passage["updated"], passage["position"], passage["text"],
+                                   passage["tokens"], label))
+            if pasted:
+                pasted_vectors = embed_texts(client, pasted, self.model, self.dimensions)
+                scores = (VectorIndex.normalize(pasted_vectors) @ VectorIndex.normalize(query_vectors).T).max(axis=1)
+                for position, (text, score) in enumerate(zip(pasted, scores)):
+                    if score < self.min_score:
+                        continue
+                    # The summary given for this meeting sorts after everything archived
+                    candidates.append((float(score), float("inf"), position, text, count_tokens(text),
+                                       "Previous meeting summary"))
+
+        return self._pack(candidates)
+
+    def _pack(self, candidates):
+        """Best candidates that fit the budget, grouped by source in chronological order"""
+        chosen, used, labels = [], 0, set()
+        for candidate in sorted(candidates, key=lambda c: -c[0]):
+            if len(chosen) >= self.top_k:
+                break
+            label = candidate[5]
+            # A source's "From ...:" header is paid for with its first passage
+            tokens = candidate[4] + 1 + (count_tokens(f"From {label}:") + 2 if label not in labels else 0)
+            if used + tokens <= self.budget:
+                chosen.append(candidate)
+                labels.add(label)
+                used += tokens
+        sections = {}
+        for _, order, position, text, _, label in sorted(chosen, key=lambda c: (c[1], c[2])):
+            sections.setdefault(label, []).append(text)
+        return "\n\n".join(f"From {label}:\n" + "\n".join(texts) for label, texts in sections.items())
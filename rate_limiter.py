@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 units per second, up to one minute's worth.
+
+    reserve() always succeeds and returns how long the caller must wait before
+    using what it took; the level may go negative, which queues later callers
+    behind earlier ones instead of letting them race for the refill.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            # A single oversized request may take the whole bucket but never more
+            self.level -= min(amount, self.capacity)
+            return max(0.0, -self.level / self.rate)
+
+
+class KeyLimits:
+    """Request and token buckets, in-flight cap and shared back-off for one API key"""
+
+    def __init__(self, rpm, tpm, max_in_flight):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        # A 429 for one request means the key is over its limit for every request
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_time(self, tokens):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        return max(wait, self.paused_until - time.monotonic())
+
+
+class InFlightSlot:
+    """An in-flight slot kept after the call returned (e.g. while a stream is read); release() is idempotent"""
+
+    def __init__(self, semaphore):
+        self._semaphore = semaphore
+        self._held = True
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self._semaphore.release()
+
+
+def status_code(error):
+    """HTTP status of a provider error, if it carries one"""
+    for source in (error, getattr(error, "response", None)):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if isinstance(status, int):
+            return status
+    match = re.search(r"\b(?:HTTP Error|status(?: code)?:?)\s*(\d{3})\b", str(error))
+    return int(match.group(1)) if match else None
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-date values fall back to exponential backoff
+    return None
+
+
+class RequestScheduler:
+    """Throttles, caps and retries provider calls per API key.
+
+    Every call first takes a request and its estimated tokens from the key's
+    buckets (requests/min and tokens/min), then waits for one of the key's
+    in-flight slots. Rate limits, server errors and connection failures are
+    retried with jittered exponential backoff, or after Retry-After when the
+    server sends one; other errors are raised straight away. Calls whose
+    result keeps the connection busy (streams) can hold their slot until
+    they are done with it.
+    """
+
+    def __init__(self, name, rpm=0, tpm=0, max_in_flight=8, max_retries=5, base_delay=1.0,
+                 max_delay=60.0, retry_on=(ConnectionError, TimeoutError)):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self._limits = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+
+    def limits(self, api_key):
+        key = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = KeyLimits(self.rpm, self.tpm, self.max_in_flight)
+            return self._limits[key]
+
+    def retryable(self, error):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return False  # a 429 that no amount of waiting will fix
+        if isinstance(error, self.retry_on):
+            return True
+        return status_code(error) in RETRYABLE_STATUS
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def call(self, api_key, fn, tokens=0, hold=False):
+        """Run fn() under the key's limits, retrying transient failures.
+
+        With hold, returns (result, InFlightSlot): the slot stays taken until
+        the caller releases it.
+        """
+        limits = self.limits(api_key)
+        attempt = 0
+        while True:
+            wait = limits.wait_time(tokens)
+            if wait > 0:
+                self.throttled_seconds += wait
+                time.sleep(wait)
+            limits.in_flight.acquire()
+            self.calls += 1
+            try:
+                result = fn()
+            except Exception as e:
+                limits.in_flight.release()
+                if attempt >= self.max_retries or not self.retryable(e):
+                    raise
+                error = e
+            else:
+                if hold:
+                    return result, InFlightSlot(limits.in_flight)
+                limits.in_flight.release()
+                return result
+            delay = retry_after(error)
+            if delay is None:
+                delay = self.backoff(attempt)
+            else:
+                delay = min(delay, self.max_delay)
+            if status_code(error) == 429:
+                limits.pause(delay)
+            attempt += 1
+            self.retries += 1
+            logger.warning("%s request failed (%s); retry %d/%d in %.1fs",
+                           self.name, error, attempt, self.max_retries, delay)
+            time.sleep(delay)
+
+    def stats(self):
+        return {"calls": self.calls, "retries": self.retries, "throttled_seconds": self.throttled_seconds}
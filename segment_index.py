@@ -0,0 +1,75 @@
+import numpy as np
+
+from transcript import Transcript
+
+
+class SegmentIndex:
+    """Columnar, sorted view of transcript segments with binary-search range queries.
+
+    Start/end times live in NumPy arrays and the selectbox labels are built
+    once, so the Transcript tab never rescans the segment list on a rerun.
+    Texts stay in the (sorted) Transcript's shared buffer.
+    """
+
+    def __init__(self, segments, format_time):
+        transcript = Transcript.from_segments(segments)
+        starts = np.array(transcript.starts, dtype=np.float64)
+        if np.any(starts[1:] < starts[:-1]):
+            order = np.argsort(starts, kind="stable")
+            texts = transcript.texts()
+            transcript = Transcript(starts[order], np.array(transcript.ends)[order], (texts[i] for i in order))
+        self.transcript = transcript
+        self.starts = np.array(transcript.starts, dtype=np.float64)
+        self.ends = np.array(transcript.ends, dtype=np.float64)
+        # Running maximum keeps end times searchable even if segments overlap
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+        self._folded_texts = None
+
+        previews = [transcript.text(i)[:50] for i in range(len(transcript))]
+        self.start_labels = [f"{format_time(s)} - {t}..." for s, t in zip(self.starts, previews)]
+        self.end_labels = [f"{format_time(e)} - {t}..." for e, t in zip(self.ends, previews)]
+
+    def __len__(self):
+        return len(self.transcript)
+
+    def text(self, i):
+        return self.transcript.text(i)
+
+    @property
+    def duration(self):
+        return float(self.max_ends[-1]) if len(self) else 0.0
+
+    def first_end_after(self, start_time):
+        """Index of the first segment that ends after start_time"""
+        return int(np.searchsorted(self.max_ends, start_time, side="right"))
+
+    def select(self, start_time, end_time):
+        """Half-open index range of segments within [start_time, end_time]"""
+        lo = int(np.searchsorted(self.starts, start_time, side="left"))
+        hi = int(np.searchsorted(self.max_ends, end_time, side="right"))
+        return lo, max(lo, hi)
+
+    def position_at(self, t):
+        """Index of the segment playing at time t (or the last one starting before it)"""
+        return max(0, int(np.searchsorted(self.starts, t, side="right")) - 1)
+
+    def search(self, query, lo, hi):
+        """Positions in [lo, hi) whose text contains query (case-insensitive)"""
+        if self._folded_texts is None:
+            self._folded_texts = [text.casefold() for text in self.transcript.texts()]
+        query = query.casefold()
+        return [i for i in range(lo, hi) if query in self._folded_texts[i]]
+
+    def selection_text(self, lo, hi, format_time):
+        """Timestamped plain text for segments [lo, hi), as sent to the MoM prompt"""
+        return "\n\n".join(
+            f"[{format_time(self.starts[i])} - {format_time(self.ends[i])}] {self.text(i)}"
+            for i in range(lo, hi)
+        )
+
+    def segment(self, i):
+        return self.transcript[i]
+
+    def segments(self, lo, hi):
+        return self.transcript[lo:hi]
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from cache_store import DiskCache
+from transcript import Transcript
+
+
+class BlobRef:
+    """Small handle to a value in a BlobStore; session state keeps these instead of the value"""
+
+    __slots__ = ("key", "size")
+
+    def __init__(self, key, size):
+        self.key = key
+        self.size = size  # bytes of the serialized value
+
+    def __eq__(self, other):
+        return isinstance(other, BlobRef) and other.key == self.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"BlobRef({self.key[:12]}…, {self.size} bytes)"
+
+
+class _BlobFiles(DiskCache):
+    """DiskCache of already-encoded blobs"""
+
+    suffix = ".blob"
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, data):
+        return data
+
+
+def encode_blob(value):
+    """Transcripts in their binary format, anything else as compact JSON"""
+    if isinstance(value, Transcript):
+        return value.to_bytes()
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def decode_blob(data):
+    if Transcript.is_serialized(data):
+        return Transcript.from_bytes(data)
+    return json.loads(data)
+
+
+class BlobStore:
+    """Content-addressed store for large session values (transcripts, prompts, MoMs).
+
+    Values are kept as files named after the hash of their content, so
+    the same transcript open in several sessions is stored once. Recently
+    loaded values are shared through an in-memory LRU of at most memory_bytes;
+    everything else is read back from disk when a handle is next loaded.
+    Values served from memory still refresh their file's access time (at
+    most every touch_seconds), so disk eviction takes the coldest blobs.
+    Each put() holds its blob until release(); a blob nobody holds any more
+    is deleted right away instead of waiting for eviction.
+    """
+
+    def __init__(self, directory, max_bytes=1000 * 1024 * 1024, max_age=7 * 24 * 3600,
+                 memory_bytes=64 * 1024 * 1024, touch_seconds=60):
+        self.disk = _BlobFiles(directory, max_bytes=max_bytes, max_age=max_age)
+        self.memory_bytes = memory_bytes
+        self.touch_seconds = touch_seconds
+        self._memory = OrderedDict()  # key -> [value, size, last touched on disk]
+        self._memory_used = 0
+        self._holders = {}  # key -> puts not yet released
+        self._lock = threading.Lock()
+
+    def put(self, value):
+        """Store value (a Transcript or anything JSON-serializable) and return its handle, held until release()"""
+        data = encode_blob(value)
+        ref = BlobRef(hashlib.sha256(data).hexdigest(), len(data))
+        with self._lock:
+            self._holders[ref.key] = self._holders.get(ref.key, 0) + 1
+        if ref.key not in self.disk:
+            self.disk.put(ref.key, data)
+        self._remember(ref, value)
+        return ref
+
+    def release(self, ref):
+        """Give up a handle from put(); the blob is deleted once no put() of it is left unreleased"""
+        with self._lock:
+            holders = self._holders.get(ref.key, 0) - 1
+            if holders > 0:
+                self._holders[ref.key] = holders
+                return
+            if holders < 0:
+                return  # put before a restart, or released twice: left to eviction
+            del self._holders[ref.key]
+            entry = self._memory.pop(ref.key, None)
+            if entry is not None:
+                self._memory_used -= entry[1]
+            self.disk.delete(ref.key)
+
+    def get(self, ref, default=None):
+        """Value behind a handle (default if it was evicted from disk)"""
+        with self._lock:
+            entry = self._memory.get(ref.key)
+            if entry is not None:
+                self._memory.move_to_end(ref.key)
+                now = time.monotonic()
+                touch = now - entry[2] >= self.touch_seconds
+                if touch:
+                    entry[2] = now
+        if entry is not None:
+            if touch and not self.disk.touch(ref.key):
+                # Evicted from disk while in use: write it back
+                self.disk.put(ref.key, encode_blob(entry[0]))
+            return entry[0]
+        data = self.disk.get(ref.key)
+        if data is None:
+            return default
+        try:
+            value = decode_blob(data)
+        except ValueError:
+            return default
+        self._remember(ref, value)
+        return value
+
+    def load(self, value, default=None):
+        """Resolve value if it is a handle; anything else is returned as is"""
+        if isinstance(value, BlobRef):
+            return self.get(value, default)
+        return default if value is None else value
+
+    def _remember(self, ref, value):
+        if ref.size > self.memory_bytes:
+            return
+        with self._lock:
+            if ref.key in self._memory:
+                self._memory.move_to_end(ref.key)
+                return
+            self._memory[ref.key] = [value, ref.size, time.monotonic()]
+            self._memory_used += ref.size
+            while self._memory_used > self.memory_bytes:
+                _, (_, size, _) = self._memory.popitem(last=False)
+                self._memory_used -= size
+
+    def stats(self):
+        disk = self.disk.stats()
+        with self._lock:
+            return {
+                "entries": disk["entries"],
+                "disk_bytes": disk["bytes"],
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+            }
+
+
+# Objects reached through these modules belong to the process, not a session
+_SHARED_MODULES = ("threading", "concurrent.", "queue", "_thread", "socket", "httpx", "openai", "streamlit")
+
+
+def approx_size(value, _seen=None):
+    """Rough deep size in bytes of a session value (objects reached twice are counted once)"""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None), BlobRef)):
+        return size
+    if isinstance(value, Transcript):
+        return size + value.nbytes
+    if isinstance(value, dict):
+        children = [*value.keys(), *value.values()]
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        children = value
+    elif hasattr(value, "__dict__") and not callable(value) and \
+            not type(value).__module__.startswith(_SHARED_MODULES):
+        children = vars(value).values()
+    else:
+        return size  # NumPy arrays report their buffer in getsizeof
+    return size + sum(approx_size(child, seen) for child in children)
+
+
+class SessionRegistry:
+    """When each Streamlit session last ran, so idle ones can give memory back.
+
+    Streamlit keeps a session's state for as long as its browser tab is open.
+    Sessions idle for longer than idle_seconds lose the keys passed to
+    evict_idle (derived data and finished job handles, all rebuilt on demand);
+    payload handles stay, so nothing the user sees is lost. Sessions for which
+    alive(session_id) is False are dropped, so closed ones aren't kept alive.
+    """
+
+    def __init__(self, idle_seconds=30 * 60, check_seconds=60, alive=None):
+        self.idle_seconds = idle_seconds
+        self.check_seconds = check_seconds
+        self.alive = alive
+        self._sessions = {}  # session id -> [last run, session state, evicted]
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.evictions = 0
+
+    def touch(self, session_id, state):
+        with self._lock:
+            self._sessions[session_id] = [time.monotonic(), state, False]
+
+    def evict_idle(self, keys, release=None):
+        """Delete keys from sessions idle for too long (checked at most every check_seconds).
+
+        release(state) is called first for anything that needs more than a
+        delete. Returns how many sessions were evicted.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_check < self.check_seconds:
+                return 0
+            self._last_check = now
+            if self.alive is not None:
+                for session_id in [sid for sid in self._sessions if not self.alive(sid)]:
+                    del self._sessions[session_id]
+            idle = [entry for entry in self._sessions.values()
+                    if not entry[2] and now - entry[0] > self.idle_seconds]
+            for entry in idle:
+                entry[2] = True
+        for _, state, _ in idle:
+            try:
+                if release is not None:
+                    release(state)
+                for key in keys:
+                    if key in state:
+                        del state[key]
+            except Exception:
+                continue  # the session may be shutting down concurrently
+        self.evictions += len(idle)
+        return len(idle)
+
+    def stats(self):
+        """(session id, idle seconds, approximate bytes held, evicted) for every known session"""
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions.items())
+        rows = []
+        for session_id, (last_run, state, evicted) in sessions:
+            try:
+                size = approx_size(state.filtered_state)
+            except Exception:
+                size = 0
+            rows.append((session_id, now - last_run, size, evicted))
+        return rows
@@ -0,0 +1,105 @@
+import os
+
+# Local storage for caches and other on-disk state
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "500"))
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = int(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+COMPLETION_CACHE_MAX_MB = int(os.getenv("COMPLETION_CACHE_MAX_MB", "100"))
+COMPLETION_CACHE_MAX_AGE_DAYS = int(os.getenv("COMPLETION_CACHE_MAX_AGE_DAYS", "30"))
+
+# Long recordings are split into chunks and transcribed in parallel
+WHISPER_MAX_BYTES = int(os.getenv("MAX_FILE_SIZE_MB", "25")) * 1024 * 1024
+CHUNK_MINUTES = float(os.getenv("CHUNK_MINUTES", "10"))
+# Uploads are sent straight from memory; preprocessed payloads above this size are streamed from disk
+UPLOAD_SPILL_BYTES = int(os.getenv("UPLOAD_SPILL_MB", "64")) * 1024 * 1024
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "4"))
+JOURNAL_DIR = os.path.join(CACHE_DIR, "journals")
+JOURNAL_MAX_AGE_DAYS = int(os.getenv("JOURNAL_MAX_AGE_DAYS", "7"))
+
+# Uploads are downmixed to mono speech-rate audio and re-encoded before they leave the box
+PREPROCESS_OPTIONS = {
+    "enabled": os.getenv("PREPROCESS_AUDIO", "true").lower() == "true",
+    "sample_rate": int(os.getenv("PREPROCESS_SAMPLE_RATE", "16000")),
+    "fmt": os.getenv("PREPROCESS_FORMAT", "mp3"),
+    "bitrate": os.getenv("PREPROCESS_BITRATE", "32k"),
+    "trim": os.getenv("TRIM_SILENCE", "true").lower() == "true"
+}
+# Silence trimming only cuts frames below an absolute level that are also well under the speech level
+VAD_OPTIONS = {
+    "silence_dbfs": float(os.getenv("VAD_SILENCE_DBFS", "-50")),
+    "margin_db": float(os.getenv("VAD_MARGIN_DB", "12")),
+    "speech_range_db": float(os.getenv("VAD_SPEECH_RANGE_DB", "30")),
+    "min_silence_ms": int(os.getenv("VAD_MIN_SILENCE_MS", "1000")),
+    "padding_ms": int(os.getenv("VAD_PADDING_MS", "250"))
+}
+
+# Transcripts that don't fit the model are summarized in windows of this size first (map-reduce)
+MOM_WINDOW_TOKENS = int(os.getenv("MOM_WINDOW_TOKENS", "6000"))
+MOM_NOTES_MAX_TOKENS = int(os.getenv("MOM_NOTES_MAX_TOKENS", "800"))
+MOM_WORKERS = int(os.getenv("MOM_WORKERS", "4"))
+MOM_MAX_TOKENS = int(os.getenv("MOM_MAX_TOKENS", "2000"))
+# Requests that don't fit the chosen model may move to a larger-context one before anything is trimmed
+MOM_ALLOW_ESCALATION = os.getenv("MOM_ALLOW_ESCALATION", "true").lower() == "true"
+# A pasted previous meeting summary is cut to this size so it never crowds out the transcript
+MOM_PREVIOUS_MEETING_TOKENS = int(os.getenv("MOM_PREVIOUS_MEETING_TOKENS", "1500"))
+
+# Shared API clients: one keep-alive connection pool per API key
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT_SECONDS", "600"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT_SECONDS", "10"))
+API_KEEPALIVE_SECONDS = float(os.getenv("API_KEEPALIVE_SECONDS", "60"))
+API_MAX_CLIENTS = int(os.getenv("API_MAX_CLIENTS", "64"))
+
+# Per-key request scheduling: rate limits (0 = unlimited), in-flight cap and retries
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+DEEPGRAM_RPM = int(os.getenv("DEEPGRAM_RPM", "0"))
+API_MAX_IN_FLIGHT = int(os.getenv("API_MAX_IN_FLIGHT", "8"))
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "5"))
+API_BACKOFF_SECONDS = float(os.getenv("API_BACKOFF_SECONDS", "1"))
+API_BACKOFF_MAX_SECONDS = float(os.getenv("API_BACKOFF_MAX_SECONDS", "60"))
+
+# Live recording is transcribed in rolling windows while the meeting runs
+# (LIVE_TRANSCRIPTION_PROVIDER=fake uses a local stand-in instead of the API)
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "20"))
+LIVE_WORKERS = int(os.getenv("LIVE_WORKERS", "2"))
+LIVE_PROVIDER = os.getenv("LIVE_TRANSCRIPTION_PROVIDER", "")
+
+# Background jobs (transcription and generation) run on a shared worker pool
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Large session values (transcripts, prompts, MoMs) are kept in a content-addressed store on disk;
+# sessions only hold handles, and recently used values are shared through a bounded memory cache
+BLOB_DIR = os.path.join(CACHE_DIR, "blobs")
+BLOB_MAX_MB = int(os.getenv("BLOB_MAX_MB", "1000"))
+BLOB_MAX_AGE_DAYS = int(os.getenv("BLOB_MAX_AGE_DAYS", "7"))
+BLOB_MEMORY_MB = int(os.getenv("BLOB_MEMORY_MB", "64"))
+# Sessions idle this long give back derived data and finished job results
+SESSION_IDLE_MINUTES = float(os.getenv("SESSION_IDLE_MINUTES", "30"))
+
+# Generated minutes, with their transcript and configuration, are archived in SQLite for search and reuse
+ARCHIVE_MEETINGS = os.getenv("ARCHIVE_MEETINGS", "true").lower() == "true"
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", os.path.join(CACHE_DIR, "meetings.db"))
+
+# Earlier minutes of the same meeting series are embedded into a local vector index; only passages at
+# least PRIOR_CONTEXT_MIN_SCORE similar to the transcript go into the prompt, within PRIOR_CONTEXT_TOKENS
+# (EMBEDDING_DIMENSIONS=0 keeps the model's size)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+PRIOR_CONTEXT_TOKENS = int(os.getenv("PRIOR_CONTEXT_TOKENS", "800"))
+PRIOR_CONTEXT_TOP_K = int(os.getenv("PRIOR_CONTEXT_TOP_K", "12"))
+PRIOR_CONTEXT_MIN_SCORE = float(os.getenv("PRIOR_CONTEXT_MIN_SCORE", "0.3"))
+
+# Stage timing spans kept in memory for the diagnostics panel and its exports
+METRICS_MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "2000"))
+
+# Provider request options (also part of the transcript cache key)
+WHISPER_OPTIONS = {
+    "model": "whisper-1",
+    "response_format": "verbose_json",
+    "timestamp_granularities": ["segment"]
+}
+DEEPGRAM_OPTIONS = {
+    "punctuate": True,
+    "paragraphs": True
+}
@@ -0,0 +1,22 @@
+import gc
+
+from api_clients import ClientRegistry, _make_openai_client
+
+
+def test_evicted_client_keeps_working_for_its_holder():
+    registry = ClientRegistry(_make_openai_client, max_clients=1)
+    in_use = registry.get("sk-first")
+    registry.get("sk-second")
+    assert len(registry) == 1
+    assert not in_use._client.is_closed
+    assert registry.get("sk-first") is not in_use
+
+
+def test_pool_closes_once_the_last_user_lets_go():
+    registry = ClientRegistry(_make_openai_client, max_clients=1)
+    client = registry.get("sk-first")
+    pool = client._client
+    registry.get("sk-second")
+    del client
+    gc.collect()
+    assert pool.is_closed
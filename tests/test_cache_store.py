@@ -0,0 +1,37 @@
+import json
+import os
+import time
+
+from cache_store import TranscriptCache
+
+SEGMENTS = [{"start_time": 0.0, "end_time": 2.5, "text": "Hello"},
+            {"start_time": 2.5, "end_time": 4.0, "text": "there"}]
+
+
+def write_legacy(directory, key, segments=SEGMENTS, age=0):
+    path = os.path.join(directory, f"{key}.json")
+    with open(path, "w") as f:
+        json.dump(segments, f)
+    os.utime(path, (time.time() - age, time.time() - age))
+    return path
+
+
+def test_legacy_entry_is_converted_on_hit(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    legacy = write_legacy(str(tmp_path), "abc")
+    transcript = cache.get("abc")
+    assert [s["text"] for s in transcript] == ["Hello", "there"]
+    assert not os.path.exists(legacy)
+    assert os.path.exists(tmp_path / "abc.transcript")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 0
+
+
+def test_legacy_entries_are_evicted(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_age=3600)
+    legacy = write_legacy(str(tmp_path), "old", age=7200)
+    assert cache.get("old") is None
+    assert cache.stats()["entries"] == 1
+    cache.put("new", SEGMENTS)
+    assert not os.path.exists(legacy)
+    cache.clear()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+
+from live_transcription import FakeTranscriber, LiveTranscriber
+
+RATE = 16000
+
+
+def speech(seconds, seed):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * RATE)) * 3000).astype(np.int16)
+
+
+def feed(live, samples, frame=320):
+    for start in range(0, len(samples), frame):
+        live.add_pcm(samples[start:start + frame].tobytes(), RATE, 1)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_segments_arrive_while_recording_and_finish_completes_them():
+    fake = FakeTranscriber()
+    live = LiveTranscriber(fake, window_seconds=2, search_seconds=1, max_workers=2)
+    feed(live, speech(7, 1))
+    # Windows are transcribed while audio is still coming in
+    assert wait_for(lambda: len(live.segments) >= 2)
+    assert not live.stopped
+    early = len(live.segments)
+
+    feed(live, speech(1.5, 2))
+    transcript = live.finish()
+    assert live.stopped and not live.errors
+    assert len(transcript) > early
+    assert fake.calls == len(transcript)
+    starts = [segment["start_time"] for segment in transcript]
+    assert starts == sorted(starts) and starts[0] == 0.0
+    assert abs(transcript[-1]["end_time"] - 8.5) < 0.1
+    assert transcript[0]["text"].startswith("[live_0000.wav]")
+
+
+def test_audio_after_stop_is_ignored():
+    live = LiveTranscriber(FakeTranscriber(), window_seconds=2, search_seconds=1)
+    feed(live, speech(1, 3))
+    live.stop()
+    feed(live, speech(5, 4))
+    assert len(live.finish()) == 1
+    assert abs(live.duration - 1.0) < 0.05
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from llm_streaming import CompletionStream
+from rate_limiter import RequestScheduler
+
+
+def chunks(*texts):
+    for text in texts:
+        yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def open_stream(scheduler, *texts):
+    response, slot = scheduler.call("sk-test", lambda: chunks(*texts), hold=True)
+    return CompletionStream(response, slot=slot)
+
+
+def free_slots(scheduler):
+    return scheduler.limits("sk-test").in_flight._value
+
+
+def test_slot_is_held_until_the_stream_is_exhausted():
+    scheduler = RequestScheduler("test", max_in_flight=2)
+    stream = open_stream(scheduler, "Hello", " world")
+    assert free_slots(scheduler) == 1
+    assert "".join(stream) == "Hello world"
+    assert free_slots(scheduler) == 2
+
+
+def test_slot_is_released_once_when_closed_early():
+    scheduler = RequestScheduler("test", max_in_flight=2)
+    stream = open_stream(scheduler, "Hello", " world")
+    next(iter(stream))
+    stream.close()
+    stream.close()
+    assert free_slots(scheduler) == 2
+    assert stream.cancelled
+
+
+def test_plain_calls_release_their_slot():
+    scheduler = RequestScheduler("test", max_in_flight=1)
+    assert scheduler.call("sk-test", lambda: 42) == 42
+    assert free_slots(scheduler) == 1
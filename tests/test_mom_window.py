@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pipeline
+from mom_summarizer import condense_transcript
+from token_budget import count_tokens
+
+
+def transcript(minutes):
+    return "\n\n".join(f"[{m:02d}:00] Speaker {m % 3}: we went over item {m} of the plan in some detail today."
+                     for m in range(minutes))
+
+
+class FakeClient:
+    """Records chat requests and answers each with a short note"""
+
+    def __init__(self):
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, **kwargs):
+        self.models.append(model)
+        message = SimpleNamespace(content="- short note")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def test_window_is_the_models_room():
+    _, max_tokens, build_prompt, parts = pipeline.mom_request_parts("", {"model": "gpt-4-turbo"})
+    assert pipeline.mom_window_tokens("gpt-4-turbo", max_tokens, build_prompt, parts) > 100000
+
+
+def test_transcript_that_fits_is_not_condensed():
+    text = transcript(600)
+    assert count_tokens(text) > pipeline.MOM_WINDOW_TOKENS
+    client = FakeClient()
+    assert pipeline.condense_for_mom(text, client, use_cache=False, target_tokens=100000,
+                                     model="gpt-4-turbo") == text
+    assert client.models == []
+
+
+def test_map_step_uses_the_chosen_model():
+    client = FakeClient()
+    condensed = pipeline.condense_for_mom(transcript(600), client, use_cache=False, target_tokens=5000,
+                                          model="gpt-4-turbo")
+    assert client.models and set(client.models) == {"gpt-4-turbo"}
+    assert count_tokens(condensed) <= 5000
+
+
+def test_small_target_splits_into_small_windows():
+    calls = []
+
+    def summarize(prompt):
+        calls.append(prompt)
+        return "- note"
+
+    condensed = condense_transcript(transcript(100), summarize, window_tokens=6000, target_tokens=500)
+    assert len(calls) > 1
+    assert count_tokens(condensed) <= 500
+
+
+def test_escalation_keeps_long_transcripts_whole():
+    text = transcript(1500)
+    config = {"model": "gpt-3.5-turbo", "allow_escalation": True}
+    preview = pipeline.preview_mom_budget(text, config)
+    assert not preview["condense"]
+    assert preview["plan"].model == "gpt-4-turbo"
+    assert pipeline.preview_mom_budget(text, dict(config, allow_escalation=False))["condense"]
+
+
+def test_long_previous_meeting_keeps_its_own_budget():
+    previous = "Earlier we agreed on the rollout plan and the budget. " * 2000
+    preview = pipeline.preview_mom_budget(transcript(300), {"model": "gpt-4", "previous_meeting": previous})
+    assert preview["parts"]["previous_meeting"] <= pipeline.MOM_PREVIOUS_MEETING_TOKENS + 20
+    assert preview["window_tokens"] > 4000
+    assert preview["plan"].notes[0].startswith("✂️ Trimmed previous meeting")
+
+
+def test_preview_counts_what_retrieval_may_add():
+    config = {"model": "gpt-4", "retrieve_prior": True, "series": "Weekly sync"}
+    preview = pipeline.preview_mom_budget(transcript(50), config)
+    assert preview["parts"]["previous_meeting"] >= pipeline.PRIOR_CONTEXT_TOKENS - 20
+    assert pipeline.preview_mom_budget(transcript(50), dict(config, series=""))["parts"]["previous_meeting"] == 0
+
+
+class FixedRetriever:
+    def __init__(self, result):
+        self.result = result
+
+    def retrieve(self, transcript, client, previous_meeting="", series=""):
+        return self.result
+
+
+def test_pasted_summary_keeps_its_budget_when_retrieval_finds_nothing():
+    previous = "Earlier we agreed on the rollout plan and the budget. " * 200
+    config = {"model": "gpt-4-turbo", "previous_meeting": previous, "retrieve_prior": True, "series": "Sync"}
+    _, plan, _ = pipeline.prepare_mom_request(transcript(20), config, FakeClient(), use_cache=False,
+                                              retriever=FixedRetriever(""))
+    assert plan.parts["previous_meeting"] > pipeline.PRIOR_CONTEXT_TOKENS
+    preview = pipeline.preview_mom_budget(transcript(20), config)
+    assert preview["parts"]["previous_meeting"] == plan.parts["previous_meeting"]
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.mock_servers import hashed_embedding
+from meeting_archive import MeetingArchive
+from prior_context import PriorContextRetriever
+from vector_index import VectorIndex
+
+BUDGET_MINUTES = ("## Decisions\n- The vendor budget was approved at 40k\n"
+                  "## Action Items\n- Alice signs the vendor contract")
+HIRING_MINUTES = "## Decisions\n- Two backend engineers will be hired\n## Action Items\n- Bob posts the job ads"
+
+
+class FakeClient:
+    """Answers embedding requests with hashed bag-of-words vectors and counts them"""
+
+    def __init__(self):
+        self.requests = 0
+        self.texts = []
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, model, input, dimensions=None):
+        self.requests += 1
+        self.texts += input
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=hashed_embedding(text, dimensions))
+                                     for i, text in enumerate(input)])
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = MeetingArchive(str(tmp_path / "meetings.db"))
+    archive.save("first budget meeting", {"goal": "Budget review", "series": "Finance sync"}, BUDGET_MINUTES)
+    archive.save("hiring meeting", {"goal": "Hiring plan", "series": "Hiring"}, HIRING_MINUTES)
+    yield archive
+    archive.close()
+
+
+def test_only_the_same_series_is_searched(archive):
+    client = FakeClient()
+    retriever = PriorContextRetriever(archive, min_score=0.0)
+    context = retriever.retrieve("The vendor budget and the hiring of engineers", client, series="finance  Sync")
+    assert "vendor budget" in context
+    assert "engineers" not in context
+
+
+def test_other_series_are_never_embedded(archive):
+    client = FakeClient()
+    PriorContextRetriever(archive, min_score=0.0).retrieve("The vendor budget", client, series="Finance sync")
+    assert any("vendor budget" in text for text in client.texts)
+    assert not any("Bob" in text for text in client.texts)
+
+
+def test_no_series_or_history_costs_nothing(archive):
+    client = FakeClient()
+    retriever = PriorContextRetriever(archive)
+    assert retriever.retrieve("The vendor budget", client, "pasted summary") == "pasted summary"
+    assert retriever.retrieve("The vendor budget", client, "pasted summary", series="Design review") == \
+        "pasted summary"
+    assert client.requests == 0
+
+
+def test_nothing_relevant_returns_nothing(archive):
+    client = FakeClient()
+    retriever = PriorContextRetriever(archive, min_score=0.3)
+    assert retriever.retrieve("Quarterly offsite logistics and catering", client, series="Finance sync") == ""
+
+
+def test_query_embeddings_are_reused(archive):
+    client = FakeClient()
+    retriever = PriorContextRetriever(archive, min_score=0.0)
+    retriever.retrieve("The vendor budget", client, series="Finance sync")
+    requests = client.requests
+    retriever.retrieve("The vendor budget", client, series="Finance sync")
+    assert client.requests == requests
+
+
+def test_refined_minutes_only_embed_what_changed(archive):
+    client = FakeClient()
+    retriever = PriorContextRetriever(archive, min_score=0.0)
+    retriever.retrieve("The vendor budget", client, series="Finance sync")
+    meeting_id = archive.meeting_id("first budget meeting")
+    client.texts.clear()
+    archive.update_minutes(meeting_id, BUDGET_MINUTES.replace("Alice", "Carol"))
+    retriever.retrieve("The vendor budget", client, series="Finance sync")
+    assert [text for text in client.texts if "Decisions" in text or "Action" in text] == \
+        ["## Action Items\n- Carol signs the vendor contract"]
+    assert len(retriever.index) == len(archive.embedded_ids(retriever._model_key))
+
+
+def test_index_rows_can_be_removed():
+    index = VectorIndex(2)
+    index.add([1, 2, 3], np.array([[1, 0], [0, 1], [1, 1]], dtype=np.float32))
+    index.remove([2, 7])
+    assert len(index) == 2
+    assert [passage_id for passage_id, _ in index.search([[0, 1]], 5)] == [3, 1]
@@ -0,0 +1,42 @@
+import os
+import time
+
+from session_store import BlobStore
+
+
+def blob_path(store, ref):
+    return store.disk._path(ref.key)
+
+
+def test_memory_hits_keep_the_blob_warm_on_disk(tmp_path):
+    store = BlobStore(str(tmp_path), touch_seconds=0)
+    ref = store.put({"text": "hot"})
+    os.utime(blob_path(store, ref), (time.time() - 3600, time.time() - 3600))
+    assert store.get(ref) == {"text": "hot"}
+    assert time.time() - os.path.getmtime(blob_path(store, ref)) < 60
+
+
+def test_memory_hit_writes_back_an_evicted_blob(tmp_path):
+    store = BlobStore(str(tmp_path), touch_seconds=0)
+    ref = store.put({"text": "hot"})
+    os.unlink(blob_path(store, ref))
+    assert store.get(ref) == {"text": "hot"}
+    assert os.path.exists(blob_path(store, ref))
+
+
+def test_released_blobs_are_deleted(tmp_path):
+    store = BlobStore(str(tmp_path))
+    ref = store.put("first selection")
+    store.release(ref)
+    assert not os.path.exists(blob_path(store, ref))
+    assert store.get(ref) is None
+
+
+def test_shared_blobs_stay_until_every_holder_releases(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first, second = store.put("same transcript"), store.put("same transcript")
+    assert first == second
+    store.release(first)
+    assert store.get(second) == "same transcript"
+    store.release(second)
+    assert store.get(second) is None
@@ -0,0 +1,18 @@
+import token_budget
+from token_budget import count_tokens, estimate_tokens
+
+
+def test_counts_are_memoized_by_digest():
+    text = "A long transcript line about the vendor budget. " * 5000
+    first = count_tokens(text)
+    assert count_tokens(text) == first
+    assert all(len(digest) == 16 for digest, _ in token_budget._counts)
+
+
+def test_count_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(token_budget, "COUNT_CACHE_SIZE", 8)
+    for n in range(50):
+        count_tokens(f"line {n}")
+    assert len(token_budget._counts) <= 8
+    assert count_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 11
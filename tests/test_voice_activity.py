@@ -0,0 +1,62 @@
+import numpy as np
+from pydub import AudioSegment
+
+from voice_activity import detect_speech, frame_energy_db, trim_silence
+
+RATE = 16000
+
+
+def signal(seconds, dbfs, seed=0):
+    """Noise at roughly dbfs (RMS), as int16 samples"""
+    rng = np.random.default_rng(seed)
+    rms = 32768 * 10 ** (dbfs / 20)
+    return np.clip(rng.standard_normal(int(seconds * RATE)) * rms, -32768, 32767).astype(np.int16)
+
+
+def segment(*parts):
+    return AudioSegment(data=np.concatenate(parts).tobytes(), sample_width=2, frame_rate=RATE, channels=1)
+
+
+def test_quiet_speaker_is_kept():
+    # Loud speaker, a real pause, then a second speaker 14 dB quieter
+    audio = segment(signal(40, -20, 1), signal(5, -75, 2), signal(15, -34, 3))
+    trimmed, offset_map = trim_silence(audio)
+    assert offset_map is not None
+    assert 54.0 <= len(trimmed) / 1000 <= 56.0
+    assert offset_map.to_original(trimmed.duration_seconds - 1) > 58.0
+
+
+def test_quiet_speaker_regions():
+    samples = np.concatenate((signal(40, -20, 1), signal(5, -75, 2), signal(15, -34, 3)))
+    regions = detect_speech(samples, RATE, full_scale=32768.0)
+    assert len(regions) == 2
+    assert regions[1][0] < 45.5 and regions[1][1] > 59.5
+
+
+def test_continuous_speech_is_untouched():
+    audio = segment(signal(30, -22, 4), signal(30, -38, 5))
+    trimmed, offset_map = trim_silence(audio)
+    assert offset_map is None
+    assert trimmed is audio
+
+
+def test_pure_silence_is_untouched():
+    audio = segment(np.zeros(10 * RATE, dtype=np.int16))
+    assert detect_speech(np.zeros(10 * RATE, dtype=np.int16), RATE, full_scale=32768.0) == []
+    trimmed, offset_map = trim_silence(audio)
+    assert offset_map is None
+    assert trimmed is audio
+
+
+def test_energy_is_the_same_in_blocks():
+    samples = signal(20, -30, 6)
+    whole = frame_energy_db(samples, 480, full_scale=32768.0, block_frames=10 ** 6)
+    blocks = frame_energy_db(samples, 480, full_scale=32768.0, block_frames=7)
+    assert np.allclose(whole, blocks)
+
+
+def test_stereo_is_downmixed():
+    mono = signal(10, -25, 7)
+    stereo = np.repeat(mono, 2)
+    assert np.allclose(frame_energy_db(stereo, 480, channels=2, full_scale=32768.0),
+                       frame_energy_db(mono, 480, full_scale=32768.0))
@@ -0,0 +1,202 @@
+"""Local token counting and per-model context budgeting for chat requests.
+
+Counts use tiktoken when it is installed and its encoding can be loaded;
+otherwise they fall back to a ~4 characters per token estimate.
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:  # optional: counts fall back to the estimate
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# Context window and maximum completion tokens per model
+MODEL_LIMITS = {
+    "gpt-3.5-turbo": {"context": 16385, "output": 4096},
+    "gpt-4": {"context": 8192, "output": 8192},
+    "gpt-4-turbo": {"context": 128000, "output": 4096},
+}
+
+# Larger-context model to switch to when a request doesn't fit
+ESCALATIONS = {
+    "gpt-3.5-turbo": "gpt-4-turbo",
+    "gpt-4": "gpt-4-turbo",
+}
+
+# Chat formatting overhead: tokens per message and for priming the reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+TRIM_MARKER = "\n\n[... trimmed to fit the model's context window ...]"
+
+# Token counts remembered per (text digest, model); keys stay small however long the text
+COUNT_CACHE_SIZE = 4096
+_counts = OrderedDict()
+_counts_lock = threading.Lock()
+
+
+class BudgetError(ValueError):
+    """Raised when a request cannot be made to fit the model's context window"""
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The encoding files are downloaded on first use; offline we estimate
+        return None
+
+
+def exact_counts(model=DEFAULT_MODEL):
+    """True if counts for this model come from the real tokenizer"""
+    return _encoding(model) is not None
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    """Tokens in text for this model (memoized by digest: transcripts are recounted on every rerun)"""
+    if not text:
+        return 0
+    key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), model)
+    with _counts_lock:
+        count = _counts.get(key)
+        if count is not None:
+            _counts.move_to_end(key)
+            return count
+    encoding = _encoding(model)
+    if encoding is None:
+        count = estimate_tokens(text)
+    else:
+        count = len(encoding.encode(text, disallowed_special=()))
+    with _counts_lock:
+        _counts[key] = count
+        while len(_counts) > COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    return count
+
+
+def message_tokens(messages, model=DEFAULT_MODEL):
+    """Prompt tokens of a chat request's messages"""
+    return sum(count_tokens(m["content"], model) + TOKENS_PER_MESSAGE for m in messages) + TOKENS_PER_REPLY
+
+
+def trim_to_tokens(text, tokens, model=DEFAULT_MODEL):
+    """Keep the beginning of text, at most `tokens` tokens including the trim marker"""
+    if count_tokens(text, model) <= tokens:
+        return text
+    keep = max(0, tokens - count_tokens(TRIM_MARKER, model))
+    encoding = _encoding(model)
+    if encoding is None:
+        head = text[:keep * 4]
+    else:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+    return head.rstrip() + TRIM_MARKER if keep else ""
+
+
+def context_limit(model):
+    return MODEL_LIMITS.get(model, MODEL_LIMITS[DEFAULT_MODEL])["context"]
+
+
+def output_limit(model):
+    return MODEL_LIMITS.get(model, MODEL_LIMITS[DEFAULT_MODEL])["output"]
+
+
+class BudgetPlan:
+    """How a request was fitted: final model, completion budget, prompt size and what was cut"""
+
+    def __init__(self, requested_model, model, max_tokens, prompt_tokens, parts, trimmed, notes):
+        self.requested_model = requested_model
+        self.model = model
+        self.max_tokens = max_tokens
+        self.prompt_tokens = prompt_tokens
+        self.parts = parts  # tokens per prompt part, after trimming
+        self.trimmed = trimmed  # part -> tokens before trimming
+        self.notes = notes
+
+    @property
+    def context_limit(self):
+        return context_limit(self.model)
+
+    @property
+    def escalated(self):
+        return self.model != self.requested_model
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.max_tokens
+
+
+def fit_prompt(parts, build_prompt, model, max_tokens, system, trim_order=(), allow_escalation=True):
+    """Fit build_prompt(**parts) plus max_tokens of output into the model's context window.
+
+    The requested model is used if the request fits. Otherwise the request is
+    moved to the model's larger-context escalation (if allowed), and only then
+    are parts trimmed, in trim_order, just enough to fit. Raises BudgetError
+    if even that isn't enough. Returns (prompt, BudgetPlan).
+    """
+    parts = dict(parts)
+    notes = []
+
+    def measure(model):
+        prompt = build_prompt(**parts)
+        messages = [{"content": system}, {"content": prompt}]
+        return prompt, message_tokens(messages, model)
+
+    candidates = [model]
+    if allow_escalation and model in ESCALATIONS:
+        candidates.append(ESCALATIONS[model])
+
+    for candidate in candidates:
+        out = min(max_tokens, output_limit(candidate))
+        prompt, prompt_tokens = measure(candidate)
+        if prompt_tokens + out <= context_limit(candidate):
+            break
+    else:
+        # Trim against the largest model we are allowed to use
+        trimmed = {}
+        for name in trim_order:
+            over = prompt_tokens + out - context_limit(candidate)
+            if over <= 0:
+                break
+            before = count_tokens(parts[name], candidate)
+            if not before:
+                continue
+            parts[name] = trim_to_tokens(parts[name], max(0, before - over), candidate)
+            trimmed[name] = before
+            prompt, prompt_tokens = measure(candidate)
+        if prompt_tokens + out > context_limit(candidate):
+            raise BudgetError(
+                f"The request needs {prompt_tokens} prompt tokens plus {out} for the response, "
+                f"more than {candidate}'s {context_limit(candidate)}-token context window"
+            )
+        for name, before in trimmed.items():
+            notes.append(f"✂️ Trimmed {name.replace('_', ' ')} from {before} to "
+                         f"{count_tokens(parts[name], candidate)} tokens to fit {candidate}")
+        return prompt, _plan(model, candidate, out, prompt_tokens, parts, trimmed, notes, max_tokens)
+
+    return prompt, _plan(model, candidate, out, prompt_tokens, parts, {}, notes, max_tokens)
+
+
+def _plan(requested, model, out, prompt_tokens, parts, trimmed, notes, max_tokens):
+    if model != requested:
+        notes.insert(0, f"⬆️ Switched from {requested} to {model} ({context_limit(model)}-token context) "
+                        f"because the request needs {prompt_tokens + out} tokens")
+    if out < max_tokens:
+        notes.append(f"📏 Response length capped at {out} tokens, the most {model} can return")
+    counts = {name: count_tokens(text, model) for name, text in parts.items()}
+    return BudgetPlan(requested, model, out, prompt_tokens, counts, trimmed, notes)
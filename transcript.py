@@ -0,0 +1,206 @@
+import struct
+import sys
+from array import array
+
+# Binary layout: header, start times, end times, text offsets, UTF-8 text
+_MAGIC = b"MOMT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBxxxQQ")  # magic, version, segment count, text length in bytes
+
+
+def _le(values):
+    """values in little-endian byte order (arrays are native order in memory)"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class Transcript:
+    """Compact, immutable transcript: parallel timestamp arrays plus one text buffer.
+
+    A list of {"start_time", "end_time", "text"} dicts costs a few hundred
+    bytes of object overhead per segment; here start/end times are packed
+    doubles and every segment's text is a slice of one contiguous UTF-8
+    buffer, so a multi-hour transcript is little more than its text. It still
+    behaves like the old list for reading: len(), indexing and iteration give
+    segment dicts, and slicing gives another Transcript.
+
+    to_bytes()/from_bytes() are a binary format that loads without parsing
+    anything per segment, used by the transcript cache and the blob store.
+    """
+
+    __slots__ = ("starts", "ends", "_offsets", "_text")
+
+    def __init__(self, starts=(), ends=(), texts=()):
+        self.starts = array("d", starts)
+        self.ends = array("d", ends)
+        self._offsets = array("q", [0])
+        parts = []
+        position = 0
+        for text in texts:
+            text = text.encode("utf-8")
+            parts.append(text)
+            position += len(text)
+            self._offsets.append(position)
+        self._text = b"".join(parts)
+        if not len(self.starts) == len(self.ends) == len(self._offsets) - 1:
+            raise ValueError("starts, ends and texts must have the same length")
+
+    @classmethod
+    def _from_parts(cls, starts, ends, offsets, text):
+        transcript = cls.__new__(cls)
+        transcript.starts = starts
+        transcript.ends = ends
+        transcript._offsets = offsets
+        transcript._text = text
+        return transcript
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build from segment dicts (a Transcript is returned as is)"""
+        if isinstance(segments, cls):
+            return segments
+        segments = list(segments)
+        return cls(
+            (s["start_time"] for s in segments),
+            (s["end_time"] for s in segments),
+            (s["text"] for s in segments)
+        )
+
+    @classmethod
+    def from_whisper(cls, response):
+        """Build from a Whisper verbose_json response"""
+        segments = getattr(response, "segments", None)
+        if not segments:
+            # No segment timestamps: one segment for the entire transcript
+            return cls([0.0], [getattr(response, "duration", 0) or 0], [response.text])
+        # Older SDKs return plain dicts, newer ones TranscriptionSegment objects
+        rows = [(s["start"], s["end"], s["text"]) if isinstance(s, dict) else (s.start, s.end, s.text)
+                for s in segments]
+        return cls((r[0] for r in rows), (r[1] for r in rows), (r[2].strip() for r in rows))
+
+    @classmethod
+    def from_deepgram(cls, response):
+        """Build from a Deepgram prerecorded response (one segment per paragraph)"""
+        paragraphs = response["results"]["channels"][0]["alternatives"][0]["paragraphs"]["paragraphs"]
+        return cls(
+            (p["start"] for p in paragraphs),
+            (p["end"] for p in paragraphs),
+            (p["sentences"][0]["text"] for p in paragraphs)
+        )
+
+    @classmethod
+    def concat(cls, transcripts):
+        """One transcript with the segments of each part, in order"""
+        transcripts = [cls.from_segments(t) for t in transcripts]
+        starts, ends, offsets = array("d"), array("d"), array("q", [0])
+        for t in transcripts:
+            starts.extend(t.starts)
+            ends.extend(t.ends)
+            shift = offsets[-1]
+            offsets.extend(offset + shift for offset in t._offsets[1:])
+        return cls._from_parts(starts, ends, offsets, b"".join(t._text for t in transcripts))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def texts(self):
+        offsets, text = self._offsets, self._text
+        return [text[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(self))]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                return Transcript.from_segments(self.to_segments()[i])
+            hi = max(lo, hi)
+            base = self._offsets[lo]
+            return Transcript._from_parts(
+                self.starts[lo:hi], self.ends[lo:hi],
+                array("q", (offset - base for offset in self._offsets[lo:hi + 1])),
+                self._text[base:self._offsets[hi]]
+            )
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("transcript index out of range")
+        return {"start_time": self.starts[i], "end_time": self.ends[i], "text": self.text(i)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield {"start_time": self.starts[i], "end_time": self.ends[i], "text": self.text(i)}
+
+    def __add__(self, other):
+        return Transcript.concat([self, other])
+
+    def __eq__(self, other):
+        if isinstance(other, Transcript):
+            return (self.starts == other.starts and self.ends == other.ends
+                    and self._offsets == other._offsets and self._text == other._text)
+        if isinstance(other, list):
+            return self.to_segments() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Transcript({len(self)} segments, {len(self._text)} bytes of text)"
+
+    def to_segments(self):
+        """Plain segment dicts, e.g. for JSON export"""
+        return list(self)
+
+    def shifted(self, offset):
+        """Copy with every timestamp moved by offset seconds"""
+        return self.with_times((t + offset for t in self.starts), (t + offset for t in self.ends))
+
+    def with_times(self, starts, ends):
+        """Copy with new start/end times for the same texts"""
+        transcript = Transcript._from_parts(array("d", starts), array("d", ends), self._offsets, self._text)
+        if not len(transcript.starts) == len(transcript.ends) == len(self):
+            raise ValueError("starts and ends must have one entry per segment")
+        return transcript
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the transcript"""
+        return (sys.getsizeof(self._text) + self.starts.itemsize * (len(self.starts) + len(self.ends))
+                + self._offsets.itemsize * len(self._offsets))
+
+    def to_bytes(self):
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, len(self), len(self._text)),
+            _le(self.starts).tobytes(),
+            _le(self.ends).tobytes(),
+            _le(self._offsets).tobytes(),
+            self._text
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a transcript written by to_bytes(); raises ValueError on anything else"""
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("truncated transcript")
+        magic, version, count, text_bytes = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a transcript")
+        columns = []
+        position = _HEADER.size
+        for typecode, length in (("d", count), ("d", count), ("q", count + 1)):
+            column = array(typecode)
+            end = position + length * column.itemsize
+            column.frombytes(data[position:end])
+            columns.append(_le(column))
+            position = end
+        if len(data) != position + text_bytes or len(columns[2]) != count + 1:
+            raise ValueError("truncated transcript")
+        return cls._from_parts(*columns, bytes(data[position:]))
+
+    @staticmethod
+    def is_serialized(data):
+        return bytes(data[:len(_MAGIC)]) == _MAGIC
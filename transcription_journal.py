@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+
+
+class TranscriptionJournal:
+    """Durable per-chunk progress record for one chunked transcription job.
+
+    The journal lives in a single JSON file named after the job id (a hash of
+    the audio content and chunking options), so a job interrupted by an API
+    error or a browser refresh is picked up again by any later session that
+    uploads the same recording. Writes are atomic, so a crash mid-write never
+    corrupts the finished chunks.
+    """
+
+    def __init__(self, directory, job_id):
+        self.directory = directory
+        self.job_id = job_id
+        self.path = os.path.join(directory, f"{job_id}.json")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"job_id": self.job_id, "created": time.time(), "chunks": {}}
+
+    def _save(self):
+        self.state["updated"] = time.time()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def set_total(self, total):
+        with self._lock:
+            self.state["total"] = total
+            self._save()
+
+    def completed_segments(self, index, offset):
+        """Return the saved segments for a chunk, or None if it still needs work"""
+        entry = self.state["chunks"].get(str(index))
+        if entry and entry["status"] == "done" and abs(entry["offset"] - offset) < 1e-6:
+            return entry["segments"]
+        return None
+
+    def record_success(self, index, offset, segments):
+        with self._lock:
+            self.state["chunks"][str(index)] = {"status": "done", "offset": offset, "segments": list(segments)}
+            self._save()
+
+    def record_failure(self, index, offset, error):
+        with self._lock:
+            self.state["chunks"][str(index)] = {"status": "failed", "offset": offset, "error": str(error)}
+            self._save()
+
+    def done_count(self):
+        return sum(1 for entry in self.state["chunks"].values() if entry["status"] == "done")
+
+    def remove(self):
+        """Delete the journal once the job's result has been stored elsewhere"""
+        with self._lock:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def prune_journals(directory, max_age):
+    """Delete journals of abandoned jobs that haven't been touched for max_age seconds"""
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+
+
+class VectorIndex:
+    """In-memory cosine-similarity index: normalized float32 rows searched with one matrix product.
+
+    Rows are appended into a preallocated matrix that doubles when full, so
+    adding vectors one meeting at a time stays cheap (with dimensions=None
+    the first add() decides them). search() scores every row against every
+    query vector and keeps each row's best score, then returns the top k by
+    partial sort. Safe to share between threads.
+    """
+
+    def __init__(self, dimensions=None, capacity=1024):
+        self.dimensions = dimensions
+        self._capacity = capacity
+        self._vectors = None if dimensions is None else np.zeros((capacity, dimensions), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, ids, vectors):
+        """Append vectors (one row per id); ids are returned by search()"""
+        vectors = self.normalize(vectors)
+        with self._lock:
+            if self._vectors is None:
+                self.dimensions = vectors.shape[1]
+                self._vectors = np.zeros((self._capacity, self.dimensions), dtype=np.float32)
+            if vectors.shape[1] != self.dimensions:
+                raise ValueError(f"expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+            needed = self._size + len(vectors)
+            if needed > len(self._vectors):
+                capacity = max(needed, 2 * len(self._vectors))
+                self._vectors = np.resize(self._vectors, (capacity, self.dimensions))
+                self._ids = np.resize(self._ids, capacity)
+            self._vectors[self._size:needed] = vectors
+            self._ids[self._size:needed] = ids
+            self._size = needed
+
+    def remove(self, ids):
+        """Drop the rows of ids (unknown ids are ignored)"""
+        ids = np.fromiter(ids, dtype=np.int64)
+        with self._lock:
+            if not self._size or not len(ids):
+                return
+            keep = ~np.isin(self._ids[:self._size], ids)
+            size = int(keep.sum())
+            self._vectors[:size] = self._vectors[:self._size][keep]
+            self._ids[:size] = self._ids[:self._size][keep]
+            self._size = size
+
+    def search(self, queries, k=10, among=None):
+        """[(id, score)] of the k rows most similar to any of the query vectors, best first.
+
+        With among (ids), only those rows are candidates.
+        """
+        queries = self.normalize(queries)
+        with self._lock:
+            if not self._size or k <= 0:
+                return []
+            vectors, ids = self._vectors[:self._size], self._ids[:self._size]
+            if among is not None:
+                rows = np.isin(ids, np.fromiter(among, dtype=np.int64))
+                vectors, ids = vectors[rows], ids[rows]
+                if not len(ids):
+                    return []
+            scores = (vectors @ queries.T).max(axis=1)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
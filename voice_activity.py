@@ -0,0 +1,148 @@
+import bisect
+
+import numpy as np
+
+from transcript import Transcript
+
+
+class OffsetMap:
+    """Maps timestamps on a silence-trimmed timeline back to the original recording.
+
+    regions are the kept (start, end) spans of the original audio, in seconds.
+    They are laid end to end in the trimmed audio, so a trimmed timestamp is
+    found by binary search over the cumulative kept durations.
+    """
+
+    def __init__(self, regions, original_duration):
+        self.original_duration = original_duration
+        self.original_starts = [start for start, _ in regions]
+        self.durations = [end - start for start, end in regions]
+        self.trimmed_starts = []
+        position = 0.0
+        for duration in self.durations:
+            self.trimmed_starts.append(position)
+            position += duration
+        self.trimmed_duration = position
+
+    def _region(self, t, prefer_previous):
+        if prefer_previous:
+            index = bisect.bisect_left(self.trimmed_starts, t) - 1
+        else:
+            index = bisect.bisect_right(self.trimmed_starts, t) - 1
+        return min(max(index, 0), len(self.trimmed_starts) - 1)
+
+    def to_original(self, t, prefer_previous=False):
+        """Original-recording time for trimmed time t.
+
+        A time sitting exactly on a cut belongs to both neighbouring regions;
+        prefer_previous picks the earlier one, which is right for end times.
+        """
+        index = self._region(t, prefer_previous)
+        offset = min(max(t - self.trimmed_starts[index], 0.0), self.durations[index])
+        return self.original_starts[index] + offset
+
+    def remap_segments(self, segments):
+        segments = Transcript.from_segments(segments)
+        return segments.with_times(
+            (self.to_original(t) for t in segments.starts),
+            (self.to_original(t, prefer_previous=True) for t in segments.ends)
+        )
+
+
+# Sample widths numpy can view in place (24-bit audio is converted by pydub instead)
+_SAMPLE_TYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def audio_samples(audio):
+    """Interleaved integer samples of a pydub AudioSegment and their full-scale value, without copying"""
+    if audio.sample_width in _SAMPLE_TYPES:
+        samples = np.frombuffer(audio.raw_data, dtype=_SAMPLE_TYPES[audio.sample_width])
+    else:
+        samples = np.array(audio.get_array_of_samples())
+    return samples, float(1 << (8 * samples.itemsize - 1))
+
+
+def frame_energy_db(samples, frame_len, channels=1, full_scale=1.0, block_frames=4096):
+    """Mean energy of each frame in dBFS, computed block_frames frames at a time.
+
+    samples may be interleaved integers; only one block is ever converted to
+    float, so memory stays flat however long the recording is.
+    """
+    n_frames = len(samples) // (frame_len * channels)
+    energy = np.empty(n_frames, dtype=np.float64)
+    for first in range(0, n_frames, block_frames):
+        count = min(block_frames, n_frames - first)
+        block = samples[first * frame_len * channels:(first + count) * frame_len * channels].astype(np.float32)
+        if channels > 1:
+            block = block.reshape(-1, channels).mean(axis=1)
+        block = block.reshape(count, frame_len) / full_scale
+        energy[first:first + count] = np.mean(block * block, axis=1)
+    return 10 * np.log10(energy + 1e-10)
+
+
+def detect_speech(samples, sample_rate, channels=1, full_scale=1.0, frame_ms=30, silence_dbfs=-50.0,
+                  margin_db=12.0, speech_range_db=30.0, min_silence_ms=1000, padding_ms=250):
+    """Return (start, end) speech regions in seconds using frame energy.
+
+    A frame only counts as silence if it is below all of: silence_dbfs, the
+    noise floor (10th percentile of frame energy) plus margin_db, and the
+    typical speech level (median of the frames above silence_dbfs) minus
+    speech_range_db. A quieter speaker therefore stays in even when someone
+    else is much louder, and a recording without real silence is left alone.
+    Only pauses of at least min_silence_ms are removed, and padding_ms is kept
+    on each side of speech so words are never clipped.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_samples = len(samples) // channels
+    total = n_samples / sample_rate
+    if n_samples // frame_len == 0:
+        return [(0.0, total)]
+
+    energy_db = frame_energy_db(samples, frame_len, channels, full_scale)
+    loud = energy_db[energy_db > silence_dbfs]
+    if len(loud) == 0:
+        return []
+    threshold = min(silence_dbfs, np.percentile(energy_db, 10) + margin_db, np.median(loud) - speech_range_db)
+    voiced = energy_db > threshold
+
+    # Grow speech by the padding on both sides
+    pad = int(padding_ms / frame_ms)
+    if pad:
+        voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode="same") > 0
+
+    # Run boundaries: +1 where speech starts, -1 where it stops
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+
+    # Close pauses that are too short to be worth cutting
+    min_gap = int(min_silence_ms / frame_ms)
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    starts = starts[keep]
+    ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+
+    frame_s = frame_len / sample_rate
+    return [(float(start * frame_s), float(min(end * frame_s, total))) for start, end in zip(starts, ends)]
+
+
+def trim_silence(audio, **kwargs):
+    """Cut non-speech regions out of a pydub AudioSegment.
+
+    Returns (trimmed_audio, offset_map); offset_map is None when nothing was removed.
+    """
+    samples, full_scale = audio_samples(audio)
+    regions = detect_speech(samples, audio.frame_rate, audio.channels, full_scale, **kwargs)
+    total = len(audio) / 1000.0
+    if not regions or sum(end - start for start, end in regions) >= total - 0.5:
+        return audio, None
+
+    # Kept spans are copied once, straight from the raw bytes
+    raw = memoryview(audio.raw_data)
+    frame_bytes = audio.frame_width
+    trimmed = audio._spawn(b"".join(
+        raw[int(start * audio.frame_rate) * frame_bytes:int(end * audio.frame_rate) * frame_bytes]
+        for start, end in regions
+    ))
+    return trimmed, OffsetMap(regions, total)